@@ -0,0 +1,89 @@
+# External Libraries
+import numpy as np
+
+# Internal Libraries
+import config as cfg
+from config import Config
+
+CLIMB_MARGIN = 5_000.0  # Altitude above the initial one that counts as climbing away (m)
+V_SAFE = 5.0  # Touchdown speed limit (m/s)
+
+
+# --- Abort Predicates ---
+# Each takes the true plant state and the vehicle configuration and works on
+# floats or on length-N arrays (with per-vehicle T_max), so the same checks
+# serve main_loop and batch_loop.
+
+
+def out_of_propellant(state, config: Config):
+    """Propellant exhausted: Control._propellant_limit has cut the thrust for good."""
+    return state.m <= config.m_empty
+
+
+def climbing_away(state, config: Config):
+    """Far above the initial altitude, so guidance has lost the vehicle."""
+    return state.r > config.S0.r + CLIMB_MARGIN
+
+
+def unrecoverable(state, config: Config, v_safe: float = V_SAFE):
+    """
+    Descending too fast to land safely even under full thrust pointed
+    straight up from here on. The braking bound is optimistic on every term:
+    empty mass, gravity at the current radius, and the centrifugal lift of
+    the horizontal velocity at its largest, at the surface (thrust straight
+    up keeps the angular momentum r^2 dtheta). A run flagged here cannot
+    touch down slower than v_safe braking vertically; the bound does not
+    cover steering horizontal speed into extra lift, which is negligible
+    well below orbital speed, so it is a heuristic in that last respect.
+    """
+    z = state.r - config.r_moon
+    centrifugal = (state.r**2 * state.dtheta) ** 2 / config.r_moon**3
+    braking = config.T_max / config.m_empty - config.mu / state.r**2 + centrifugal
+    return (state.dr < 0) & (z > 0) & (state.dr**2 - 2 * braking * z > v_safe**2)
+
+
+# Failure reasons and their checks, in the order they are tried
+CHECKS = {
+    "propellant": out_of_propellant,
+    "climbing": climbing_away,
+    "descent_rate": unrecoverable,
+}
+
+
+class AbortMonitor:
+    """
+    In-loop abort checks that end a doomed run early with a classified
+    reason. Pass it to main.main_loop as aborts=, or its prune method to
+    batch.batch_loop as prune=.
+
+    Args:
+        config (Config): Vehicle configuration of the run (T_max may be per
+            vehicle in a batch).
+        checks (dict): Failure reason -> predicate(state, config).
+    """
+
+    def __init__(self, config: Config = cfg.cfg, checks: dict = CHECKS) -> None:
+        self.config = config
+        self.checks = checks
+        self.reason = None  # First reason that fired (single run)
+        self.t_abort = None
+        self.reasons = None  # Reason per vehicle, "" if none (batch)
+
+    def check(self, t: float, state) -> bool:
+        """True, with reason and t_abort set, once one of the checks fires."""
+        for reason, predicate in self.checks.items():
+            if predicate(state, self.config):
+                self.reason, self.t_abort = reason, t
+                return True
+        return False
+
+    def prune(self, t: float, state, active) -> np.ndarray:
+        """batch_loop prune hook: stops and classifies doomed vehicles."""
+        if self.reasons is None:
+            self.reasons = np.full(len(active), "", dtype=object)
+        stop = np.zeros(len(active), dtype=bool)
+        for reason, predicate in self.checks.items():
+            hit = active & ~stop & predicate(state, self.config)
+            self.reasons[hit] = reason
+            stop |= hit
+        return stop
@@ -0,0 +1,132 @@
+# External Libraries
+import dataclasses
+import time
+import numpy as np
+
+# Internal Libraries
+import config as cfg
+from config import Config, GuidanceParams
+from states import PolarState, stack
+from gnc.navigation import BatchNavigation, BatchEKFNavigation
+from gnc.guidance import BatchGuidance
+from gnc.control import BatchControl
+from sim.simulation import BatchSimulation
+
+
+def build(
+    n: int,
+    S0: PolarState = cfg.S0,
+    bias=1,
+    seed: int = 42,
+    params: GuidanceParams = GuidanceParams(),
+    config: Config = cfg.cfg,
+    ekf: bool = False,
+    terrain=None,
+):
+    """
+    Builds the batch GNC and plant objects for n vehicles.
+
+    Parameters:
+    n (int): Number of vehicles.
+    S0 (PolarState): Initial state, either scalar (shared) or with length-n fields.
+    bias (float or ndarray): Radar bias, scalar or per vehicle.
+    seed (int): Seed for the navigation noise generator.
+    params (GuidanceParams): Guidance parameters, scalar or per vehicle.
+    config (Config): Vehicle configuration; T_max, Isp and m0 may be per vehicle.
+    ekf (bool): Use EKF navigation driven by the thrust command.
+    terrain (Terrain): Optional terrain model the radar measures altitude above.
+
+    Returns:
+    tuple: The navigation, guidance, control and simulation objects.
+    """
+    config = dataclasses.replace(config, S0=S0)
+    ct = BatchControl(config, config.C0, n)
+    if ekf:
+        nav = BatchEKFNavigation(
+            config, bias, seed, n, control=ct.control_state, terrain=terrain
+        )
+    else:
+        nav = BatchNavigation(config, bias, seed, n, terrain)
+    gd = BatchGuidance(n, params)
+    sim = BatchSimulation(config, stack(S0, n))
+    return nav, gd, ct, sim
+
+
+def batch_loop(
+    nav, gd, ct, sim, t=0, dt=0.1, t_max=1000, logger=None, prune=None, terrain=None
+) -> tuple[np.ndarray, float]:
+    """
+    Batch counterpart of main.main_loop. Every vehicle advances in the same
+    vectorized call; each one stops independently once it reaches the surface,
+    and the loop ends when all vehicles have stopped or the maximum time is
+    exceeded.
+
+    Parameters:
+    nav (BatchNavigation): The navigation object.
+    gd (BatchGuidance): The guidance object.
+    ct (BatchControl): The control object.
+    sim (BatchSimulation): The simulation object.
+    t (float): The starting time for the simulation. Defaults to 0.
+    dt (float): The time step for the simulation. Defaults to 0.1.
+    t_max (float): The maximum time for the simulation. Defaults to 1000.
+    logger (TelemetrySink): Optional batch-aware logger.
+    prune (callable): Optional prune(t, sim_state, active) returning a mask of
+        vehicles to stop early, checked at the start of every tick.
+    terrain (Terrain): Optional terrain model; vehicles then stop on the local
+        ground, looked up for all of them in one vectorized call.
+
+    Returns:
+    tuple: The final time of each vehicle and the wall-clock duration.
+    """
+    n = len(sim.state.r)
+    active = np.ones(n, dtype=bool)
+    t_final = np.full(n, np.nan)
+    start = time.time()
+    while active.any():
+        if prune is not None:
+            stop = active & prune(t, sim.state, active)
+            t_final[stop] = t
+            active &= ~stop
+            if not active.any():
+                break
+
+        # Navigation Step
+        nav_state = nav.step(dt, sim.state, active)
+
+        # Guidance Step
+        guid_state = gd.step(dt, nav_state, active)
+
+        # Control Step
+        ctrl_state = ct.step(dt, nav_state, guid_state, active)
+
+        # Logging
+        if logger is not None:
+            logger.log(t, nav_state, guid_state, ctrl_state, sim.state)
+
+        # Simulation Step (vehicles that just finished take one last step,
+        # matching the single-vehicle loop)
+        ground = cfg.r_moon if terrain is None else cfg.r_moon + terrain.heights(sim.state.theta)
+        done = active & ((sim.state.r - ground < 0) | (t > t_max))
+        sim.step(dt, ctrl_state, active)
+
+        t += dt
+        t_final[done] = t
+        active &= ~done
+    end = time.time()
+
+    return t_final, end - start
+
+
+if __name__ == "__main__":
+    n = 10_000
+    nav, gd, ct, sim = build(n)
+    t_final, t_elapsed = batch_loop(nav, gd, ct, sim)
+    v_final = np.sqrt(sim.state.dr**2 + (sim.state.dtheta * sim.state.r) ** 2)
+
+    # --- Printing Results ---
+    print("--- Batch Results ---")
+    print(f"Vehicles: {n}")
+    print(f"Real Time: {t_elapsed:.2f} s")
+    print(f"Descents per second: {n / t_elapsed:.0f}")
+    print(f"Mean Time of Flight: {np.mean(t_final):.2f} s")
+    print(f"Safe Landings: {np.mean(v_final < 5) * 100:.1f} %")
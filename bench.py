@@ -0,0 +1,200 @@
+# External Libraries
+import argparse
+import dataclasses
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+import numpy as np
+
+# Internal Libraries
+import config as cfg
+from states import PolarState, LVLHState
+from gnc.navigation import Navigation, EKFNavigation
+from gnc.guidance import Guidance
+from gnc.control import Control
+from sim.simulation import Simulation
+from telemetry import Logger, ColumnLogger
+from main import main_loop
+from fastpath import KEYS, fast_loop
+import batch
+
+# Primary (higher is better) metric of each result, used for baseline comparison
+PRIMARY = ("calls_per_s", "sim_speed", "runs_per_s", "starts_per_s")
+ROOT = Path(__file__).parent
+
+
+def build():
+    """Fresh nominal objects for one descent."""
+    return (
+        Navigation(cfg.cfg, 1, 42),
+        Guidance(verbose=False),
+        Control(cfg.cfg, dataclasses.replace(cfg.C0)),
+        Simulation(cfg.cfg, cfg.S0),
+    )
+
+
+def micro(fn, number: int, repeat: int = 5) -> dict:
+    """Best-of-repeat timing of fn()."""
+    best = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+    return {"ns_per_call": best * 1e9, "calls_per_s": 1 / best}
+
+
+def micro_benchmarks(scale: float) -> dict:
+    nav, gd, ct, sim = build()
+    lvlh = LVLHState(2_000, -20, 470_000, 30, 9_000)
+    guid = gd.step(0.1, lvlh)
+    ctrl = ct.step(0.1, lvlh, guid)
+    plr = PolarState(cfg.r_moon + 2_000, -20, 0.27, 1.7e-5, 9_000)
+    n = max(int(20_000 * scale), 100)
+    logger, column_logger = Logger(KEYS), ColumnLogger(KEYS)
+    ekf = EKFNavigation(cfg.cfg, 1, 42, control=ctrl)
+    return {
+        "guidance.cubic": micro(
+            lambda: gd._cubic_guidance(0.0, 120.0, 2_000, 0, -20, 0), n
+        ),
+        "guidance.cubic_solve": micro(
+            lambda: gd._cubic_guidance_solve(0.0, 120.0, 2_000, 0, -20, 0), n
+        ),
+        "guidance.step": micro(lambda: gd.step(0.1, lvlh), n),
+        "control.step": micro(lambda: ct.step(0.1, lvlh, guid), n),
+        "navigation.step": micro(lambda: nav.step(0.1, plr), n),
+        "navigation.ekf_step": micro(lambda: ekf.step(0.1, plr), n),
+        "simulation.rk4": micro(lambda: sim._rk4(0.1, ctrl), n),
+        "logger.log": micro(lambda: logger.log(0.0, lvlh, guid, ctrl, plr), n),
+        "column_logger.log": micro(
+            lambda: column_logger.log(0.0, lvlh, guid, ctrl, plr), n
+        ),
+    }
+
+
+def descent(loop) -> dict:
+    nav, gd, ct, sim = build()
+    start = time.perf_counter()
+    if loop is main_loop:
+        t, _, _ = loop(nav=nav, gd=gd, ct=ct, sim=sim, logger=Logger(KEYS))
+    else:
+        t, _, _ = loop(nav, gd, ct, sim, record=True)
+    wall = time.perf_counter() - start
+    steps = sim.nfev / 4
+    return {
+        "wall_s": wall,
+        "sim_speed": t / wall,
+        "steps_per_s": steps / wall,
+        "runs_per_s": 1 / wall,
+    }
+
+
+def macro_benchmarks(scale: float) -> dict:
+    n = max(int(1_000 * scale), 10)
+    nav, gd, ct, sim = batch.build(n)
+    t_final, wall = batch.batch_loop(nav, gd, ct, sim)
+    return {
+        "descent.main_loop": descent(main_loop),
+        "descent.fast_loop": descent(fast_loop),
+        "descent.batch": {
+            "vehicles": n,
+            "wall_s": wall,
+            "sim_speed": float(np.sum(t_final)) / wall,
+            "runs_per_s": n / wall,
+        },
+    }
+
+
+def cold_start(code: str, repeat: int = 5) -> dict:
+    """
+    Best-of-repeat wall time of a fresh interpreter running code, which is what
+    every short-lived worker process pays before its first descent. The code
+    exits nonzero if it pulled in matplotlib.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT)
+        best = min(best, time.perf_counter() - start)
+    return {
+        "wall_s": best,
+        "starts_per_s": 1 / best,
+        "plotting_loaded": proc.returncode != 0,
+    }
+
+
+def startup_benchmarks() -> dict:
+    check = "import sys; sys.exit('matplotlib' in sys.modules)"
+    return {
+        "startup.interpreter": cold_start(check),
+        # What a dispersion, fork or sweep worker imports before its first task
+        "startup.worker": cold_start(f"import dispersion; {check}"),
+    }
+
+
+def run(scale: float = 1.0) -> dict:
+    results = {
+        **micro_benchmarks(scale),
+        **macro_benchmarks(scale),
+        **startup_benchmarks(),
+    }
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "scale": scale,
+            # Linux reports ru_maxrss in KiB
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Returns the benchmarks whose primary metric fell by more than tolerance
+    (a fraction) relative to the baseline.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        metric = next(k for k in PRIMARY if k in result)
+        ratio = result[metric] / base[metric]
+        flag = "REGRESSION" if ratio < 1 - tolerance else "ok"
+        print(f"{name:<24} {metric:<12} {ratio:6.2f}x  {flag}")
+        if ratio < 1 - tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def print_results(report: dict) -> None:
+    print("--- Benchmarks ---")
+    for name, result in report["results"].items():
+        metric = next(k for k in PRIMARY if k in result)
+        print(f"{name:<24} {metric:<12} {result[metric]:>14,.1f}")
+    print(f"Peak RSS: {report['meta']['peak_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulation benchmark suite")
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a stored JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--scale", type=float, default=1.0, help="Workload size")
+    args = parser.parse_args()
+
+    report = run(args.scale)
+    print_results(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("--- Against Baseline ---")
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
@@ -0,0 +1,279 @@
+# External Libraries
+import ast
+import dataclasses
+import functools
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+
+# Internal Libraries
+from config import GuidanceParams
+from telemetry import ColumnLogger
+from fastpath import KEYS
+from dispersion import RunSpec, RunSummary, build_config, run_one, sample_runs
+
+ROOT = Path(__file__).parent
+
+
+@dataclass(frozen=True)
+class Case:
+    """One point of a sweep: a dispersed run flown with given guidance settings."""
+
+    spec: RunSpec
+    params: GuidanceParams = GuidanceParams()
+    dt: float = 0.1
+    t_max: float = 1000
+    integrator: str = "rk4"
+
+
+def _imports(node: ast.AST):
+    # Import statements under node, skipping `if __name__ == "__main__":` blocks
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.If) and ast.unparse(child.test) == "__name__ == '__main__'":
+            continue
+        if isinstance(child, (ast.Import, ast.ImportFrom)):
+            yield child
+        else:
+            yield from _imports(child)
+
+
+def _module_file(name: str) -> Path | None:
+    # Source file of a module of this repository, or None for anything else
+    path = ROOT.joinpath(*name.split("."))
+    for file in (path.with_suffix(".py"), path / "__init__.py"):
+        if file.is_file():
+            return file
+    return None
+
+
+def sources(entry: str = "cache.py") -> list[Path]:
+    """
+    Every repository module entry imports, directly or through other
+    modules (including package __init__ files), found by parsing the
+    sources rather than importing them.
+    """
+    found, todo = set(), [ROOT / entry]
+    while todo:
+        file = todo.pop()
+        if file in found:
+            continue
+        found.add(file)
+        for node in _imports(ast.parse(file.read_bytes())):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            else:
+                names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            for name in names:
+                # Importing a.b.c runs a, a.b and a.b.c
+                parts = name.split(".")
+                for i in range(1, len(parts) + 1):
+                    module = _module_file(".".join(parts[:i]))
+                    if module is not None:
+                        todo.append(module)
+    return sorted(found)
+
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """Hash of every source run_case depends on, so results from older code never match."""
+    digest = hashlib.sha256()
+    for file in sources():
+        digest.update(file.relative_to(ROOT).as_posix().encode())
+        digest.update(file.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def case_key(case: Case) -> str:
+    """
+    Stable content hash of everything that determines a run: the full Config
+    it flies with, the guidance parameters, seed and index, radar bias,
+    step size, duration, integrator and the code version. Floats are written
+    with repr, so any change to any input changes the key.
+    """
+    spec = case.spec
+    content = {
+        "config": dataclasses.asdict(build_config(spec)),
+        "params": dataclasses.asdict(case.params),
+        "seed": spec.seed,
+        "index": spec.index,
+        "bias": spec.bias,
+        "dt": case.dt,
+        "t_max": case.t_max,
+        "integrator": case.integrator,
+        "code": code_version(),
+    }
+    text = json.dumps(content, sort_keys=True, default=float)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def run_case(case: Case, telemetry: bool = False) -> tuple[RunSummary, dict]:
+    """Flies one case; returns its summary and, if asked for, its telemetry."""
+    logger = ColumnLogger(KEYS) if telemetry else None
+    summary = run_one(
+        case.spec, case.dt, case.t_max, case.params, case.integrator, logger
+    )
+    records = {k: np.asarray(v) for k, v in logger.records.items()} if telemetry else None
+    return summary, records
+
+
+class ResultCache:
+    """
+    On-disk cache of run results keyed by case_key. Each entry is a summary
+    JSON file with an optional telemetry .npz next to it. The total size is
+    bounded by evicting the least recently used entries (by file mtime, which
+    every hit refreshes).
+
+    Args:
+        path (str): Cache directory.
+        max_bytes (int): Size bound of all entries together.
+    """
+
+    def __init__(self, path: str = "data/cache", max_bytes: int = 512 * 2**20) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # key -> [last use, size in bytes]; built once, then kept up to date
+        self._index = {}
+        for file in self.path.glob("*.json"):
+            self._index[file.stem] = [file.stat().st_mtime, self._size(file.stem)]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, size in self._index.values())
+
+    def get(self, key: str, telemetry: bool = False):
+        """
+        Returns (summary, telemetry) for a key, or None on a miss. Asking for
+        telemetry misses if the entry was stored without it.
+        """
+        if key not in self._index or (telemetry and not self._npz(key).exists()):
+            self.misses += 1
+            return None
+        summary = RunSummary(**json.loads(self._json(key).read_text()))
+        records = None
+        if telemetry:
+            with np.load(self._npz(key)) as npz:
+                records = {k: npz[k] for k in npz.files}
+        now = time.time()
+        os.utime(self._json(key), (now, now))
+        self._index[key][0] = now
+        self.hits += 1
+        return summary, records
+
+    def put(self, key: str, summary: RunSummary, telemetry: dict = None) -> None:
+        # Written to a temporary name first so a crash never leaves half an entry
+        if telemetry is not None:
+            tmp = self.path / f"{key}.tmp.npz"
+            np.savez(tmp, **telemetry)
+            os.replace(tmp, self._npz(key))
+        tmp = self.path / f"{key}.tmp"
+        tmp.write_text(json.dumps(dataclasses.asdict(summary)))
+        os.replace(tmp, self._json(key))
+        self._index[key] = [time.time(), self._size(key)]
+        self.evict()
+
+    def evict(self) -> None:
+        """Drops least recently used entries until the cache fits max_bytes."""
+        total = self.size
+        if total <= self.max_bytes:
+            return
+        for key, (_, size) in sorted(self._index.items(), key=lambda kv: kv[1][0]):
+            if total <= self.max_bytes:
+                break
+            self._json(key).unlink(missing_ok=True)
+            self._npz(key).unlink(missing_ok=True)
+            del self._index[key]
+            total -= size
+
+    def _json(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def _npz(self, key: str) -> Path:
+        return self.path / f"{key}.npz"
+
+    def _size(self, key: str) -> int:
+        return sum(p.stat().st_size for p in (self._json(key), self._npz(key)) if p.exists())
+
+
+def _run_case(args) -> tuple[RunSummary, dict]:
+    return run_case(*args)
+
+
+def sweep(
+    cases: list[Case],
+    cache: ResultCache,
+    telemetry: bool = False,
+    workers: int = None,
+    chunksize: int = None,
+) -> list[RunSummary]:
+    """
+    Runs a sweep through the cache: only cases without a stored result are
+    flown (over a process pool), and every result is returned in case order.
+
+    Args:
+        cases (list): Sweep points.
+        cache (ResultCache): Where results are looked up and stored.
+        telemetry (bool): Also store the KEYS telemetry of newly flown cases.
+        workers (int): Worker processes; defaults to the CPU count.
+        chunksize (int): Cases sent to a worker per task.
+    """
+    keys = [case_key(case) for case in cases]
+    results = {}
+    missing = {}
+    for key, case in zip(keys, cases):
+        hit = cache.get(key, telemetry)
+        if hit is not None:
+            results[key] = hit[0]
+        else:
+            missing.setdefault(key, case)
+
+    args = [(case, telemetry) for case in missing.values()]
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(args) <= 1:
+        outputs = map(_run_case, args)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        chunksize = chunksize or max(1, len(args) // (4 * workers))
+        outputs = pool.map(_run_case, args, chunksize=chunksize)
+    try:
+        for key, (summary, records) in zip(missing, outputs):
+            cache.put(key, summary, records)
+            results[key] = summary
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return [results[key] for key in keys]
+
+
+if __name__ == "__main__":
+    # Approach-stage duration against dispersed runs; the second pass only
+    # flies the points added on the new axis value
+    specs = sample_runs(16, seed=42)
+    cache = ResultCache()
+    for t_approach in ([130, 150], [130, 150, 170]):
+        cases = [
+            Case(spec, GuidanceParams(t_approach=t)) for t in t_approach for spec in specs
+        ]
+        cache.hits = cache.misses = 0
+        start = time.time()
+        summaries = sweep(cases, cache)
+        end = time.time()
+        print(f"--- Sweep over t_approach {t_approach} ---")
+        print(f"Points: {len(cases)} in {end - start:.2f} s ({cache.hits} hits, {cache.misses} misses)")
+        for t in t_approach:
+            v = [s.v_touchdown for s, c in zip(summaries, cases) if c.params.t_approach == t]
+            print(f"t_approach {t}: touchdown velocity {np.mean(v):.2f} ± {np.std(v):.2f} m/s")
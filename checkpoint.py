@@ -0,0 +1,211 @@
+# External Libraries
+import copy
+import dataclasses
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+
+# Internal Libraries
+import config as cfg
+from states import ControlState, GuidanceState, PolarState
+from gnc.navigation import Navigation, velocity_seed
+from gnc.guidance import Guidance
+from gnc.control import Control
+from sim.simulation import Simulation
+from main import main_loop
+from dispersion import RunSummary, StageRecorder, summarize
+
+# Extra filter state carried by EKF navigation, velocity noise stream included
+NAV_FILTER = ("xhat", "P", "_since_radar", "_since_velocity", "velocity_rng")
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """
+    Complete mid-flight state of the main loop, captured at the start of a tick.
+    Holds copies only, so one checkpoint can be restored any number of times,
+    and it pickles, so it can be shipped to worker processes.
+    """
+
+    t: float
+    sim_state: PolarState
+    sim_h: float  # Step size carried by the adaptive integrator
+    sim_fired: frozenset  # Events already located
+    sim_nfev: int
+    z_filtered: float
+    dz_filtered: float
+    rng_state: dict  # Bit-generator state of the radar noise
+    nav_filter: dict  # EKF estimate, covariance and measurement timers, if any
+    guidance_state: GuidanceState
+    x_hold: float
+    control_state: ControlState
+
+
+def snapshot(t: float, nav, gd, ct, sim) -> Checkpoint:
+    """Captures the loop state at time t. Works for scalar and batch objects."""
+    return Checkpoint(
+        t=t,
+        sim_state=copy.deepcopy(sim.state),
+        sim_h=sim._h,
+        sim_fired=frozenset(sim._fired),
+        sim_nfev=sim.nfev,
+        z_filtered=copy.deepcopy(nav.z_filtered),
+        dz_filtered=copy.deepcopy(nav.dz_filtered),
+        rng_state=copy.deepcopy(nav.rng.bit_generator.state),
+        nav_filter=copy.deepcopy({k: getattr(nav, k) for k in NAV_FILTER if hasattr(nav, k)}),
+        guidance_state=copy.deepcopy(gd.guidance_state),
+        x_hold=copy.deepcopy(gd.x_hold),
+        control_state=copy.deepcopy(ct.control_state),
+    )
+
+
+def restore(checkpoint: Checkpoint, nav, gd, ct, sim) -> float:
+    """
+    Writes a checkpoint into the loop objects and returns the time to resume
+    from. The objects must be built with the same configuration as the ones
+    the checkpoint was taken from.
+    """
+    c = checkpoint
+    sim.state = copy.deepcopy(c.sim_state)
+    sim._h = c.sim_h
+    sim._fired = set(c.sim_fired)
+    sim.nfev = c.sim_nfev
+    sim.event = None
+    nav.z_filtered = copy.deepcopy(c.z_filtered)
+    nav.dz_filtered = copy.deepcopy(c.dz_filtered)
+    nav.rng.bit_generator.state = c.rng_state
+    for k, v in copy.deepcopy(c.nav_filter).items():
+        setattr(nav, k, v)
+    gd.guidance_state = copy.deepcopy(c.guidance_state)
+    gd.x_hold = copy.deepcopy(c.x_hold)
+    # In place, since EKF navigation holds a reference to the control state
+    vars(ct.control_state).update(copy.deepcopy(vars(c.control_state)))
+    return c.t
+
+
+def at_stage(stage: int):
+    """until= predicate for main_loop: pause once guidance reaches stage."""
+
+    def until(t, sim_state, guidance_state) -> bool:
+        return guidance_state.stage >= stage
+
+    return until
+
+
+def nominal() -> tuple:
+    """Fresh nominal objects for one descent, the default branch builder."""
+    return (
+        Navigation(cfg.cfg, 1, 42),
+        Guidance(verbose=False),
+        Control(cfg.cfg, dataclasses.replace(cfg.C0)),
+        Simulation(cfg.cfg, cfg.S0),
+    )
+
+
+def run_branch(
+    checkpoint: Checkpoint,
+    index: int,
+    seed: int = None,
+    build=nominal,
+    modify=None,
+    dt: float = 0.1,
+    t_max: float = 1000,
+) -> RunSummary:
+    """
+    Flies one continuation of a checkpoint to the surface. Safe to call from a
+    worker process.
+
+    Args:
+        checkpoint (Checkpoint): State to continue from.
+        index (int): Branch number.
+        seed (int): If given, the radar noise is reseeded from the
+            SeedSequence child (seed, index), and EKF velocity noise from its
+            velocity_seed child; otherwise the branch continues the
+            checkpoint's own noise streams.
+        build (callable): Returns fresh (nav, gd, ct, sim) objects.
+        modify (callable): Optional modify(index, nav, gd, ct, sim) applied after
+            the restore, e.g. to perturb the state or swap guidance settings.
+            Must be a module-level function to run in a pool.
+    """
+    nav, gd, ct, sim = build()
+    t = restore(checkpoint, nav, gd, ct, sim)
+    if seed is not None:
+        branch_seed = np.random.SeedSequence(seed, spawn_key=(index,))
+        nav.rng = np.random.default_rng(branch_seed)
+        if hasattr(nav, "velocity_rng"):
+            nav.velocity_rng = np.random.default_rng(velocity_seed(branch_seed))
+    if modify is not None:
+        modify(index, nav, gd, ct, sim)
+    recorder = StageRecorder()
+    recorder._stage = gd.guidance_state.stage  # Stages reached before the fork are not re-recorded
+
+    t, _, _ = main_loop(
+        t=t, dt=dt, t_max=t_max, nav=nav, gd=gd, ct=ct, sim=sim, logger=recorder
+    )
+    return summarize(
+        index, t, sim.state, recorder.stage_times, sim.cfg, gd.params.x_target
+    )
+
+
+def _run_branch(args) -> RunSummary:
+    return run_branch(*args)
+
+
+def fork(
+    checkpoint: Checkpoint,
+    n: int,
+    seed: int = None,
+    build=nominal,
+    modify=None,
+    dt: float = 0.1,
+    t_max: float = 1000,
+    workers: int = None,
+    chunksize: int = None,
+) -> list[RunSummary]:
+    """
+    Launches n continuations from one checkpoint, so the shared prefix of a
+    sweep is only flown once. Branches depend only on the checkpoint and their
+    index, so results are identical for any number of workers.
+
+    Args:
+        checkpoint (Checkpoint): State to branch from.
+        n (int): Number of branches.
+        seed, build, modify, dt, t_max: As in run_branch.
+        workers (int): Worker processes; defaults to the CPU count.
+        chunksize (int): Branches sent to a worker per task.
+    """
+    args = [(checkpoint, i, seed, build, modify, dt, t_max) for i in range(n)]
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        return [_run_branch(a) for a in args]
+    chunksize = chunksize or max(1, n // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_branch, args, chunksize=chunksize))
+
+
+if __name__ == "__main__":
+    n = 1_000
+
+    # Fly the common braking phase once, up to the approach gate
+    start = time.time()
+    nav, gd, ct, sim = nominal()
+    t, _, _ = main_loop(nav=nav, gd=gd, ct=ct, sim=sim, logger=StageRecorder(), until=at_stage(2))
+    gate = snapshot(t, nav, gd, ct, sim)
+    prefix = time.time() - start
+
+    # Branch the approach and final phases with independent radar noise
+    start = time.time()
+    summaries = fork(gate, n, seed=42)
+    end = time.time()
+
+    v = np.array([s.v_touchdown for s in summaries])
+    err = np.array([s.downrange_error for s in summaries])
+
+    # --- Printing Results ---
+    print("--- Forked Descents ---")
+    print(f"Braking phase: {gate.t:.1f} s flown once in {prefix:.2f} s")
+    print(f"Branches: {n} in {end - start:.2f} s")
+    print(f"Touchdown Velocity: {np.mean(v):.2f} ± {np.std(v):.2f} m/s")
+    print(f"Downrange Error: {np.mean(err):.1f} ± {np.std(err):.1f} m")
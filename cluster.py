@@ -0,0 +1,398 @@
+# External Libraries
+import dataclasses
+import json
+import math
+import os
+import secrets
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing import AuthenticationError, Process
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+# Internal Libraries
+from cache import Case, case_key, code_version, run_case
+from config import GuidanceParams
+from dispersion import RunSpec, RunSummary, sample_runs
+from hil import authkey
+from states import PolarState
+
+KEY_VARIABLE = "APOLLO_SWEEP_KEY"  # Environment variable holding the shared secret
+
+
+# --- Wire Format ---
+# Peers authenticate with the HMAC challenge of multiprocessing.connection,
+# then exchange JSON messages as raw bytes; nothing received is unpickled.
+
+
+def _send(conn, *msg) -> None:
+    conn.send_bytes(json.dumps(msg).encode())
+
+
+def _recv(conn) -> list:
+    return json.loads(conn.recv_bytes())
+
+
+def _case(d: dict) -> Case:
+    spec = RunSpec(**dict(d["spec"], S0=PolarState(**d["spec"]["S0"])))
+    return Case(**dict(d, spec=spec, params=GuidanceParams(**d["params"])))
+
+
+class Coordinator:
+    """
+    Serves the cases of a sweep to workers over TCP and collects their
+    results. Workers pull batches, fly them and stream back one compact
+    result per case; every result is appended to a JSON-lines ledger as it
+    arrives, so a coordinator restarted on the same ledger only serves the
+    cases still missing.
+
+    Work held by a worker is leased: if the worker disconnects, or sends
+    nothing for lease_s, its unfinished cases go back to the front of the
+    queue. Batch sizes follow each worker's measured throughput (about
+    target_s of work per batch, never more than a fair share of what is
+    left), and once the queue is empty idle workers are handed duplicates
+    of the oldest outstanding cases, so a slow node cannot stall the tail.
+    The first result for a case wins.
+
+    Args:
+        cases (list): Sweep points (cache.Case), keyed by cache.case_key.
+        ledger (str): JSON-lines file of finished results.
+        address (tuple): (host, port) to listen on; port 0 picks a free one.
+        lease_s (float): Silence after which a worker's cases are requeued.
+        target_s (float): Wall time a batch should take a worker.
+        max_batch (int): Largest batch handed out.
+        key (bytes): Shared secret workers must know; APOLLO_SWEEP_KEY by
+            default, and the coordinator refuses to start without one.
+    """
+
+    def __init__(
+        self,
+        cases: list[Case],
+        ledger: str = "data/ledger.jsonl",
+        address: tuple = ("127.0.0.1", 0),
+        lease_s: float = 30.0,
+        target_s: float = 2.0,
+        max_batch: int = 256,
+        key: bytes = None,
+    ) -> None:
+        self.authkey = authkey(KEY_VARIABLE, key)
+        self.keys = [case_key(case) for case in cases]
+        self.cases = dict(zip(self.keys, cases))
+        self.lease_s = lease_s
+        self.target_s = target_s
+        self.max_batch = max_batch
+        self.ledger = Path(ledger)
+        self.ledger.parent.mkdir(parents=True, exist_ok=True)
+        self.results = self._replay()
+        self.resumed = sum(key in self.results for key in self.cases)
+        self.queue = deque(key for key in self.cases if key not in self.results)
+        self.leases = {}  # Key -> {worker: time leased}
+        self.seen = {}  # Worker -> time of its last message
+        self.rate = {}  # Worker -> cases per second (moving average)
+        self.stats = {"workers": 0, "requeued": 0, "speculative": 0, "duplicates": 0}
+        self._cond = threading.Condition()
+        self._file = open(self.ledger, "a")
+        self._closed = False
+        self._listener = Listener(address, authkey=self.authkey)
+        self.address = self._listener.address
+
+    def start(self) -> "Coordinator":
+        """Accepts workers on a background thread; returns self."""
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    @property
+    def done(self) -> bool:
+        return all(key in self.results for key in self.cases)
+
+    def wait(self, timeout: float = None) -> list[RunSummary]:
+        """Blocks until every case has a result; returns them in case order."""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self.done:
+                if end is not None and time.monotonic() > end:
+                    raise TimeoutError(f"{len(self.cases) - self._finished()} cases unfinished")
+                self._cond.wait(min(1.0, self.lease_s))
+                self._reap()
+        return [self.results[key] for key in self.keys]
+
+    def close(self) -> None:
+        """Stops accepting workers and closes the ledger."""
+        if self._closed:
+            return
+        self._closed = True
+        # Wake the accept thread with a connection it will drop
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self._listener.close()
+        with self._cond:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def _finished(self) -> int:
+        return sum(key in self.results for key in self.cases)
+
+    def _replay(self) -> dict:
+        results = {}
+        if not self.ledger.exists():
+            return results
+        for line in self.ledger.read_text().splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short by a crash is flown again
+            results[entry["key"]] = RunSummary(**entry["summary"])
+        return results
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn = self._listener.accept()
+            except (AuthenticationError, EOFError, ConnectionError):
+                continue  # A peer without the key, or one that hung up mid-handshake
+            except OSError:
+                return
+            if self._closed:
+                conn.close()
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn) -> None:
+        # One thread per worker connection: hello, then pulls and results
+        worker = None
+        try:
+            _, name, code = _recv(conn)
+            if code != code_version():
+                _send(conn, "reject", f"worker code {code} != coordinator code {code_version()}")
+                return
+            with self._cond:
+                self.stats["workers"] += 1
+                worker = f"{name}#{self.stats['workers']}"
+                self.seen[worker] = time.monotonic()
+            _send(conn, "ok", worker)
+            while True:
+                msg = _recv(conn)
+                if msg[0] == "pull":
+                    _send(conn, *self._lease(worker))
+                elif msg[0] == "result":
+                    _, key, fields, seconds = msg
+                    self._complete(worker, key, RunSummary(*fields), seconds)
+        except (EOFError, OSError, ValueError, TypeError):
+            pass  # Gone, or sent something that is not a message
+        finally:
+            conn.close()
+            if worker is not None:
+                with self._cond:
+                    self._release(worker)
+
+    def _lease(self, worker: str) -> tuple:
+        with self._cond:
+            now = time.monotonic()
+            self.seen[worker] = now
+            self._reap()
+            if self.done or self._closed:
+                return ("done",)
+            size = self._batch_size(worker)
+            keys = []
+            while self.queue and len(keys) < size:
+                key = self.queue.popleft()
+                if key not in self.results:
+                    keys.append(key)
+            if not keys:
+                keys = self._speculate(worker, size)
+                self.stats["speculative"] += len(keys)
+            if not keys:
+                return ("wait", 0.2)
+            for key in keys:
+                self.leases.setdefault(key, {})[worker] = now
+            return ("batch", [(key, dataclasses.asdict(self.cases[key])) for key in keys])
+
+    def _batch_size(self, worker: str) -> int:
+        rate = self.rate.get(worker)
+        size = 1 if rate is None else int(rate * self.target_s)
+        fair = math.ceil(len(self.queue) / max(len(self.seen), 1))
+        return max(1, min(size, fair, self.max_batch))
+
+    def _speculate(self, worker: str, size: int) -> list:
+        # Outstanding cases held by a single other worker, oldest lease first
+        candidates = [
+            (min(holders.values()), key)
+            for key, holders in self.leases.items()
+            if key not in self.results and worker not in holders and len(holders) < 2
+        ]
+        return [key for _, key in sorted(candidates)[:size]]
+
+    def _complete(self, worker: str, key: str, summary: RunSummary, seconds: float) -> None:
+        with self._cond:
+            self.seen[worker] = time.monotonic()
+            rate = 1 / max(seconds, 1e-6)
+            old = self.rate.get(worker)
+            self.rate[worker] = rate if old is None else 0.7 * old + 0.3 * rate
+            self.leases.pop(key, None)
+            if key in self.results:
+                self.stats["duplicates"] += 1
+                return
+            self.results[key] = summary
+            entry = {"key": key, "summary": dataclasses.asdict(summary)}
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+            self._cond.notify_all()
+
+    def _reap(self) -> None:
+        # Requeue the cases of workers that have gone silent
+        now = time.monotonic()
+        for worker, seen in list(self.seen.items()):
+            if now - seen > self.lease_s:
+                self._release(worker)
+
+    def _release(self, worker: str) -> None:
+        self.seen.pop(worker, None)
+        for key in [k for k, holders in self.leases.items() if worker in holders]:
+            holders = self.leases[key]
+            del holders[worker]
+            if not holders:
+                del self.leases[key]
+                if key not in self.results:
+                    self.queue.appendleft(key)
+                    self.stats["requeued"] += 1
+
+
+def work(
+    address, name: str = None, delay: float = 0.0, limit: int = None, key: bytes = None
+) -> int:
+    """
+    Worker loop: pulls batches from a coordinator, flies them headless and
+    streams back one result per case until the coordinator is done or gone.
+
+    Args:
+        address (tuple): (host, port) of the coordinator.
+        name (str): Worker name; host and process id by default.
+        delay (float): Extra time per case (s), to stand in for a slow node.
+        limit (int): Drop the connection after this many cases, unfinished
+            work and all, to stand in for a lost node.
+        key (bytes): Shared secret of the coordinator; APOLLO_SWEEP_KEY by
+            default.
+
+    Returns:
+        int: Cases flown.
+    """
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    conn = Client(tuple(address), authkey=authkey(KEY_VARIABLE, key))
+    flown = 0
+    try:
+        _send(conn, "hello", name, code_version())
+        reply = _recv(conn)
+        if reply[0] == "reject":
+            raise RuntimeError(reply[1])
+        while True:
+            _send(conn, "pull")
+            msg = _recv(conn)
+            if msg[0] == "done":
+                break
+            if msg[0] == "wait":
+                time.sleep(msg[1])
+                continue
+            for case_id, case in msg[1]:
+                if limit is not None and flown >= limit:
+                    return flown
+                start = time.perf_counter()
+                summary, _ = run_case(_case(case))
+                if delay:
+                    time.sleep(delay)
+                seconds = time.perf_counter() - start
+                _send(conn, "result", case_id, dataclasses.astuple(summary), seconds)
+                flown += 1
+    except (EOFError, ConnectionError):
+        pass  # The coordinator finished or went away
+    finally:
+        conn.close()
+    return flown
+
+
+def run_local(
+    cases: list[Case],
+    workers: int = None,
+    ledger: str = "data/ledger.jsonl",
+    delays: list = None,
+    limits: list = None,
+    **options,
+) -> tuple[list[RunSummary], dict]:
+    """
+    Runs a sweep with a coordinator in this process and worker processes on
+    localhost standing in for nodes, sharing a fresh random key unless
+    options give one.
+
+    Args:
+        cases (list): Sweep points.
+        workers (int): Worker processes; defaults to the CPU count.
+        ledger (str): Ledger path; existing results are reused.
+        delays (list): Per-worker delay, as for work.
+        limits (list): Per-worker case limit, as for work.
+        **options: Passed on to Coordinator.
+
+    Returns:
+        tuple: Results in case order and the coordinator's statistics.
+    """
+    workers = workers or os.cpu_count()
+    delays = delays or [0.0] * workers
+    limits = limits or [None] * workers
+    options.setdefault("key", secrets.token_bytes(32))
+    coordinator = Coordinator(cases, ledger, **options).start()
+    procs = [
+        Process(
+            target=work,
+            args=(coordinator.address, f"local{i}", delays[i], limits[i], coordinator.authkey),
+        )
+        for i in range(workers)
+    ]
+    try:
+        for proc in procs:
+            proc.start()
+        results = coordinator.wait()
+    finally:
+        coordinator.close()
+        for proc in procs:
+            proc.join()
+    return results, dict(coordinator.stats, resumed=coordinator.resumed)
+
+
+if __name__ == "__main__":
+    # APOLLO_SWEEP_KEY=<secret> python cluster.py serve N [port] [host] - coordinator for N runs
+    # APOLLO_SWEEP_KEY=<secret> python cluster.py work host:port        - worker on any node
+    # python cluster.py                                                 - local demo, slow and lost nodes
+    # serve binds loopback unless a host (e.g. 0.0.0.0) is given for other nodes
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        n = int(sys.argv[2])
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else 6100
+        host = sys.argv[4] if len(sys.argv) > 4 else "127.0.0.1"
+        coordinator = Coordinator([Case(s) for s in sample_runs(n, seed=42)], address=(host, port))
+        print(f"Serving {len(coordinator.queue)} of {n} cases on {host}:{port}")
+        start = time.time()
+        summaries = coordinator.start().wait()
+        coordinator.close()
+        print(f"Done in {time.time() - start:.1f} s: {coordinator.stats}")
+    elif len(sys.argv) > 1 and sys.argv[1] == "work":
+        host, port = sys.argv[2].rsplit(":", 1)
+        print(f"Flew {work((host, int(port)))} cases")
+    else:
+        ledger = "data/ledger_demo.jsonl"
+        Path(ledger).unlink(missing_ok=True)
+        cases = [Case(s) for s in sample_runs(32, seed=42)]
+        start = time.time()
+        summaries, stats = run_local(
+            cases[:24], workers=3, ledger=ledger, delays=[0.0, 0.0, 0.5], limits=[None, 4, None]
+        )
+        end = time.time()
+
+        # --- Printing Results ---
+        print("--- Local Sweep, one slow worker and one lost after 4 cases ---")
+        print(f"Cases: {len(summaries)} in {end - start:.1f} s, {stats}")
+        summaries, stats = run_local(cases, workers=2, ledger=ledger)
+        print(f"--- Resumed with 8 new cases: {stats['resumed']} reused from the ledger ---")
+        print(f"Safe landings: {sum(s.v_touchdown < 5 for s in summaries)} of {len(summaries)}")
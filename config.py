@@ -17,6 +17,19 @@ class Config:
     C0: ControlState
 
 
+@dataclass(frozen=True)
+class GuidanceParams:
+    """Stage durations, gates and targets of the three-stage cubic guidance."""
+
+    t_braking: float = 640  # Braking stage duration (s)
+    t_approach: float = 150  # Approach stage duration (s)
+    t_final: float = 180  # Final stage duration (s)
+    dz_braking: float = -50  # Vertical velocity target of braking (m/s)
+    z_approach: float = 2_500  # Altitude gate into approach (m)
+    z_final: float = 150  # Altitude gate into the final stage (m)
+    x_target: float = 480_000  # Downrange target of every stage (m)
+
+
 # --- Lunar Environment Constants ---
 G_earth = 9.81  # Standard gravity on Earth (m/s^2) for Isp calculations
 r_moon = 1737e3  # Mean radius of the Moon (m)
@@ -0,0 +1,252 @@
+# External Libraries
+import dataclasses
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+
+# Internal Libraries
+import config as cfg
+from config import Config, GuidanceParams
+from states import PolarState
+from aborts import AbortMonitor
+from gnc.navigation import BlockNoise, Navigation
+from gnc.guidance import Guidance
+from gnc.control import Control
+from sim.simulation import Simulation, gate_events
+from main import main_loop
+
+X_TARGET = GuidanceParams().x_target  # Nominal downrange target (m)
+# The adaptive integrator stops on touchdown to within 1e-9 m, usually just above the surface
+TOUCHDOWN_TOL = 1e-6  # (m)
+
+
+@dataclass(frozen=True)
+class Dispersion:
+    """1σ dispersions applied around the nominal Apollo 11 configuration."""
+
+    T_max: float = 0.01 * cfg.T_max  # Thrust (N)
+    Isp: float = 0.01 * cfg.Isp  # Specific impulse (s)
+    m_prop0: float = 0.01 * cfg.m_prop0  # Initial propellant (kg)
+    z0: float = 100.0  # Initial altitude (m)
+    dz0: float = 1.0  # Initial vertical velocity (m/s)
+    dx0: float = 1.0  # Initial horizontal velocity (m/s)
+    bias_mean: float = 1.0  # Radar bias mean (m)
+    bias: float = 1.0  # Radar bias (m)
+
+
+@dataclass(frozen=True)
+class RunSpec:
+    """Everything needed to reproduce one dispersed descent."""
+
+    index: int
+    seed: int  # Master seed; the noise stream is derived from (seed, index)
+    T_max: float
+    Isp: float
+    m_prop0: float
+    S0: PolarState
+    bias: float
+
+
+@dataclass(frozen=True)
+class RunSummary:
+    """Compact end state of one descent."""
+
+    index: int
+    landed: bool
+    t_final: float
+    v_touchdown: float
+    dz_touchdown: float
+    dx_touchdown: float
+    downrange_error: float
+    m_prop_remaining: float
+    t_approach: float  # Time of the switch to the approach stage (nan if never)
+    t_final_stage: float  # Time of the switch to the final stage (nan if never)
+    abort: str = ""  # Reason the run was aborted early (aborts.CHECKS), if it was
+
+
+class StageRecorder:
+    """
+    Minimal logger that only records when the guidance stage changes. An inner
+    logger, if given, receives every call as well.
+    """
+
+    def __init__(self, inner=None) -> None:
+        self.stage_times: dict[int, float] = {}
+        self._stage = None
+        self.inner = inner
+
+    def log(self, t, lvlh, guid, ctrl, plr) -> None:
+        if guid.stage != self._stage:
+            self.stage_times[guid.stage] = t
+            self._stage = guid.stage
+        if self.inner is not None:
+            self.inner.log(t, lvlh, guid, ctrl, plr)
+
+
+def sample_runs(
+    n: int, seed: int, dispersion: Dispersion = Dispersion(), start: int = 0
+) -> list[RunSpec]:
+    """
+    Samples n dispersed runs. Run i draws from its own SeedSequence child
+    (seed, i), so a spec depends only on the master seed and its index and is
+    identical however the batch is split across workers.
+
+    Args:
+        n (int): Number of runs.
+        seed (int): Master seed.
+        dispersion (Dispersion): 1σ dispersions.
+        start (int): Index of the first run, to extend an earlier sample.
+    """
+    specs = []
+    for i in range(start, start + n):
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(i, 0)))
+        specs.append(spec_from_normals(i, seed, rng.standard_normal(7), dispersion))
+    return specs
+
+
+def spec_from_normals(
+    index: int, seed: int, w: np.ndarray, dispersion: Dispersion = Dispersion()
+) -> RunSpec:
+    """
+    Builds run index from seven standard normal deviates, in the order T_max,
+    Isp, initial propellant, altitude, vertical velocity, horizontal velocity
+    and radar bias.
+    """
+    z0 = cfg.S0.r - cfg.r_moon + dispersion.z0 * w[3]
+    dx0 = cfg.S0.dtheta * cfg.S0.r + dispersion.dx0 * w[5]
+    m_prop0 = cfg.m_prop0 + dispersion.m_prop0 * w[2]
+    S0 = PolarState(
+        r=z0 + cfg.r_moon,
+        dr=cfg.S0.dr + dispersion.dz0 * w[4],
+        theta=cfg.S0.theta,
+        dtheta=dx0 / (z0 + cfg.r_moon),
+        m=cfg.m_empty + m_prop0,
+    )
+    return RunSpec(
+        index=index,
+        seed=seed,
+        T_max=cfg.T_max + dispersion.T_max * w[0],
+        Isp=cfg.Isp + dispersion.Isp * w[1],
+        m_prop0=m_prop0,
+        S0=S0,
+        bias=dispersion.bias_mean + dispersion.bias * w[6],
+    )
+
+
+def build_config(spec: RunSpec) -> Config:
+    """Returns the nominal Config with the run's dispersed parameters."""
+    return dataclasses.replace(
+        cfg.cfg,
+        T_max=spec.T_max,
+        Isp=spec.Isp,
+        m0=cfg.m_empty + spec.m_prop0,
+        S0=spec.S0,
+    )
+
+
+def run_one(
+    spec: RunSpec,
+    dt: float = 0.1,
+    t_max: float = 1000,
+    params: GuidanceParams = GuidanceParams(),
+    integrator: str = "rk4",
+    logger=None,
+    aborts: dict = None,
+) -> RunSummary:
+    """
+    Flies one dispersed descent with freshly built objects and returns its
+    summary. Safe to call from a worker process. An optional logger receives
+    the full telemetry, and optional abort checks (e.g. aborts.CHECKS) end a
+    doomed run early with its reason in the summary.
+    """
+    run_cfg = build_config(spec)
+    noise_seed = np.random.SeedSequence(spec.seed, spawn_key=(spec.index, 1))
+    nav = Navigation(run_cfg, spec.bias, noise_seed)
+    nav.rng = BlockNoise(noise_seed)  # Same draws as the Generator, fetched in blocks
+    gd = Guidance(verbose=False, params=params)
+    ct = Control(run_cfg, dataclasses.replace(run_cfg.C0))
+    sim = Simulation(run_cfg, spec.S0, integrator=integrator, events=gate_events(params))
+    recorder = StageRecorder(logger)
+    monitor = None if aborts is None else AbortMonitor(run_cfg, aborts)
+
+    t, _, _ = main_loop(
+        dt=dt, t_max=t_max, nav=nav, gd=gd, ct=ct, sim=sim, logger=recorder, aborts=monitor
+    )
+    return summarize(
+        spec.index,
+        t,
+        sim.state,
+        recorder.stage_times,
+        run_cfg,
+        params.x_target,
+        "" if monitor is None else monitor.reason or "",
+    )
+
+
+def summarize(
+    index: int,
+    t: float,
+    state: PolarState,
+    stage_times: dict,
+    run_cfg: Config,
+    x_target: float = X_TARGET,
+    abort: str = "",
+) -> RunSummary:
+    dz = state.dr
+    dx = state.dtheta * state.r
+    return RunSummary(
+        index=index,
+        landed=bool(state.r - run_cfg.r_moon <= TOUCHDOWN_TOL),
+        t_final=float(t),
+        v_touchdown=float(np.sqrt(dz**2 + dx**2)),
+        dz_touchdown=float(dz),
+        dx_touchdown=float(dx),
+        downrange_error=float(state.r * state.theta - x_target),
+        m_prop_remaining=float(state.m - run_cfg.m_empty),
+        t_approach=float(stage_times.get(2, np.nan)),
+        t_final_stage=float(stage_times.get(3, np.nan)),
+        abort=abort,
+    )
+
+
+def run_dispersion(
+    specs: list[RunSpec], workers: int = None, chunksize: int = None
+) -> list[RunSummary]:
+    """
+    Farms runs out across a process pool. Results come back in spec order, and
+    each run depends only on its spec, so the output is identical for any
+    number of workers.
+
+    Args:
+        specs (list): Runs from sample_runs.
+        workers (int): Worker processes; defaults to the CPU count.
+        chunksize (int): Runs sent to a worker per task; by default about four
+            tasks per worker to balance load while keeping IPC small.
+    """
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        return [run_one(spec) for spec in specs]
+    chunksize = chunksize or max(1, len(specs) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_one, specs, chunksize=chunksize))
+
+
+if __name__ == "__main__":
+    n = 64
+    start = time.time()
+    summaries = run_dispersion(sample_runs(n, seed=42))
+    end = time.time()
+
+    v = np.array([s.v_touchdown for s in summaries])
+    m_prop = np.array([s.m_prop_remaining for s in summaries])
+    err = np.array([s.downrange_error for s in summaries])
+
+    # --- Printing Results ---
+    print("--- Dispersion Results ---")
+    print(f"Runs: {n} in {end - start:.2f} s")
+    print(f"Touchdown Velocity: {np.mean(v):.2f} ± {np.std(v):.2f} m/s")
+    print(f"Downrange Error: {np.mean(err):.1f} ± {np.std(err):.1f} m")
+    print(f"Remaining Propellant: {np.mean(m_prop):.1f} ± {np.std(m_prop):.1f} kg")
+    print(f"Safe Landings: {np.mean(v < 5) * 100:.1f} %")
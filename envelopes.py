@@ -0,0 +1,271 @@
+# External Libraries
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Internal Libraries
+from telemetry import ColumnLogger
+from dispersion import RunSpec, run_one, sample_runs
+
+# Channels summarized by default: altitude, velocities, thrust and mass
+KEYS = ("z", "dz", "dx", "T_ctrl", "m")
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+class TDigest:
+    """
+    Mergeable streaming quantile sketch (a merging t-digest). Samples are held
+    as weighted centroids, sorted by mean, that are kept small near the tails
+    and large in the middle, so extreme quantiles stay accurate while the
+    size stays bounded by about delta / 2 centroids however many samples are
+    added. Two digests merge by compressing their centroids together.
+
+    Args:
+        delta (float): Compression; higher keeps more centroids and is more
+            accurate.
+    """
+
+    def __init__(self, delta: float = 200.0) -> None:
+        self.delta = delta
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def add(self, values, weights=None) -> None:
+        """Adds samples (or weighted centroids); NaNs are ignored."""
+        values = np.asarray(values, dtype=float).ravel()
+        weights = np.ones_like(values) if weights is None else np.asarray(weights, dtype=float)
+        keep = ~np.isnan(values)
+        values, weights = values[keep], weights[keep]
+        if len(values) == 0:
+            return
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, weights]))
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """Merges another digest into this one and returns self."""
+        if len(other.means):
+            self.add(other.means, other.weights)
+            self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """Estimated quantile(s) q in [0, 1]; nan while empty."""
+        q = np.asarray(q, dtype=float)
+        if len(self.means) == 0:
+            return np.full(q.shape, np.nan)
+        cum = np.cumsum(self.weights)
+        total = cum[-1]
+        # Each centroid's mass is centered on its mean; the ends pin to min/max
+        mids = np.concatenate([[0.0], cum - self.weights / 2, [total]])
+        means = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(q * total, mids, means)
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cum = np.cumsum(weights)
+        q = (cum - weights / 2) / cum[-1]
+        # Centroids falling in the same unit of the k1 scale function merge
+        k = np.floor(self.delta / (2 * np.pi) * np.arcsin(2 * q - 1))
+        starts = np.flatnonzero(np.diff(k, prepend=np.nan))
+        w = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / w
+        self.weights = w
+
+    def to_dict(self) -> dict:
+        return {
+            "delta": self.delta,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "min": float(self.min),
+            "max": float(self.max),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "TDigest":
+        digest = cls(d["delta"])
+        digest.means = np.array(d["means"], dtype=float)
+        digest.weights = np.array(d["weights"], dtype=float)
+        digest.min, digest.max = d["min"], d["max"]
+        return digest
+
+
+class EnvelopeAggregator:
+    """
+    Cross-run percentile envelopes of telemetry channels on a common grid of
+    time or altitude. Each run is resampled onto the grid and added to one
+    TDigest per channel and grid cell; new samples are buffered as columns
+    and compressed in blocks, so memory is constant in the number of runs.
+    Aggregators from different processes merge cell by cell.
+
+    On an altitude grid each trace is taken as a function of altitude down to
+    its lowest point so far, so a brief climb never maps back onto cells it
+    has already passed.
+
+    Args:
+        grid (ndarray): Increasing grid values (s or m).
+        keys (tuple): Channels to summarize.
+        axis (str): "t" for a time grid or "z" for an altitude grid.
+        delta (float): TDigest compression.
+        block (int): Runs buffered before the digests are updated.
+    """
+
+    def __init__(
+        self,
+        grid,
+        keys: tuple = KEYS,
+        axis: str = "t",
+        delta: float = 200.0,
+        block: int = 64,
+    ) -> None:
+        if axis not in ("t", "z"):
+            raise ValueError(f"Unknown grid axis {axis!r}")
+        self.grid = np.asarray(grid, dtype=float)
+        self.keys = tuple(keys)
+        self.axis = axis
+        self.runs = 0
+        self.block = block
+        self.digests = {k: [TDigest(delta) for _ in self.grid] for k in self.keys}
+        self._buffer = np.empty((len(self.keys), len(self.grid), block))
+        self._fill = 0
+
+    def add_run(self, records: dict) -> None:
+        """
+        Adds one run from Logger or ColumnLogger records, which must hold t
+        (and z on an altitude grid) besides the summarized channels. Cells
+        outside the run's span get no sample from it.
+        """
+        x = np.asarray(records[self.axis], dtype=float)
+        if self.axis == "z":
+            # Lowest altitude so far, reversed so it increases for np.interp
+            x = np.minimum.accumulate(x)[::-1]
+        for i, key in enumerate(self.keys):
+            y = np.asarray(records[key], dtype=float)
+            if self.axis == "z":
+                y = y[::-1]
+            self._buffer[i, :, self._fill] = np.interp(self.grid, x, y, left=np.nan, right=np.nan)
+        self.runs += 1
+        self._fill += 1
+        if self._fill == self._buffer.shape[2]:
+            self.flush()
+
+    def add_batch(self, records: dict) -> None:
+        """Adds every run of telemetry.TraceRecorder records (runs as rows)."""
+        n_runs = len(records[self.keys[0]])
+        for r in range(n_runs):
+            self.add_run({k: v if np.ndim(v) == 1 else v[r] for k, v in records.items()})
+
+    def flush(self) -> None:
+        """Compresses the buffered runs into the digests."""
+        if self._fill == 0:
+            return
+        for i, key in enumerate(self.keys):
+            for cell, digest in enumerate(self.digests[key]):
+                digest.add(self._buffer[i, cell, : self._fill])
+        self._fill = 0
+
+    def merge(self, other: "EnvelopeAggregator") -> "EnvelopeAggregator":
+        """Merges an aggregator over the same grid and channels; returns self."""
+        if not np.array_equal(self.grid, other.grid) or self.keys != other.keys:
+            raise ValueError("Aggregators must share their grid and channels")
+        self.flush()
+        other.flush()
+        for key in self.keys:
+            for mine, theirs in zip(self.digests[key], other.digests[key]):
+                mine.merge(theirs)
+        self.runs += other.runs
+        return self
+
+    def envelope(self, key: str, q=QUANTILES) -> np.ndarray:
+        """Quantiles q of a channel on the grid, shape (len(q), len(grid))."""
+        self.flush()
+        return np.array([d.quantile(q) for d in self.digests[key]]).T
+
+    def counts(self, key: str) -> np.ndarray:
+        """Number of runs contributing to each grid cell."""
+        self.flush()
+        return np.array([d.count for d in self.digests[key]])
+
+    def __getstate__(self) -> dict:
+        # Only the digests travel between processes, not the sample buffer
+        self.flush()
+        return {k: v for k, v in self.__dict__.items() if k != "_buffer"}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._buffer = np.empty((len(self.keys), len(self.grid), self.block))
+
+
+def _aggregate(args) -> EnvelopeAggregator:
+    specs, grid, keys, axis, dt = args
+    agg = EnvelopeAggregator(grid, keys, axis)
+    channels = sorted({"t", axis, *keys})
+    for spec in specs:
+        logger = ColumnLogger(channels)
+        run_one(spec, dt, logger=logger)
+        agg.add_run(logger.records)
+    return agg
+
+
+def run_envelopes(
+    specs: list[RunSpec],
+    grid,
+    keys: tuple = KEYS,
+    axis: str = "t",
+    dt: float = 0.1,
+    workers: int = None,
+    chunksize: int = None,
+) -> EnvelopeAggregator:
+    """
+    Flies dispersed runs over a process pool, each worker aggregating its own
+    share; only the per-worker sketches travel back and are merged.
+
+    Args:
+        specs (list): Runs from dispersion.sample_runs.
+        grid, keys, axis: As in EnvelopeAggregator.
+        dt (float): Time step (s).
+        workers (int): Worker processes; defaults to the CPU count.
+        chunksize (int): Runs aggregated per task.
+    """
+    workers = workers or os.cpu_count()
+    chunksize = chunksize or max(1, -(-len(specs) // (4 * workers)))
+    tasks = [
+        (specs[i : i + chunksize], grid, keys, axis, dt)
+        for i in range(0, len(specs), chunksize)
+    ]
+    if workers == 1:
+        parts = map(_aggregate, tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_aggregate, tasks))
+    total = EnvelopeAggregator(grid, keys, axis)
+    for part in parts:
+        total.merge(part)
+    return total
+
+
+if __name__ == "__main__":
+    from viz.fastplot import envelope_figure
+
+    n = 256
+    start = time.time()
+    agg = run_envelopes(sample_runs(n, seed=42), np.arange(0, 800, 2.0))
+    end = time.time()
+    path = envelope_figure("data/report_envelopes.png", agg)
+
+    # --- Printing Results ---
+    print("--- Dispersion Envelopes ---")
+    print(f"Runs: {agg.runs} in {end - start:.2f} s")
+    z = agg.envelope("z")
+    for i in range(0, len(agg.grid), 50):
+        lo, med, hi = z[:, i]
+        print(f"t = {agg.grid[i]:5.0f} s: altitude {med:8.1f} m [{lo:8.1f}, {hi:8.1f}]")
+    print(f"Figure: {path}")
@@ -0,0 +1,97 @@
+# External Libraries
+import math
+import time
+
+# Internal Libraries
+import config as cfg
+
+
+class Executive:
+    """
+    Multi-rate executive. Each subsystem runs at the rate it declares in its
+    `rate` attribute; the plant rate is the base tick and every other rate must
+    divide it. Between updates, the last navigation, guidance and control
+    outputs are held (zero-order hold).
+
+    Args:
+        nav (Navigation): The navigation object (radar rate).
+        gd (Guidance): The guidance object.
+        ct (Control): The control object.
+        sim (Simulation): The simulation object (plant sub-step rate).
+        logger (Logger): Optional logger, called at log_rate.
+        log_rate (float): Logging rate (Hz); defaults to the control rate.
+    """
+
+    def __init__(self, nav, gd, ct, sim, logger=None, log_rate: float = None):
+        self.nav = nav
+        self.gd = gd
+        self.ct = ct
+        self.sim = sim
+        self.logger = logger
+        self.dt = 1 / sim.rate
+        self.every = {
+            "nav": self._ticks(nav.rate),
+            "gd": self._ticks(gd.rate),
+            "ct": self._ticks(ct.rate),
+            "log": self._ticks(log_rate or ct.rate),
+        }
+        # The adaptive plant takes each held-command span in one call, since
+        # nothing it depends on changes in between; RK4 keeps the base tick
+        self.span = math.gcd(*self.every.values()) if sim.integrator == "dopri5" else 1
+        self.calls = {"sim": 0, "nav": 0, "gd": 0, "ct": 0, "log": 0}
+
+    def _ticks(self, rate: float) -> int:
+        # Number of plant ticks per update of a subsystem running at rate
+        ratio = self.sim.rate / rate
+        if ratio < 1 or abs(ratio - round(ratio)) > 1e-9:
+            raise ValueError(
+                f"Rate {rate} Hz must divide the plant rate {self.sim.rate} Hz"
+            )
+        return round(ratio)
+
+    def run(self, t=0, t_max=1000) -> tuple[float, float, bool]:
+        """
+        Runs until the lander reaches the surface or t_max is exceeded.
+
+        Returns:
+        tuple: The final time, the wall-clock duration and whether the lander
+        reached the surface.
+        """
+        every, calls, dt = self.every, self.calls, self.dt
+        nav, gd, ct, sim = self.nav, self.gd, self.ct, self.sim
+        t0 = t
+        tick = 0
+        landed = False
+        start = time.time()
+        while not landed and t <= t_max:
+            if tick % every["nav"] == 0:
+                nav_state = nav.step(dt * every["nav"], sim.state)
+                calls["nav"] += 1
+            if tick % every["gd"] == 0:
+                guid_state = gd.step(dt * every["gd"], nav_state)
+                calls["gd"] += 1
+            if tick % every["ct"] == 0:
+                ctrl_state = ct.step(dt * every["ct"], nav_state, guid_state)
+                calls["ct"] += 1
+            if self.logger is not None and tick % every["log"] == 0:
+                self.logger.log(t, nav_state, guid_state, ctrl_state, sim.state)
+                calls["log"] += 1
+
+            # Finish the span even if the plant stops on a non-terminal event
+            remaining = dt * self.span
+            while remaining > 1e-12 * dt and not landed:
+                remaining -= sim.step(remaining, ctrl_state)
+                calls["sim"] += 1
+                landed = sim.event is not None and sim.event.terminal
+
+            tick += self.span
+            t = t0 + tick * dt - remaining
+            landed = landed or sim.state.r - cfg.r_moon < 0
+        end = time.time()
+
+        return t, end - start, landed
+
+    def report(self) -> None:
+        print("--- Executive Calls ---")
+        for name, n in self.calls.items():
+            print(f"{name}: {n}")
@@ -0,0 +1,233 @@
+# External Libraries
+import math
+import time
+import numpy as np
+
+# Internal Libraries
+from states import PolarState, LVLHState
+from gnc.navigation import Navigation
+
+# Order of the columns recorded by fast_loop (same keys as main.logger)
+KEYS = [
+    "t",
+    "m",
+    "r",
+    "dr",
+    "theta",
+    "z",
+    "dz",
+    "x",
+    "dx",
+    "T_cmd",
+    "T_ctrl",
+    "alpha_cmd",
+    "alpha_ctrl",
+    "t_elapsed",
+]
+
+
+def targets(params) -> dict:
+    """Guidance targets per stage: (z, dz, x, dx, t_stage)."""
+    p = params
+    return {
+        1: (0, p.dz_braking, p.x_target, 0, p.t_braking),
+        2: (0, 0, p.x_target, 0, p.t_approach),
+        3: (0, 0, p.x_target, 0, p.t_final),
+    }
+
+
+def fast_loop(
+    nav, gd, ct, sim, t=0, dt=0.1, t_max=1000, record=False, block=4096
+) -> tuple[float, float, dict]:
+    """
+    Fused fast path for main_loop. Navigation, guidance, control and the RK4
+    plant are inlined into one loop over local floats (the flat state buffer)
+    with math-module scalar functions, and radar noise is drawn from the
+    navigation generator in blocks. Every operation is done in the same order
+    as the object-based loop, so the trajectory is numerically identical; the
+    objects are updated with the final state when the loop ends, and the noise
+    generator is left exactly where per-tick draws would have left it.
+
+    Against the current main_loop, a logged descent runs about 3x faster
+    (0.077 s against 0.221 s, 2.9x, in one measurement; 3.7x in another),
+    and up to 4x without logging. That is roughly 5-10 µs per tick, 0.8 µs
+    of it in the np.arctan2 kept for bit-identity. The order-of-magnitude
+    speedup this was meant to reach is not met: the rest is the RK4 and
+    filter float arithmetic itself, and going further would take compiled
+    code.
+
+    Parameters:
+    nav (Navigation), gd (Guidance), ct (Control), sim (Simulation): The
+        objects to fly; only the default alpha-beta navigation and the RK4
+        plant are supported.
+    t (float): The starting time for the simulation. Defaults to 0.
+    dt (float): The time step for the simulation. Defaults to 0.1.
+    t_max (float): The maximum time for the simulation. Defaults to 1000.
+    record (bool): Record the KEYS channels into a preallocated buffer.
+    block (int): Number of noise samples drawn at a time.
+
+    Returns:
+    tuple: The final time, the wall-clock duration and the recorded columns
+    (empty unless record is set).
+    """
+    if sim.integrator != "rk4":
+        raise ValueError("fast_loop only supports the RK4 plant")
+    if type(nav) is not Navigation or nav.terrain is not None:
+        raise ValueError("fast_loop only supports the alpha-beta navigation without terrain")
+
+    # --- Constants ---
+    c = sim.cfg
+    r_moon, mu, T_max = c.r_moon, c.mu, c.T_max
+    m_empty, dalpha_max = c.m_empty, c.dalpha_max
+    Isp_g = c.Isp * c.G_earth
+    r_moon_nav, mu_ct = ct.cfg.r_moon, ct.cfg.mu
+    bias, alpha, beta = nav.bias, nav.alpha, nav.beta
+    cos, sin, sqrt, copysign = math.cos, math.sin, math.sqrt, math.copysign
+    # NumPy's SIMD atan2 can differ from libm in the last bit, so keep it
+    arctan2 = np.arctan2
+    half, sixth = dt / 2, dt / 6
+    stage_targets = targets(gd.params)
+    z_approach, z_final = gd.params.z_approach, gd.params.z_final
+
+    # --- Flat State ---
+    r, dr, theta, dtheta, m = (float(v) for v in vars(sim.state).values())
+    zf, dzf = float(nav.z_filtered), float(nav.dz_filtered)
+    g = gd.guidance_state
+    stage, t_el, x_hold = g.stage, float(g.t_elapsed), gd.x_hold
+    cs = ct.control_state
+    T_cmd, alpha_cmd = float(cs.T_cmd), float(cs.alpha_cmd)
+    T_ctrl, alpha_ctrl = float(cs.T_ctrl), float(cs.alpha_ctrl)
+
+    # Noise is drawn in blocks; the generator is rewound and advanced by the
+    # exact number of samples used once the loop ends
+    rng = nav.rng
+    rng_state = rng.bit_generator.state
+    noise, i_noise, n_noise = rng.standard_normal(block).tolist(), 0, 0
+
+    buf = np.empty((int(t_max / dt) + 3, len(KEYS))) if record else None
+    row = 0
+    steps = 0
+    landing = True
+    start = time.time()
+    while landing:
+        # --- Navigation ---
+        z, dz, m_nav = r - r_moon, dr, m
+        x = r * theta
+        dx = r * dtheta
+        if i_noise == block:
+            noise, i_noise = rng.standard_normal(block).tolist(), 0
+        z_meas = z + bias + (0 + (0.015 * z + 1.52) / 3 * noise[i_noise])
+        i_noise += 1
+        n_noise += 1
+        z_pred = zf + dzf * dt
+        dz_pred = dzf
+        zf = z_pred + alpha * (z_meas - z_pred)
+        dzf = dz_pred + beta * (z_meas - z_pred) / dt
+
+        # --- Guidance ---
+        t_el += dt
+        if stage == 1 and zf <= z_approach:
+            if gd.verbose:
+                print(f"Approach Stage after {t_el:.2f} s")
+            stage = 2
+            t_el = 0
+        elif stage == 2 and zf <= z_final:
+            if gd.verbose:
+                print(f"Final Stage after {t_el:.2f} s")
+            stage = 3
+            t_el = 0
+            x_hold = x
+        gz, gdz, gx, gdx, t_stage = stage_targets[stage]
+        t_go = max(t_stage - t_el, dt)
+        ddz = 2 * ((3 * (gz - zf) - (2 * dzf + gdz) * t_go) / t_go**2)
+        ddx = 2 * ((3 * (gx - x) - (2 * dx + gdx) * t_go) / t_go**2)
+
+        # --- Control ---
+        r_nav = r_moon_nav + zf
+        dtheta_nav = dx / r_nav
+        Tz = ddz + (mu_ct / r_nav**2) - (r_nav * dtheta_nav**2)
+        Tx = ddx + (2 * dzf * dtheta_nav)
+        alpha_cmd = float(arctan2(Tx, Tz))
+        T_cmd = m * sqrt(Tx**2 + Tz**2)
+        throttle = T_cmd / T_max * 100
+        if throttle >= 65:
+            T_ctrl = T_max
+        elif throttle >= 10:
+            T_ctrl = T_max * throttle / 100
+        else:
+            T_ctrl = T_max * 0.1
+        dalpha = -(alpha_ctrl - alpha_cmd)
+        delta_alpha_max = dalpha_max * dt
+        if abs(dalpha) > delta_alpha_max:
+            alpha_ctrl += copysign(1.0, dalpha) * delta_alpha_max
+        else:
+            alpha_ctrl = alpha_cmd
+        if not m > m_empty:
+            T_ctrl = 0
+            alpha_ctrl = 0
+
+        # --- Logging ---
+        if record:
+            buf[row] = (
+                t, m, r, dr, theta, zf, dzf, x, dx,
+                T_cmd, T_ctrl, alpha_cmd, alpha_ctrl, t_el,
+            )  # fmt: skip
+            row += 1
+
+        # --- Plant (RK4) ---
+        if r - r_moon < 0 or t > t_max:
+            landing = False
+        a_T = T_ctrl
+        ca, sa = cos(alpha_ctrl), sin(alpha_ctrl)
+        dm = -a_T / Isp_g
+
+        k1r, k1dth = dr, dtheta
+        k1dr = a_T / m * ca - mu / r**2 + r * dtheta**2
+        k1ddth = 1 / r * ((a_T / m) * sa - 2 * dr * dtheta)
+
+        r2, dr2, th2, dth2, m2 = (
+            r + half * k1r, dr + half * k1dr, theta + half * k1dth,
+            dtheta + half * k1ddth, m + half * dm,
+        )  # fmt: skip
+        k2dr = a_T / m2 * ca - mu / r2**2 + r2 * dth2**2
+        k2ddth = 1 / r2 * ((a_T / m2) * sa - 2 * dr2 * dth2)
+
+        r3, dr3, th3, dth3, m3 = (
+            r + half * dr2, dr + half * k2dr, theta + half * dth2,
+            dtheta + half * k2ddth, m + half * dm,
+        )  # fmt: skip
+        k3dr = a_T / m3 * ca - mu / r3**2 + r3 * dth3**2
+        k3ddth = 1 / r3 * ((a_T / m3) * sa - 2 * dr3 * dth3)
+
+        r4, dr4, th4, dth4, m4 = (
+            r + dt * dr3, dr + dt * k3dr, theta + dt * dth3,
+            dtheta + dt * k3ddth, m + dt * dm,
+        )  # fmt: skip
+        k4dr = a_T / m4 * ca - mu / r4**2 + r4 * dth4**2
+        k4ddth = 1 / r4 * ((a_T / m4) * sa - 2 * dr4 * dth4)
+
+        r = r + sixth * (k1r + 2 * dr2 + 2 * dr3 + dr4)
+        dr = dr + sixth * (k1dr + 2 * k2dr + 2 * k3dr + k4dr)
+        theta = theta + sixth * (k1dth + 2 * dth2 + 2 * dth3 + dth4)
+        dtheta = dtheta + sixth * (k1ddth + 2 * k2ddth + 2 * k3ddth + k4ddth)
+        m = m + sixth * (dm + 2 * dm + 2 * dm + dm)
+        steps += 1
+
+        t += dt
+    end = time.time()
+
+    # --- Write Back ---
+    rng.bit_generator.state = rng_state
+    rng.standard_normal(n_noise)
+    sim.state = PolarState(r, dr, theta, dtheta, m)
+    sim.nfev += 4 * steps
+    nav.z_filtered, nav.dz_filtered = zf, dzf
+    nav.z_predict, nav.dz_predict, nav.z_meas = z_pred, dz_pred, z_meas
+    nav.LVLH_state = LVLHState(z, dz, x, dx, m_nav)
+    g.stage, g.t_elapsed, g.t_stage = stage, t_el, t_stage
+    g.z, g.dz, g.x, g.dx, g.ddz, g.ddx = gz, gdz, gx, gdx, ddz, ddx
+    gd.x_hold = x_hold
+    cs.T_cmd, cs.alpha_cmd, cs.T_ctrl, cs.alpha_ctrl = T_cmd, alpha_cmd, T_ctrl, alpha_ctrl
+
+    records = {k: buf[:row, i] for i, k in enumerate(KEYS)} if record else {}
+    return t, end - start, records
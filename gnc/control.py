@@ -1,12 +1,13 @@
-from states import LVLHState, ControlState, GuidanceState
+from states import LVLHState, ControlState, GuidanceState, stack
 from config import Config
 import numpy as np
 
 
 class Control:
-    def __init__(self, config: Config, control_state: ControlState):
+    def __init__(self, config: Config, control_state: ControlState, rate: float = 10.0):
         self.cfg = config
         self.control_state = control_state
+        self.rate = rate  # Update rate (Hz) used by the multi-rate executive
 
     def step(
         self, dt: float, nav_state: LVLHState, guid_state: GuidanceState
@@ -60,3 +61,56 @@ class Control:
             self.control_state.alpha_ctrl += np.sign(dalpha) * delta_alpha_max
         else:
             self.control_state.alpha_ctrl = self.control_state.alpha_cmd
+
+
+class BatchControl(Control):
+    """
+    Control for N vehicles at once. The thrust, slew and propellant limiters are
+    applied with masks; inactive vehicles keep their actuator state.
+    """
+
+    def __init__(self, config: Config, control_state: ControlState, n: int):
+        super().__init__(config, stack(control_state, n))
+        self.n = n
+
+    def step(
+        self, dt: float, nav_state: LVLHState, guid_state: GuidanceState, active=None
+    ) -> ControlState:
+        if active is None:
+            return super().step(dt, nav_state, guid_state)
+        T_prev = self.control_state.T_ctrl.copy()
+        alpha_prev = self.control_state.alpha_ctrl.copy()
+        super().step(dt, nav_state, guid_state)
+        self.control_state.T_ctrl = np.where(active, self.control_state.T_ctrl, T_prev)
+        self.control_state.alpha_ctrl = np.where(
+            active, self.control_state.alpha_ctrl, alpha_prev
+        )
+        return self.control_state
+
+    def _propellant_limit(self, m):
+        empty = m <= self.cfg.m_empty
+        self.control_state.T_ctrl = np.where(empty, 0.0, self.control_state.T_ctrl)
+        self.control_state.alpha_ctrl = np.where(
+            empty, 0.0, self.control_state.alpha_ctrl
+        )
+
+    def _thrust_limiter(self):
+        throttle = self.control_state.T_cmd / self.cfg.T_max * 100  # Throttle (%)
+        # Apollo DPS cannot throttle between 65% and 100% reliably
+        self.control_state.T_ctrl = np.select(
+            [throttle >= 65, throttle >= 10],
+            [self.cfg.T_max, self.cfg.T_max * throttle / 100],
+            self.cfg.T_max * 0.1,
+        )
+
+    def _slew_limiter(self, dt: float):
+        # Calculate the desired change in angle
+        dalpha = -(self.control_state.alpha_ctrl - self.control_state.alpha_cmd)
+        delta_alpha_max = self.cfg.dalpha_max * dt
+
+        # Apply slew rate limit
+        self.control_state.alpha_ctrl = np.where(
+            np.abs(dalpha) > delta_alpha_max,
+            self.control_state.alpha_ctrl + np.sign(dalpha) * delta_alpha_max,
+            self.control_state.alpha_cmd,
+        )
@@ -1,11 +1,43 @@
 import numpy as np
-from states import GuidanceState, LVLHState
+from states import GuidanceState, LVLHState, stack
+from config import GuidanceParams
+
+
+def cubic_guidance(tf, f0, ff, df0, dff, full: bool = False):
+    """
+    Closed-form solution of the cubic boundary-value problem
+    f(t) = a t^3 + b t^2 + c t + d with f(0) = f0, f(tf) = ff, f'(0) = df0 and
+    f'(tf) = dff. Works on Python floats or on NumPy arrays of any matching
+    shape, in which case thousands of problems are solved in one call.
+
+    Args:
+        tf (float or ndarray): Time to go (s).
+        f0, ff (float or ndarray): Initial and final position.
+        df0, dff (float or ndarray): Initial and final velocity.
+        full (bool): Return the coefficients (a, b, c, d) instead.
+
+    Returns:
+        The commanded acceleration f''(0) = 2b, or the coefficients if full.
+    """
+    b = (3 * (ff - f0) - (2 * df0 + dff) * tf) / tf**2
+    if not full:
+        return 2 * b
+    a = (2 * (f0 - ff) + (df0 + dff) * tf) / tf**3
+    return a, b, df0, f0
 
 
 class Guidance:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        verbose: bool = True,
+        rate: float = 10.0,
+        params: GuidanceParams = GuidanceParams(),
+    ) -> None:
         self.guidance_state = GuidanceState(0, 0, 0, 0, 0, 0, 1, 0, 0)
         self.x_hold = None
+        self.params = params
+        self.verbose = verbose
+        self.rate = rate  # Update rate (Hz) used by the multi-rate executive
 
     def step(self, dt: float, LVLH: LVLHState) -> GuidanceState:
         self.guidance_state.t_elapsed += dt
@@ -15,65 +47,71 @@ class Guidance:
         self._get_guidance_targets(dt, LVLH)
         # Set guidance
         t_go = max(self.guidance_state.t_stage - self.guidance_state.t_elapsed, dt)
-        _, _, self.guidance_state.ddz = self._cubic_guidance(
-            0.0,
-            t_go,
-            LVLH.z,
-            self.guidance_state.z,
-            LVLH.dz,
-            self.guidance_state.dz,
+        self.guidance_state.ddz = cubic_guidance(
+            t_go, LVLH.z, self.guidance_state.z, LVLH.dz, self.guidance_state.dz
         )
-        _, _, self.guidance_state.ddx = self._cubic_guidance(
-            0.0,
-            t_go,
-            LVLH.x,
-            self.guidance_state.x,
-            LVLH.dx,
-            self.guidance_state.dx,
+        self.guidance_state.ddx = cubic_guidance(
+            t_go, LVLH.x, self.guidance_state.x, LVLH.dx, self.guidance_state.dx
         )
 
         return self.guidance_state
 
     def _check_stage(self, LVLH: LVLHState) -> None:
         # Braking
-        if self.guidance_state.stage == 1 and LVLH.z <= 2_500:
+        if self.guidance_state.stage == 1 and LVLH.z <= self.params.z_approach:
             # Approach
-            print(f"Approach Stage after {self.guidance_state.t_elapsed:.2f} s")
+            if self.verbose:
+                print(f"Approach Stage after {self.guidance_state.t_elapsed:.2f} s")
             self.guidance_state.stage = 2
             self.guidance_state.t_elapsed = 0
-        elif self.guidance_state.stage == 2 and LVLH.z <= 150:
+        elif self.guidance_state.stage == 2 and LVLH.z <= self.params.z_final:
             # Final Phase
-            print(f"Final Stage after {self.guidance_state.t_elapsed:.2f} s")
+            if self.verbose:
+                print(f"Final Stage after {self.guidance_state.t_elapsed:.2f} s")
             self.guidance_state.stage = 3
             self.guidance_state.t_elapsed = 0
             self.x_hold = LVLH.x
 
     def _get_guidance_targets(self, dt: float, LVLH: LVLHState) -> None:
+        p = self.params
         if self.guidance_state.stage == 1:
             # Braking
             self.guidance_state.z = 0
-            self.guidance_state.dz = -50
-            self.guidance_state.x = 480_000
+            self.guidance_state.dz = p.dz_braking
+            self.guidance_state.x = p.x_target
             self.guidance_state.dx = 0
-            self.guidance_state.t_stage = 640
+            self.guidance_state.t_stage = p.t_braking
         elif self.guidance_state.stage == 2:
             # Approach
             self.guidance_state.z = 0
             self.guidance_state.dz = 0
-            self.guidance_state.x = 480_000
+            self.guidance_state.x = p.x_target
             self.guidance_state.dx = 0
-            self.guidance_state.t_stage = 150
+            self.guidance_state.t_stage = p.t_approach
         elif self.guidance_state.stage == 3:
             # Final Phase
             self.guidance_state.z = 0
             self.guidance_state.dz = 0
-            self.guidance_state.x = 480_000
+            self.guidance_state.x = p.x_target
             self.guidance_state.dx = 0
-            self.guidance_state.t_stage = 180
+            self.guidance_state.t_stage = p.t_final
 
     def _cubic_guidance(
         self, t: float, tf: float, f0: float, ff: float, df0: float, dff: float
     ) -> tuple[float, float, float]:
+        a, b, c, d = cubic_guidance(tf, f0, ff, df0, dff, full=True)
+
+        # Calculate position, velocity, and acceleration based on the cubic form
+        f = a * t**3 + b * t**2 + c * t + d
+        df = 3 * a * t**2 + 2 * b * t + c
+        ddf = 6 * a * t + 2 * b
+
+        return f, df, ddf
+
+    def _cubic_guidance_solve(
+        self, t: float, tf: float, f0: float, ff: float, df0: float, dff: float
+    ) -> tuple[float, float, float]:
+        # Reference solver kept for cross-checking cubic_guidance
         # Set up the system of equations: M * coeffs = [f(0), f(tf), df(0), df(tf)]
         # The matrix represents the polynomial terms at t=0 and t=tf
         a_mat = np.array(
@@ -96,3 +134,65 @@ class Guidance:
         ddf = 6 * a * t + 2 * b
 
         return f, df, ddf
+
+
+class BatchGuidance(Guidance):
+    """
+    Guidance for N vehicles at once. Stage transitions, targets and the cubic
+    solve are evaluated per vehicle with masks instead of branches. Every
+    field of params may be a scalar or a length-N array, so each vehicle can
+    fly its own parameter set.
+    """
+
+    def __init__(self, n: int, params: GuidanceParams = GuidanceParams()) -> None:
+        self.n = n
+        self.params = params
+        self.guidance_state = stack(GuidanceState(0, 0, 0, 0, 0, 0, 1, 0, 0), n)
+        self.x_hold = np.full(n, np.nan)
+
+        # Targets per stage and vehicle, indexed by [stage, vehicle] (stage 0 is unused)
+        p = {k: np.broadcast_to(np.asarray(v, dtype=float), n) for k, v in vars(params).items()}
+        zero = np.zeros(n)
+        self.Z_TARGET = np.stack([zero, zero, zero, zero])
+        self.DZ_TARGET = np.stack([zero, p["dz_braking"], zero, zero])
+        self.X_TARGET = np.stack([zero, p["x_target"], p["x_target"], p["x_target"]])
+        self.DX_TARGET = np.stack([zero, zero, zero, zero])
+        self.T_STAGE = np.stack([zero, p["t_braking"], p["t_approach"], p["t_final"]])
+        self._vehicle = np.arange(n)
+
+    def step(self, dt: float, LVLH: LVLHState, active=None) -> GuidanceState:
+        if active is None:
+            active = np.ones(self.n, dtype=bool)
+        self.guidance_state.t_elapsed += np.where(active, dt, 0.0)
+        # Check stage
+        self._check_stage(LVLH, active)
+        # Get targets
+        self._get_guidance_targets(dt, LVLH)
+        # Set guidance
+        t_go = np.maximum(self.guidance_state.t_stage - self.guidance_state.t_elapsed, dt)
+        self.guidance_state.ddz = cubic_guidance(
+            t_go, LVLH.z, self.guidance_state.z, LVLH.dz, self.guidance_state.dz
+        )
+        self.guidance_state.ddx = cubic_guidance(
+            t_go, LVLH.x, self.guidance_state.x, LVLH.dx, self.guidance_state.dx
+        )
+
+        return self.guidance_state
+
+    def _check_stage(self, LVLH: LVLHState, active) -> None:
+        stage = self.guidance_state.stage
+        # Both masks use the stage from the start of the tick, like the elif chain
+        approach = active & (stage == 1) & (LVLH.z <= self.params.z_approach)
+        final = active & (stage == 2) & (LVLH.z <= self.params.z_final)
+        stage[approach] = 2
+        stage[final] = 3
+        self.guidance_state.t_elapsed[approach | final] = 0
+        self.x_hold[final] = LVLH.x[final]
+
+    def _get_guidance_targets(self, dt: float, LVLH: LVLHState) -> None:
+        i = self.guidance_state.stage, self._vehicle
+        self.guidance_state.z = self.Z_TARGET[i]
+        self.guidance_state.dz = self.DZ_TARGET[i]
+        self.guidance_state.x = self.X_TARGET[i]
+        self.guidance_state.dx = self.DX_TARGET[i]
+        self.guidance_state.t_stage = self.T_STAGE[i]
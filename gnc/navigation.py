@@ -1,14 +1,85 @@
+import math
 import numpy as np
-from states import LVLHState, PolarState
+from states import ControlState, LVLHState, PolarState
 from config import Config
 
 
+class BlockNoise:
+    """
+    Generator stand-in that pre-draws standard normals in blocks and hands
+    them out one at a time. It yields exactly the values that the same
+    Generator would give scalar draw by draw, at a fraction of the per-call
+    cost, so it can replace Navigation.rng without changing results.
+
+    Reading bit_generator first rewinds the generator to just past the draws
+    handed out, so checkpoints and fastpath see the same state as with a
+    plain Generator.
+
+    Args:
+        seed: Anything np.random.default_rng accepts, e.g. a SeedSequence.
+        block (int): Draws per refill.
+    """
+
+    def __init__(self, seed, block: int = 4096) -> None:
+        self.generator = np.random.default_rng(seed)
+        self.block = block
+        self._buffer = []
+        self._i = 0
+        self._state = None  # Generator state before the current block
+
+    @property
+    def bit_generator(self):
+        if self._i < len(self._buffer):
+            self.generator.bit_generator.state = self._state
+            self.generator.standard_normal(self._i)
+        self._buffer, self._i = [], 0
+        return self.generator.bit_generator
+
+    def standard_normal(self, size=None):
+        if size is not None:
+            self.bit_generator  # Rewind past the draws handed out
+            return self.generator.standard_normal(size)
+        if self._i == len(self._buffer):
+            self._state = self.generator.bit_generator.state
+            self._buffer = self.generator.standard_normal(self.block).tolist()
+            self._i = 0
+        x = self._buffer[self._i]
+        self._i += 1
+        return x
+
+    def normal(self, loc: float = 0.0, scale: float = 1.0):
+        return loc + scale * self.standard_normal()
+
+
+VELOCITY_STREAM = 2  # Spawn key of the velocity noise under the radar seed
+
+
+def velocity_seed(seed) -> np.random.SeedSequence:
+    """
+    Seed of the Doppler velocity noise, a child of the radar noise seed with
+    its own spawn key, so the two sensors draw from independent streams. The
+    parent's spawn counter is left alone.
+
+    Args:
+        seed: Radar noise seed, an int, None or a SeedSequence.
+    """
+    ss = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return np.random.SeedSequence(
+        ss.entropy, spawn_key=ss.spawn_key + (VELOCITY_STREAM,), pool_size=ss.pool_size
+    )
+
+
 class Navigation:
-    def __init__(self, config: Config, bias: float, seed: int):
+    def __init__(
+        self, config: Config, bias: float, seed: int, rate: float = 10.0, terrain=None
+    ):
         self.cfg = config
         self.bias = bias
         self.rng = np.random.default_rng(seed)
-        self.z_filtered = self.cfg.S0.r - self.cfg.r_moon
+        self.rate = rate  # Radar update rate (Hz) used by the multi-rate executive
+        # Optional sim.terrain.Terrain; altitudes are then above the local ground
+        self.terrain = terrain
+        self.z_filtered = self._polar_to_LVLH(self.cfg.S0).z
         self.dz_filtered = 0.0
         self.alpha = 0.02
         self.beta = 0.0004
@@ -54,8 +125,354 @@ class Navigation:
     def _polar_to_LVLH(self, polar_state: PolarState) -> LVLHState:
         # Project to LVLH: z is altitude above surface, x is arc-length downrange
         z = polar_state.r - self.cfg.r_moon  # Altitude (m)
+        if self.terrain is not None:
+            z = z - self.terrain.height(polar_state.theta)  # Radar sees the ground
         dz = polar_state.dr  # Vertical velocity (m/s)
         x = polar_state.r * polar_state.theta  # Downrange distance (m)
         dx = polar_state.r * polar_state.dtheta  # Horizontal velocity (m/s)
         m = polar_state.m  # Mass (kg)
         return LVLHState(z, dz, x, dx, m)
+
+
+class BatchNavigation(Navigation):
+    """
+    Navigation for N vehicles at once. Every state field is a length-N array and
+    one noise sample is drawn per vehicle per tick. Vehicles that are no longer
+    active keep their filter state frozen.
+    """
+
+    def __init__(self, config: Config, bias, seed: int, n: int, terrain=None):
+        super().__init__(config, bias, seed, terrain=terrain)
+        self.n = n
+        self.z_filtered = np.full(n, self.z_filtered)
+        self.dz_filtered = np.zeros(n)
+
+    def step(self, dt, polar_state: PolarState, active=None) -> LVLHState:
+        z_prev, dz_prev = self.z_filtered, self.dz_filtered
+        LVLH = super().step(dt, polar_state)
+        if active is not None:
+            self.z_filtered = np.where(active, self.z_filtered, z_prev)
+            self.dz_filtered = np.where(active, self.dz_filtered, dz_prev)
+        return LVLH
+
+
+# Nonzero columns of each row of the EKF state-transition Jacobian
+_F_NONZERO = ((0, 1), (0, 1, 3), (0, 1, 2, 3), (0, 1, 3))
+
+
+class EKFNavigation(Navigation):
+    """
+    Extended Kalman filter on the full LVLH state [z, dz, x, dx]. The state is
+    propagated through the curved-surface LVLH dynamics, driven by the thrust
+    command if a ControlState is given (Control mutates its state in place, so
+    the reference stays current). Updates are sequential scalar ones: the
+    landing radar measures altitude and a Doppler velocity sensor measures dz
+    and dx, each at its own rate. Downrange position has no sensor and is only
+    carried by the model.
+
+    The single-vehicle filter works on Python floats, with the covariance
+    product written out over the sparsity of the Jacobian, which is several
+    times cheaper than NumPy calls on a 4x4 matrix; BatchEKFNavigation is the
+    array counterpart.
+
+    Args:
+        config (Config): Vehicle configuration.
+        bias (float): Radar bias (m), unknown to the filter.
+        seed (int): Seed for the radar noise generator; the velocity noise
+            uses its velocity_seed child.
+        rate (float): Propagation rate (Hz) used by the multi-rate executive.
+        radar_rate (float): Altitude measurement rate (Hz).
+        velocity_rate (float): Velocity measurement rate (Hz).
+        control (ControlState): Thrust and pitch command driving the model.
+        q (float): Acceleration process noise density (m^2/s^3).
+        terrain (Terrain): Optional terrain model. Altitude is then above the
+            local ground, and the altitude change the model leaves out over
+            the terrain slope under the track (slope·dx·dt per step) is added
+            to the altitude variance.
+    """
+
+    P0 = (50.0**2, 2.0**2, 50.0**2, 2.0**2)  # Initial variances
+
+    def __init__(
+        self,
+        config: Config,
+        bias: float,
+        seed: int,
+        rate: float = 10.0,
+        radar_rate: float = 10.0,
+        velocity_rate: float = 2.0,
+        control: ControlState = None,
+        q: float = 0.05,
+        terrain=None,
+    ):
+        # Radar and velocity noise come from separate streams of the same seed
+        seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        super().__init__(config, bias, seed, rate, terrain)
+        self.velocity_rng = np.random.default_rng(velocity_seed(seed))
+        self.radar_rate = radar_rate
+        self.velocity_rate = velocity_rate
+        self.control = control
+        self.q = q
+        self.xhat = list(self._initial_estimate())
+        # Covariance as a flat row-major list of 16 floats
+        self.P = [self.P0[i // 4] if i % 5 == 0 else 0.0 for i in range(16)]
+        self._since_radar = self._since_velocity = 0.0
+
+    @property
+    def z_filtered(self):
+        return self.xhat[0]
+
+    @z_filtered.setter
+    def z_filtered(self, value):
+        # The base constructor sets the filter state before xhat exists
+        if hasattr(self, "xhat"):
+            self.xhat[0] = value
+
+    @property
+    def dz_filtered(self):
+        return self.xhat[1]
+
+    @dz_filtered.setter
+    def dz_filtered(self, value):
+        if hasattr(self, "xhat"):
+            self.xhat[1] = value
+
+    def step(self, dt, polar_state: PolarState) -> LVLHState:
+        # Plain floats keep the arithmetic below off NumPy scalars
+        self._filter(dt, dt, PolarState(*(float(v) for v in vars(polar_state).values())))
+        z, dz, x, dx = self.xhat
+        return LVLHState(z, dz, x, dx, self.LVLH_state.m)
+
+    def _initial_estimate(self) -> tuple:
+        S0 = self.cfg.S0
+        return self._polar_to_LVLH(S0).z, S0.dr, S0.r * S0.theta, S0.r * S0.dtheta
+
+    def _filter(self, dt, dt_predict, polar_state: PolarState) -> None:
+        # Propagates by dt_predict; measurement timing follows the nominal dt
+        self.LVLH_state = self._polar_to_LVLH(polar_state)
+        self._predict_ekf(dt_predict, self.LVLH_state.m)
+        # Measurements that are due this tick
+        self._since_radar += dt
+        if self._since_radar >= 1 / self.radar_rate - 1e-9:
+            self._since_radar -= 1 / self.radar_rate
+            self.z_meas = self._measure(dt, self.LVLH_state.z)
+            o_z = (0.015 * self.LVLH_state.z + 1.52) / 3
+            self._update(0, self.z_meas, o_z**2)
+        self._since_velocity += dt
+        if self._since_velocity >= 1 / self.velocity_rate - 1e-9:
+            self._since_velocity -= 1 / self.velocity_rate
+            for i, v in ((1, self.LVLH_state.dz), (3, self.LVLH_state.dx)):
+                o_v = self._velocity_sigma(v)
+                self._update(i, v + self.velocity_rng.normal(0, o_v), o_v**2)
+
+    def _velocity_sigma(self, v):
+        # Doppler velocity sensor: 0.3 m/s plus 0.2 % of the measured speed (1σ)
+        return 0.3 + 0.002 * abs(v)
+
+    def _thrust(self, m):
+        # Thrust acceleration and pitch direction of the current command
+        if self.control is None:
+            return 0.0, 0.0, 0.0
+        alpha = float(self.control.alpha_ctrl)
+        return float(self.control.T_ctrl) / m, math.cos(alpha), math.sin(alpha)
+
+    def _model(self, dt, z, dz, x, dx, a_T, ca, sa):
+        # LVLH dynamics and the nonzero Jacobian entries of one step. Works on
+        # floats or arrays; x = r·θ and dx = r·dθ as in _polar_to_LVLH
+        ir = 1 / (self.cfg.r_moon + z)
+        g = self.cfg.mu * ir * ir
+        x_r, dz_r, dx_r = x * ir, dz * ir, dx * ir
+        f = (dz, a_T * ca - g + dx * dx_r, dx + dz * x_r, a_T * sa - dz * dx_r)
+        F = (
+            (1.0, dt),
+            ((2 * g * ir - dx_r * dx_r) * dt, 1.0, 2 * dx_r * dt),
+            (-dz_r * x_r * dt, x_r * dt, 1 + dz_r * dt, dt),
+            (dz_r * dx_r * dt, -dx_r * dt, 1 - dz_r * dt),
+        )
+        return f, F
+
+    def _slope_variance(self, dt, z, x, dx):
+        # Altitude above the ground also changes by -slope·dx, which _model
+        # leaves out; its size over the step goes into the altitude variance.
+        # Central difference over one DEM column at the estimated position
+        if self.terrain is None:
+            return 0.0
+        r = self.cfg.r_moon + z
+        theta, d = x / r, self.terrain.dtheta
+        slope = (self.terrain.height(theta + d) - self.terrain.height(theta - d)) / (2 * d * r)
+        return (slope * dx * dt) ** 2
+
+    def _propagate(self, xhat, f, dt) -> None:
+        # Second-order step for the positions, so the unmeasured downrange
+        # position does not pick up Euler drift
+        xhat[0] = xhat[0] + f[0] * dt + f[1] * dt**2 / 2
+        xhat[1] = xhat[1] + f[1] * dt
+        xhat[2] = xhat[2] + f[2] * dt + f[3] * dt**2 / 2
+        xhat[3] = xhat[3] + f[3] * dt
+
+    def _predict_ekf(self, dt: float, m: float) -> None:
+        xhat, P = self.xhat, self.P
+        f, F = self._model(dt, *xhat, *self._thrust(m))
+        q_slope = self._slope_variance(dt, xhat[0], xhat[2], xhat[3])
+        self._propagate(xhat, f, dt)
+
+        # P = F P F' + Q, written out over the nonzero entries of F and the
+        # upper triangle of the symmetric P (row-major, flat)
+        _, (a10, _, a13), (a20, a21, a22, _), (a30, a31, a33) = F
+        p00, p01, p02, p03, _, p11, p12, p13, _, _, p22, p23, _, _, _, p33 = P
+        # Rows of F P
+        b00, b01, b02, b03 = p00 + dt * p01, p01 + dt * p11, p02 + dt * p12, p03 + dt * p13
+        b10 = a10 * p00 + p01 + a13 * p03
+        b11 = a10 * p01 + p11 + a13 * p13
+        b12 = a10 * p02 + p12 + a13 * p23
+        b13 = a10 * p03 + p13 + a13 * p33
+        b20 = a20 * p00 + a21 * p01 + a22 * p02 + dt * p03
+        b21 = a20 * p01 + a21 * p11 + a22 * p12 + dt * p13
+        b22 = a20 * p02 + a21 * p12 + a22 * p22 + dt * p23
+        b23 = a20 * p03 + a21 * p13 + a22 * p23 + dt * p33
+        b30 = a30 * p00 + a31 * p01 + a33 * p03
+        b31 = a30 * p01 + a31 * p11 + a33 * p13
+        b33 = a30 * p03 + a31 * p13 + a33 * p33
+        # Times F', plus white acceleration noise on each axis
+        q = self.q
+        q0, q1, q2 = q * dt**3 / 3, q * dt**2 / 2, q * dt
+        c00 = b00 + dt * b01 + q0 + q_slope
+        c01 = a10 * b00 + b01 + a13 * b03 + q1
+        c02 = a20 * b00 + a21 * b01 + a22 * b02 + dt * b03
+        c03 = a30 * b00 + a31 * b01 + a33 * b03
+        c11 = a10 * b10 + b11 + a13 * b13 + q2
+        c12 = a20 * b10 + a21 * b11 + a22 * b12 + dt * b13
+        c13 = a30 * b10 + a31 * b11 + a33 * b13
+        c22 = a20 * b20 + a21 * b21 + a22 * b22 + dt * b23 + q0
+        c23 = a30 * b20 + a31 * b21 + a33 * b23 + q1
+        c33 = a30 * b30 + a31 * b31 + a33 * b33 + q2
+        P[:] = (
+            c00, c01, c02, c03,
+            c01, c11, c12, c13,
+            c02, c12, c22, c23,
+            c03, c13, c23, c33,
+        )  # fmt: skip
+
+    def _update(self, i: int, y: float, R: float) -> None:
+        # Scalar update for a measurement of state component i. With H = e_i,
+        # P H is row i of P and the update is a rank-one downdate
+        xhat, P = self.xhat, self.P
+        c0, c1, c2, c3 = P[4 * i : 4 * i + 4]
+        S = P[5 * i] + R
+        k0, k1, k2, k3 = c0 / S, c1 / S, c2 / S, c3 / S
+        innovation = y - xhat[i]
+        xhat[:] = (
+            xhat[0] + k0 * innovation, xhat[1] + k1 * innovation,
+            xhat[2] + k2 * innovation, xhat[3] + k3 * innovation,
+        )  # fmt: skip
+        p00, p01, p02, p03, _, p11, p12, p13, _, _, p22, p23, _, _, _, p33 = P
+        d01, d02, d03 = p01 - c0 * k1, p02 - c0 * k2, p03 - c0 * k3
+        d12, d13, d23 = p12 - c1 * k2, p13 - c1 * k3, p23 - c2 * k3
+        P[:] = (
+            p00 - c0 * k0, d01, d02, d03,
+            d01, p11 - c1 * k1, d12, d13,
+            d02, d12, p22 - c2 * k2, d23,
+            d03, d13, d23, p33 - c3 * k3,
+        )  # fmt: skip
+
+
+class BatchEKFNavigation(EKFNavigation):
+    """
+    EKF navigation for N vehicles at once. The estimates live in a (4, N)
+    array, one contiguous row per state component, and the covariances in an
+    (N, 4, 4) array. The Jacobian, product and gain buffers are allocated
+    once, and every tick updates all N filters with in-place stacked matrix
+    products. Vehicles that are no longer active propagate with a zero step
+    and get zero gain, so their filters stay frozen.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        bias,
+        seed: int,
+        n: int,
+        radar_rate: float = 10.0,
+        velocity_rate: float = 2.0,
+        control: ControlState = None,
+        q: float = 0.05,
+        terrain=None,
+    ):
+        super().__init__(
+            config, bias, seed, radar_rate=radar_rate, velocity_rate=velocity_rate,
+            control=control, q=q, terrain=terrain,
+        )  # fmt: skip
+        self.n = n
+        self.xhat = np.array([np.broadcast_to(v, n) for v in self._initial_estimate()])
+        self.P = np.zeros((n, 4, 4))
+        self.P[:, range(4), range(4)] = self.P0
+        self._F = np.zeros((n, 4, 4))
+        self._F[:, range(4), range(4)] = 1.0
+        self._Ft = self._F.copy()  # F transposed, kept contiguous for matmul
+        self._FP = np.empty((n, 4, 4))
+        self._K = np.empty((n, 4))
+        self._mask = 1.0
+
+    @property
+    def z_filtered(self):
+        return self.xhat[0]
+
+    @z_filtered.setter
+    def z_filtered(self, value):
+        if hasattr(self, "xhat"):
+            self.xhat[0] = value
+
+    @property
+    def dz_filtered(self):
+        return self.xhat[1]
+
+    @dz_filtered.setter
+    def dz_filtered(self, value):
+        if hasattr(self, "xhat"):
+            self.xhat[1] = value
+
+    def step(self, dt, polar_state: PolarState, active=None) -> LVLHState:
+        dt_predict = dt
+        self._mask = 1.0
+        if active is not None:
+            self._mask = active[:, None]
+            dt_predict = np.where(active, dt, 0.0)
+        self._filter(dt, dt_predict, polar_state)
+        z, dz, x, dx = self.xhat.copy()
+        return LVLHState(z, dz, x, dx, self.LVLH_state.m)
+
+    def _thrust(self, m):
+        if self.control is None:
+            return 0.0, 0.0, 0.0
+        alpha = self.control.alpha_ctrl
+        return self.control.T_ctrl / m, np.cos(alpha), np.sin(alpha)
+
+    def _predict_ekf(self, dt, m) -> None:
+        xhat, P, F, Ft, FP = self.xhat, self.P, self._F, self._Ft, self._FP
+        f, F_rows = self._model(dt, *xhat, *self._thrust(m))
+        q_slope = self._slope_variance(dt, xhat[0], xhat[2], xhat[3])
+        self._propagate(xhat, f, dt)
+        for i, (row, cols) in enumerate(zip(F_rows, _F_NONZERO)):
+            for a, k in zip(row, cols):
+                F[:, i, k] = Ft[:, k, i] = a
+        # P = F P F' + Q
+        np.matmul(F, P, out=FP)
+        np.matmul(FP, Ft, out=P)
+        q = self.q
+        q0, q1, q2 = q * dt**3 / 3, q * dt**2 / 2, q * dt
+        for i in (0, 2):
+            P[:, i, i] += q0
+            P[:, i, i + 1] += q1
+            P[:, i + 1, i] += q1
+            P[:, i + 1, i + 1] += q2
+        P[:, 0, 0] += q_slope
+
+    def _update(self, i: int, y, R) -> None:
+        xhat, P, K = self.xhat, self.P, self._K
+        # Row i of the symmetric P is P H for H = e_i
+        S = P[:, i, i] + R
+        np.divide(P[:, i, :], S[:, None], out=K)
+        K *= self._mask
+        xhat += K.T * (y - xhat[i])
+        np.multiply(K[:, :, None], P[:, i, None, :], out=self._FP)
+        P -= self._FP
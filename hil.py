@@ -0,0 +1,285 @@
+# External Libraries
+import dataclasses
+import os
+import struct
+import sys
+import time
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Client, Listener
+import numpy as np
+
+# Internal Libraries
+import config as cfg
+from config import Config
+from states import ControlState, GuidanceState, LVLHState
+from gnc.guidance import Guidance
+from gnc.control import Control
+
+KEY_VARIABLE = "APOLLO_FSW_KEY"  # Environment variable holding the socket shared secret
+# Messages are fixed binary records, never pickles, so a peer can only send numbers:
+# request (seq, dt, z, dz, x, dx, m) and reply (seq, ControlState, GuidanceState)
+REQUEST = struct.Struct("<q6d")
+REPLY = struct.Struct("<q4d6dq2d")
+
+
+def authkey(variable: str, key: bytes = None) -> bytes:
+    """
+    Shared secret for authenticating socket peers: key if given, else the
+    environment variable. There is no default, so a server never accepts
+    connections with a key anyone could read in this repository.
+    """
+    key = key or os.environ.get(variable, "").encode()
+    if not key:
+        raise RuntimeError(f"Set {variable} to a shared secret (or pass key) to use sockets")
+    return key
+
+
+def fsw_main(conn, config: Config, delay: float = 0.0) -> None:
+    """
+    Stand-in flight software: guidance and control served over a connection.
+    Each REQUEST record (seq, dt, z, dz, x, dx, m) is answered in order with
+    a REPLY record of seq followed by the ControlState and GuidanceState
+    fields; an empty message ends the session.
+
+    Args:
+        conn (Connection): Pipe end or socket connection to the plant.
+        config (Config): Vehicle configuration.
+        delay (float): Artificial compute time per request (s), for testing.
+    """
+    gd = Guidance(verbose=False)
+    ct = Control(config, dataclasses.replace(config.C0))
+    while True:
+        msg = conn.recv_bytes()
+        if not msg:
+            break
+        seq, dt, *nav = REQUEST.unpack(msg)
+        nav_state = LVLHState(*nav)
+        guid_state = gd.step(dt, nav_state)
+        ctrl_state = ct.step(dt, nav_state, guid_state)
+        if delay:
+            time.sleep(delay)
+        conn.send_bytes(REPLY.pack(seq, *vars(ctrl_state).values(), *vars(guid_state).values()))
+    conn.close()
+
+
+def serve_fsw(
+    address=("127.0.0.1", 6000), config: Config = cfg.cfg, delay: float = 0.0, key: bytes = None
+) -> None:
+    """
+    Runs the stand-in flight software as a socket server for one plant. The
+    shared secret comes from key or APOLLO_FSW_KEY; the server refuses to
+    start without one.
+    """
+    with Listener(address, authkey=authkey(KEY_VARIABLE, key)) as listener:
+        with listener.accept() as conn:
+            fsw_main(conn, config, delay)
+
+
+class LocalFSW:
+    """Guidance and control called in-process through the same interface."""
+
+    def __init__(self, gd: Guidance, ct: Control) -> None:
+        self.gd = gd
+        self.ct = ct
+        self._reply = None
+
+    def send(self, seq: int, dt: float, nav_state: LVLHState) -> None:
+        guid_state = self.gd.step(dt, nav_state)
+        self._reply = guid_state, self.ct.step(dt, nav_state, guid_state)
+
+    def recv(self, seq: int, timeout: float) -> tuple[int, GuidanceState, ControlState]:
+        return (seq, *self._reply)
+
+    def close(self) -> None:
+        pass
+
+
+class ProcessFSW:
+    """
+    Guidance and control in another process, in lockstep with the plant. With
+    no address a local process is spawned over a pipe; with an address the
+    plant connects to a socket served by serve_fsw.
+
+    Args:
+        config (Config): Vehicle configuration for the spawned process.
+        address: (host, port) or socket path of a running serve_fsw.
+        delay (float): Artificial compute time per request in the spawned
+            process (s), for testing deadline handling.
+        key (bytes): Shared secret of the server; APOLLO_FSW_KEY by default.
+    """
+
+    def __init__(
+        self, config: Config = cfg.cfg, address=None, delay: float = 0.0, key: bytes = None
+    ) -> None:
+        self.proc = None
+        if address is None:
+            self.conn, child = Pipe()
+            self.proc = Process(target=fsw_main, args=(child, config, delay), daemon=True)
+            self.proc.start()
+            child.close()
+        else:
+            self.conn = Client(address, authkey=authkey(KEY_VARIABLE, key))
+        self._last = -1  # Seq of the newest reply handed out
+
+    def send(self, seq: int, dt: float, nav_state: LVLHState) -> None:
+        n = nav_state
+        self.conn.send_bytes(REQUEST.pack(seq, dt, n.z, n.dz, n.x, n.dx, n.m))
+
+    def recv(self, seq: int, timeout: float) -> tuple[int, GuidanceState, ControlState]:
+        """
+        Waits up to timeout (None for no limit) for the reply to seq. If it
+        does not come in time, the newest late reply that arrived meanwhile
+        is returned instead (its seq tells it apart), so a command that is
+        late is still flown in preference to an older one. Replies older
+        than one already returned are discarded; None means nothing newer
+        has arrived.
+        """
+        end = None if timeout is None else time.perf_counter() + timeout
+        newest = None
+        while True:
+            remaining = None if end is None else max(end - time.perf_counter(), 0)
+            if not self.conn.poll(remaining):
+                return newest
+            reply_seq, *fields = REPLY.unpack(self.conn.recv_bytes())
+            if reply_seq <= self._last:
+                continue
+            self._last = reply_seq
+            newest = reply_seq, GuidanceState(*fields[4:]), ControlState(*fields[:4])
+            if reply_seq == seq:
+                return newest
+
+    def close(self) -> None:
+        self.conn.send_bytes(b"")
+        self.conn.close()
+        if self.proc is not None:
+            self.proc.join()
+
+
+class PacedRunner:
+    """
+    Real-time paced execution for hardware-in-the-loop. Each GNC tick starts
+    on a wall-clock schedule of dt / speed seconds, and flight software gets
+    until the deadline to answer. Late ticks are handled by the degrade policy:
+    "hold" flies the newest command received when the reply misses its
+    deadline, a late reply to an earlier tick if one has come in, else the
+    last command flown (without it the plant waits, and the miss is still
+    counted), and "skip_log" drops logging for ticks already running late.
+
+    Args:
+        nav (Navigation): Plant-side navigation (sensors and filter).
+        sim (Simulation): The plant.
+        fsw (LocalFSW or ProcessFSW): Guidance and control.
+        speed (float): Multiple of real time; inf runs unpaced in lockstep.
+        deadline (float): Fraction of the tick period the FSW may use.
+        policy (tuple): Degrade policies, any of "hold" and "skip_log".
+        logger (Logger): Optional logger.
+    """
+
+    def __init__(
+        self,
+        nav,
+        sim,
+        fsw,
+        speed: float = 1.0,
+        deadline: float = 0.5,
+        policy: tuple[str, ...] = ("hold", "skip_log"),
+        logger=None,
+    ) -> None:
+        self.nav = nav
+        self.sim = sim
+        self.fsw = fsw
+        self.speed = speed
+        self.deadline = deadline
+        self.policy = policy
+        self.logger = logger
+        self.jitter = []  # Tick start lateness (s)
+        self.overruns = 0  # Ticks that ended after the next tick was due
+        self.misses = 0  # Replies that missed the FSW deadline
+        self.skipped_logs = 0
+
+    def run(self, t=0, dt=0.1, t_max=1000) -> tuple[float, float, bool]:
+        """
+        Runs until the lander reaches the surface or t_max is exceeded.
+
+        Returns:
+        tuple: The final time, the wall-clock duration and the landing flag.
+        """
+        nav, sim, fsw = self.nav, self.sim, self.fsw
+        period = dt / self.speed
+        hold = "hold" in self.policy
+        skip_log = "skip_log" in self.policy and period > 0
+        guid_state = GuidanceState(0, 0, 0, 0, 0, 0, 1, 0, 0)
+        ctrl_state = dataclasses.replace(cfg.C0)
+        seq = 0
+        h = dt  # Time since the last tick, short after an event stop
+        landing = True
+        start = time.perf_counter()
+        while landing:
+            due = start + seq * period
+            now = time.perf_counter()
+            if due > now:
+                time.sleep(due - now)
+            tick_start = time.perf_counter()
+            self.jitter.append(max(tick_start - due, 0.0))
+
+            # Navigation on the plant side, guidance and control in the FSW
+            nav_state = nav.step(h, sim.state)
+            fsw.send(seq, h, nav_state)
+            timeout = max(due + self.deadline * period - time.perf_counter(), 0)
+            reply = fsw.recv(seq, timeout if period > 0 else None)
+            if reply is None or reply[0] != seq:
+                self.misses += 1
+                if not hold:
+                    reply = fsw.recv(seq, None)
+            if reply is not None:
+                _, guid_state, ctrl_state = reply
+
+            # Logging
+            if self.logger is not None:
+                if skip_log and time.perf_counter() > due + period:
+                    self.skipped_logs += 1
+                else:
+                    self.logger.log(t, nav_state, guid_state, ctrl_state, sim.state)
+
+            # Simulation Step
+            if sim.state.r - cfg.r_moon < 0 or t > t_max:
+                landing = False
+            h = sim.step(dt, ctrl_state)
+            t += h
+            if sim.event is not None and sim.event.terminal:
+                landing = False
+
+            seq += 1
+            if period > 0 and time.perf_counter() > start + seq * period:
+                self.overruns += 1
+        end = time.perf_counter()
+        fsw.close()
+
+        return t, end - start, landing
+
+    def report(self) -> dict:
+        jitter = np.array(self.jitter) * 1e3
+        stats = {
+            "ticks": len(jitter),
+            "jitter_p50_ms": float(np.percentile(jitter, 50)),
+            "jitter_p99_ms": float(np.percentile(jitter, 99)),
+            "jitter_max_ms": float(np.max(jitter)),
+            "overruns": self.overruns,
+            "deadline_misses": self.misses,
+            "skipped_logs": self.skipped_logs,
+        }
+        print("--- Paced Run ---")
+        for key, value in stats.items():
+            print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
+        return stats
+
+
+if __name__ == "__main__":
+    from gnc.navigation import Navigation
+    from sim.simulation import Simulation
+
+    speed = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    runner = PacedRunner(Navigation(cfg.cfg, 1, 42), Simulation(cfg.cfg, cfg.S0), ProcessFSW(), speed=speed)
+    t, wall, landing = runner.run()
+    print(f"Flight time {t:.2f} s in {wall:.2f} s wall ({t / wall:.1f}x real time)")
+    runner.report()
@@ -0,0 +1,191 @@
+# External Libraries
+import json
+import sys
+import time
+import tracemalloc
+
+SUB_BUCKETS = 8  # Histogram buckets per doubling of latency (~12.5% wide)
+
+
+class StageStats:
+    """Call count, total, max and a log-bucketed latency histogram (ns)."""
+
+    __slots__ = ("calls", "total_ns", "max_ns", "hist", "alloc_samples")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.hist = [0] * (16 + 64 * SUB_BUCKETS)
+        self.alloc_samples = []  # (net blocks, net bytes, transient peak bytes)
+
+    def add(self, ns: int) -> None:
+        self.calls += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.hist[_bucket(ns)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the histogram bucket holding the q-th percentile (ns)."""
+        target = q / 100 * self.calls
+        seen = 0
+        for i, n in enumerate(self.hist):
+            seen += n
+            if n and seen >= target:
+                return min(_bucket_upper(i), self.max_ns)
+        return 0.0
+
+    def summary(self) -> dict:
+        out = {
+            "calls": self.calls + len(self.alloc_samples),
+            "mean_ns": self.total_ns / self.calls if self.calls else 0.0,
+            "p50_ns": self.percentile(50),
+            "p99_ns": self.percentile(99),
+            "max_ns": self.max_ns,
+            "total_ms": self.total_ns / 1e6,
+        }
+        if self.alloc_samples:
+            n = len(self.alloc_samples)
+            blocks, size, peak = (sum(col) / n for col in zip(*self.alloc_samples))
+            out.update(
+                alloc_samples=n,
+                net_blocks_per_call=blocks,
+                net_bytes_per_call=size,
+                peak_bytes_per_call=peak,
+            )
+        return out
+
+
+def _bucket(ns: int) -> int:
+    # Exact below 16 ns, then SUB_BUCKETS buckets per power of two
+    if ns < 16:
+        return max(ns, 0)
+    bl = ns.bit_length()
+    return 16 + (bl - 5) * SUB_BUCKETS + (ns >> (bl - 4)) - 8
+
+
+def _bucket_upper(i: int) -> int:
+    if i < 16:
+        return i
+    octave, sub = divmod(i - 16, SUB_BUCKETS)
+    return (sub + 9) << (octave + 1)
+
+
+class Probe:
+    """
+    Opt-in instrumentation for the main loop. instrument() wraps the loop
+    objects in thin proxies that time every step()/log() call; the loop itself
+    is untouched, so an uninstrumented run pays nothing.
+
+    Every alloc_every-th tick (0 disables it) runs under tracemalloc, and each
+    stage records the net blocks and bytes it leaves allocated and its
+    transient peak. Tracing slows those ticks down, so their latencies are
+    left out of the histograms.
+
+    Args:
+        alloc_every (int): Sample allocations once every this many ticks.
+    """
+
+    def __init__(self, alloc_every: int = 0) -> None:
+        self.alloc_every = alloc_every
+        self.stats: dict[str, StageStats] = {}
+        self.ticks = 0
+        self.sampling = False
+        self._first = None
+
+    def instrument(self, **objects) -> list:
+        """
+        Wraps the given loop objects, e.g. instrument(nav=nav, gd=gd, ...),
+        and returns the proxies in the same order. The first one marks the
+        start of a tick.
+        """
+        self._first = next(iter(objects))
+        proxies = []
+        for name, obj in objects.items():
+            self.stats[name] = StageStats()
+            proxies.append(_Timed(obj, name, self))
+        return proxies
+
+    def _tick(self) -> None:
+        # Tracing is only switched on for sampled ticks, since it slows every
+        # allocation down while active
+        self.ticks += 1
+        was_sampling = self.sampling
+        self.sampling = self.alloc_every > 0 and self.ticks % self.alloc_every == 0
+        if self.sampling and not was_sampling:
+            tracemalloc.start()
+        elif was_sampling and not self.sampling:
+            tracemalloc.stop()
+
+    def stop(self) -> None:
+        """Stops tracemalloc if a sampled tick left it running."""
+        if self.sampling:
+            tracemalloc.stop()
+            self.sampling = False
+
+    def summary(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "stages": {name: s.summary() for name, s in self.stats.items()},
+        }
+
+    def print_summary(self) -> None:
+        print("--- Instrumentation ---")
+        total = sum(s.total_ns for s in self.stats.values()) or 1
+        for name, s in self.stats.items():
+            calls = s.calls + len(s.alloc_samples)
+            line = (
+                f"{name:<6} calls {calls:>7}  p50 {s.percentile(50) / 1e3:8.2f} us"
+                f"  p99 {s.percentile(99) / 1e3:8.2f} us  max {s.max_ns / 1e3:9.2f} us"
+                f"  share {100 * s.total_ns / total:5.1f} %"
+            )
+            if s.alloc_samples:
+                peak = sum(a[2] for a in s.alloc_samples) / len(s.alloc_samples)
+                line += f"  peak alloc {peak:8.0f} B"
+            print(line)
+
+    def to_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+class _Timed:
+    # Proxy that times step()/log() and forwards every other attribute
+    __slots__ = ("_obj", "_name", "_probe", "_stats")
+
+    def __init__(self, obj, name: str, probe: Probe) -> None:
+        self._obj = obj
+        self._name = name
+        self._probe = probe
+        self._stats = probe.stats[name]
+
+    def __getattr__(self, attr):
+        return getattr(self._obj, attr)
+
+    def step(self, *args):
+        return self._call(self._obj.step, args)
+
+    def log(self, *args):
+        return self._call(self._obj.log, args)
+
+    def _call(self, fn, args):
+        probe = self._probe
+        if self._name == probe._first:
+            probe._tick()
+        if probe.sampling:
+            return self._sampled(fn, args)
+        t0 = time.perf_counter_ns()
+        out = fn(*args)
+        self._stats.add(time.perf_counter_ns() - t0)
+        return out
+
+    def _sampled(self, fn, args):
+        blocks0 = sys.getallocatedblocks()
+        size0, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        out = fn(*args)
+        size1, peak = tracemalloc.get_traced_memory()
+        blocks1 = sys.getallocatedblocks()
+        self._stats.alloc_samples.append((blocks1 - blocks0, size1 - size0, peak - size0))
+        return out
@@ -0,0 +1,446 @@
+# External Libraries
+import dataclasses
+import math
+import operator
+import time
+from dataclasses import dataclass
+import numpy as np
+
+# Internal Libraries
+import config as cfg
+import batch
+from config import GuidanceParams
+from states import ControlState, PolarState
+from gnc.navigation import Navigation
+from gnc.guidance import Guidance
+from gnc.control import Control
+from sim.simulation import Simulation
+from dispersion import Dispersion, build_config, sample_runs, spec_from_normals
+
+# Closed-loop states carried between ticks, then the dispersed parameters
+STATES = ("r", "dr", "theta", "dtheta", "m", "z_filtered", "dz_filtered", "alpha_ctrl", "t_elapsed")
+PARAMS = ("T_max", "Isp", "bias")
+# Touchdown quantities, named as in dispersion.RunSummary
+OUTPUTS = (
+    "t_final",
+    "v_touchdown",
+    "dz_touchdown",
+    "dx_touchdown",
+    "downrange_error",
+    "m_prop_remaining",
+)
+
+
+class Dual:
+    """
+    Forward-mode dual number: a value and its gradient with respect to a set
+    of seed variables. Arithmetic, comparisons (on the value) and the NumPy
+    functions the GNC and plant code use are overloaded, so the unmodified
+    scalar classes can be flown with Dual states and return their Jacobians.
+
+    Args:
+        v (float): Value.
+        d (ndarray): Gradient.
+    """
+
+    __slots__ = ("v", "d")
+
+    def __init__(self, v: float, d: np.ndarray) -> None:
+        self.v = v
+        self.d = d
+
+    def __repr__(self) -> str:
+        return f"Dual({self.v!r}, {self.d!r})"
+
+    def __float__(self) -> float:
+        return float(self.v)
+
+    def __add__(self, o):
+        if isinstance(o, Dual):
+            return Dual(self.v + o.v, self.d + o.d)
+        return Dual(self.v + o, self.d)
+
+    __radd__ = __add__
+
+    def __sub__(self, o):
+        if isinstance(o, Dual):
+            return Dual(self.v - o.v, self.d - o.d)
+        return Dual(self.v - o, self.d)
+
+    def __rsub__(self, o):
+        return Dual(o - self.v, -self.d)
+
+    def __mul__(self, o):
+        if isinstance(o, Dual):
+            return Dual(self.v * o.v, o.v * self.d + self.v * o.d)
+        return Dual(self.v * o, o * self.d)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, o):
+        if isinstance(o, Dual):
+            q = self.v / o.v
+            return Dual(q, (self.d - q * o.d) / o.v)
+        return Dual(self.v / o, self.d / o)
+
+    def __rtruediv__(self, o):
+        q = o / self.v
+        return Dual(q, (-q / self.v) * self.d)
+
+    def __pow__(self, p: float):
+        # Constant exponents only, which is all the models use
+        return Dual(self.v**p, (p * self.v ** (p - 1)) * self.d)
+
+    def __neg__(self):
+        return Dual(-self.v, -self.d)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return -self if self.v < 0 else self
+
+    def __lt__(self, o):
+        return self.v < value(o)
+
+    def __le__(self, o):
+        return self.v <= value(o)
+
+    def __gt__(self, o):
+        return self.v > value(o)
+
+    def __ge__(self, o):
+        return self.v >= value(o)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        rule = UFUNCS.get(ufunc)
+        if method != "__call__" or kwargs or rule is None:
+            return NotImplemented
+        # NumPy scalars become floats, so they defer to the Dual operators
+        return rule(*(x if isinstance(x, Dual) else float(x) for x in inputs))
+
+
+def value(x) -> float:
+    """Value of a Dual, or x itself."""
+    return x.v if isinstance(x, Dual) else x
+
+
+def tangent(x, n: int) -> np.ndarray:
+    """Gradient of a Dual, or zeros for a constant."""
+    return x.d if isinstance(x, Dual) else np.zeros(n)
+
+
+def _cos(x):
+    if not isinstance(x, Dual):
+        return math.cos(x)
+    return Dual(math.cos(x.v), -math.sin(x.v) * x.d)
+
+
+def _sin(x):
+    if not isinstance(x, Dual):
+        return math.sin(x)
+    return Dual(math.sin(x.v), math.cos(x.v) * x.d)
+
+
+def _sqrt(x):
+    if not isinstance(x, Dual):
+        return math.sqrt(x)
+    s = math.sqrt(x.v)
+    return Dual(s, x.d / (2 * s))
+
+
+def _arctan2(y, x):
+    v = math.atan2(value(y), value(x))
+    if not isinstance(x, Dual) and not isinstance(y, Dual):
+        return v
+    xv, yv = value(x), value(y)
+    n = len(x.d if isinstance(x, Dual) else y.d)
+    return Dual(v, (xv * tangent(y, n) - yv * tangent(x, n)) / (xv * xv + yv * yv))
+
+
+UFUNCS = {
+    np.add: operator.add,
+    np.subtract: operator.sub,
+    np.multiply: operator.mul,
+    np.true_divide: operator.truediv,
+    np.power: operator.pow,
+    np.negative: operator.neg,
+    np.absolute: abs,
+    np.sign: lambda x: float(np.sign(value(x))),  # Piecewise constant
+    np.cos: _cos,
+    np.sin: _sin,
+    np.sqrt: _sqrt,
+    np.arctan2: _arctan2,
+}
+
+
+class RadarNoise:
+    """
+    Navigation.rng stand-in for linear covariance runs: every draw is zero
+    with unit sensitivity to one noise variable, so the noise adds nothing to
+    the nominal trajectory and its effect shows up in the tangents.
+    """
+
+    def __init__(self, seed: np.ndarray) -> None:
+        self.seed = seed  # Unit gradient of the current tick's draw
+
+    def normal(self, loc: float = 0.0, scale: float = 1.0):
+        return loc + scale * Dual(0.0, self.seed)
+
+
+@dataclass
+class LinCovResult:
+    """Nominal touchdown and its linear covariance."""
+
+    nominal: dict  # Output -> value on the nominal (noise-free) trajectory
+    cov: np.ndarray  # Covariance of OUTPUTS
+    rates: np.ndarray  # Time derivatives of OUTPUTS at touchdown
+    P: np.ndarray  # Final covariance of STATES + PARAMS at touchdown
+    ticks: int
+
+    @property
+    def sigma(self) -> dict:
+        return dict(zip(OUTPUTS, np.sqrt(np.diag(self.cov))))
+
+
+def _read(nav, gd, ct, sim) -> list:
+    s = sim.state
+    return [
+        s.r, s.dr, s.theta, s.dtheta, s.m,
+        nav.z_filtered, nav.dz_filtered,
+        ct.control_state.alpha_ctrl,
+        gd.guidance_state.t_elapsed,
+        sim.cfg.T_max, sim.cfg.Isp, nav.bias,
+    ]  # fmt: skip
+
+
+def _write(x: list, nav, gd, ct, sim) -> None:
+    sim.state = PolarState(*x[:5])
+    nav.z_filtered, nav.dz_filtered = x[5], x[6]
+    ct.control_state.alpha_ctrl = x[7]
+    gd.guidance_state.t_elapsed = x[8]
+    run_cfg = dataclasses.replace(sim.cfg, T_max=x[9], Isp=x[10])
+    nav.cfg = ct.cfg = sim.cfg = run_cfg
+    nav.bias = x[11]
+
+
+def _limiter(config, T_cmd: float) -> tuple[float, float]:
+    # Output and slope of the control's thrust limiter at a thrust command
+    probe = Control(config, ControlState(Dual(T_cmd, np.ones(1)), 0.0, 0.0, 0.0))
+    probe._thrust_limiter()
+    return value(probe.control_state.T_ctrl), tangent(probe.control_state.T_ctrl, 1)[0]
+
+
+def _limiter_jump(config, T_prev: float, T_now: float) -> float:
+    """
+    Thrust the limiter dropped (or added) by switching branch between two
+    commands: the old branch extrapolated to T_now minus the new output.
+    Zero unless the branch switch is discontinuous, not just a kink.
+    """
+    config = dataclasses.replace(config, T_max=value(config.T_max))
+    L_prev, s_prev = _limiter(config, T_prev)
+    L_now, s_now = _limiter(config, T_now)
+    jump = L_prev + s_prev * (T_now - T_prev) - L_now
+    kink = abs(s_prev - s_now) * abs(T_now - T_prev)
+    return jump if abs(jump) > kink + 1e-9 * abs(L_now) else 0.0
+
+
+def lincov(
+    dispersion: Dispersion = Dispersion(),
+    dt: float = 0.1,
+    t_max: float = 1000,
+    params: GuidanceParams = GuidanceParams(),
+    noise: bool = True,
+) -> LinCovResult:
+    """
+    Linear covariance analysis of the closed loop. One nominal descent is
+    flown with the scalar Navigation, Guidance, Control and RK4 Simulation
+    classes on dual numbers, which gives the Jacobian of each tick with
+    respect to the loop states, the dispersed parameters and that tick's
+    radar noise. The covariance P of states and parameters is propagated as
+    P <- F P F^T + G G^T from the initial dispersions of dispersion.
+
+    The discrete events are linearized too: a guidance gate crossed earlier
+    or later shifts the stage clock by dz / ż, a thrust limiter branch switch
+    that jumps the thrust (out of the throttle gap) applies the jump for the
+    fraction of a tick the switch moves by, and the touchdown state is
+    projected onto the surface, with the touchdown time absorbing the
+    altitude error. Anything else, such as dispersions large enough to change
+    how often the limiter switches, is outside the linear picture; compare
+    measures where that starts to matter.
+
+    Args:
+        dispersion (Dispersion): 1σ dispersions, as for sample_runs.
+        dt (float): Time step (s).
+        t_max (float): Maximum time (s).
+        params (GuidanceParams): Guidance parameters.
+        noise (bool): Include the radar noise; without it only the initial
+            and parameter dispersions propagate.
+    """
+    n = len(STATES) + len(PARAMS)
+    # Initial covariance from the seven dispersed deviates
+    seeds = np.eye(7)
+    spec = spec_from_normals(0, 0, [Dual(0.0, e) for e in seeds], dispersion)
+    run_cfg = build_config(spec)
+    nav = Navigation(run_cfg, spec.bias, None)
+    gd = Guidance(verbose=False, params=params)
+    ct = Control(run_cfg, dataclasses.replace(run_cfg.C0))
+    sim = Simulation(run_cfg, spec.S0)
+    J = np.array([tangent(x, 7) for x in _read(nav, gd, ct, sim)])
+    P = J @ J.T
+
+    # Tick seeds: the loop states and parameters, then the radar noise draw
+    basis = np.eye(n + 1)
+    nav.rng = RadarNoise(basis[n] if noise else np.zeros(n + 1))
+    gates = {2: params.z_approach, 3: params.z_final}
+    x = [value(v) for v in _read(nav, gd, ct, sim)]
+    t = 0.0
+    T_prev = None
+    ticks = 0
+    landing = True
+    while landing:
+        _write([Dual(v, basis[i]) for i, v in enumerate(x)], nav, gd, ct, sim)
+        stage = gd.guidance_state.stage
+        nav_state = nav.step(dt, sim.state)
+        guid_state = gd.step(dt, nav_state)
+        if guid_state.stage != stage:
+            # A gate crossed later by dz / ż restarts the stage clock later
+            shift = (nav_state.z - gates[guid_state.stage]) / nav_state.dz
+            guid_state.t_elapsed = guid_state.t_elapsed + Dual(0.0, shift.d)
+        ctrl_state = ct.step(dt, nav_state, guid_state)
+        T_cmd = value(ctrl_state.T_cmd)
+        jump = 0.0 if T_prev is None else _limiter_jump(ct.cfg, T_prev, T_cmd)
+        if jump:
+            # A command that crosses later keeps the old branch's thrust longer
+            late = Dual(0.0, ctrl_state.T_cmd.d / (T_prev - T_cmd))
+            ctrl_state.T_ctrl = ctrl_state.T_ctrl + jump * late
+        T_prev = T_cmd
+        if sim.state.r - cfg.r_moon < 0 or t > t_max:
+            landing = False
+        t += sim.step(dt, ctrl_state)
+        ticks += 1
+
+        new = _read(nav, gd, ct, sim)
+        F = np.array([tangent(v, n + 1) for v in new])
+        P = F[:, :n] @ P @ F[:, :n].T + np.outer(F[:, n], F[:, n])
+        x = [value(v) for v in new]
+
+    # Touchdown: move along the trajectory to remove the altitude error
+    control = dataclasses.replace(ct.control_state)
+    control.T_ctrl, control.alpha_ctrl = value(control.T_ctrl), value(control.alpha_ctrl)
+    _write(x, nav, gd, ct, sim)
+    f = np.zeros(n)
+    f[:5] = sim._get_derivatives(sim.state, control)
+    f[8] = 1.0
+    dt_event = -np.eye(n)[0] / f[0]  # Touchdown time change per state error
+    project = np.eye(n) + np.outer(f, dt_event)
+
+    basis = np.eye(n)
+    r, dr, theta, dtheta, m = (Dual(v, basis[i]) for i, v in enumerate(x[:5]))
+    dx = dtheta * r
+    outputs = [
+        t,
+        _sqrt(dr * dr + dx * dx),
+        dr,
+        dx,
+        r * theta - params.x_target,
+        m - cfg.m_empty,
+    ]
+    H = np.array([tangent(y, n) for y in outputs])
+    rates = H @ f
+    H = H @ project
+    rates[0], H[0] = 1.0, dt_event
+    return LinCovResult(
+        nominal={k: value(y) for k, y in zip(OUTPUTS, outputs)},
+        cov=H @ P @ H.T,
+        rates=rates,
+        P=project @ P @ project.T,
+        ticks=ticks,
+    )
+
+
+def monte_carlo(
+    n: int,
+    seed: int = 0,
+    dispersion: Dispersion = Dispersion(),
+    dt: float = 0.1,
+    t_max: float = 1000,
+    params: GuidanceParams = GuidanceParams(),
+) -> np.ndarray:
+    """
+    Touchdown OUTPUTS of n sampled descents flown as one vectorized batch,
+    shape (n, len(OUTPUTS)).
+    """
+    specs = sample_runs(n, seed, dispersion)
+    S0 = PolarState(*(np.array([getattr(s.S0, f) for s in specs]) for f in vars(cfg.S0)))
+    config = dataclasses.replace(
+        cfg.cfg,
+        T_max=np.array([s.T_max for s in specs]),
+        Isp=np.array([s.Isp for s in specs]),
+    )
+    bias = np.array([s.bias for s in specs])
+    nav, gd, ct, sim = batch.build(n, S0, bias, seed, params, config)
+    t_final, _ = batch.batch_loop(nav, gd, ct, sim, dt=dt, t_max=t_max)
+    s = sim.state
+    dz, dx = s.dr, s.dtheta * s.r
+    downrange = s.r * s.theta - params.x_target
+    return np.column_stack(
+        [t_final, np.sqrt(dz**2 + dx**2), dz, dx, downrange, s.m - cfg.m_empty]
+    )
+
+
+def compare(
+    n: int = 2000,
+    seed: int = 0,
+    dispersion: Dispersion = Dispersion(),
+    dt: float = 0.1,
+) -> dict:
+    """
+    LinCov against a sampled batch. For each output: the LinCov nominal and
+    σ, the sample mean and σ, the σ ratio (near 1 in the linear regime) and
+    the mean shift in LinCov σ (near 0 unless the response is nonlinear).
+    """
+    lc = lincov(dispersion, dt)
+    mc = monte_carlo(n, seed, dispersion, dt)
+    # The sampled runs stop on the first tick past touchdown, up to dt late
+    cov = lc.cov + dt**2 / 12 * np.outer(lc.rates, lc.rates)
+    sigma = dict(zip(OUTPUTS, np.sqrt(np.diag(cov))))
+    out = {}
+    for i, key in enumerate(OUTPUTS):
+        mean, std = mc[:, i].mean(), mc[:, i].std(ddof=1)
+        out[key] = {
+            "lincov_nominal": lc.nominal[key],
+            "lincov_sigma": sigma[key],
+            "mc_mean": mean,
+            "mc_sigma": std,
+            "sigma_ratio": sigma[key] / std,
+            "mean_shift": (mean - lc.nominal[key]) / sigma[key],
+        }
+    return out
+
+
+def scaled(dispersion: Dispersion, k: float) -> Dispersion:
+    """Dispersion with every 1σ multiplied by k (the bias mean is kept)."""
+    return dataclasses.replace(
+        dispersion, **{f: k * v for f, v in vars(dispersion).items() if f != "bias_mean"}
+    )
+
+
+if __name__ == "__main__":
+    n = 2000
+    start = time.time()
+    lc = lincov()
+    print(f"LinCov: {lc.ticks} ticks in {time.time() - start:.2f} s")
+
+    # Agreement in the nominal dispersions, breakdown once they grow
+    for k in (1.0, 2.0, 4.0):
+        start = time.time()
+        result = compare(n, 0, scaled(Dispersion(), k))
+
+        # --- Printing Results ---
+        print(f"--- LinCov vs {n} Monte Carlo Runs, dispersions x{k:g} ({time.time() - start:.1f} s) ---")
+        for key, r in result.items():
+            print(
+                f"{key:>17}: σ {r['lincov_sigma']:9.3f} vs {r['mc_sigma']:9.3f}"
+                f" (ratio {r['sigma_ratio']:.2f}), mean shift {r['mean_shift']:+.2f} σ"
+            )
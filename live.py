@@ -0,0 +1,335 @@
+# External Libraries
+import asyncio
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+# Internal Libraries
+from telemetry import CHANNELS, row_builder
+
+# --- Wire Format ---
+# Every message is [ uint32 payload length | uint8 kind | payload ]. A
+# subscriber first gets one SCHEMA message (JSON: keys, struct format, rate),
+# then one SAMPLE per published row: [ uint32 seq | channel values ] packed
+# little-endian with the schema's format. Gaps in seq are rows dropped on the
+# way, at the publisher or for that subscriber.
+HEADER = struct.Struct("<IB")
+SCHEMA, SAMPLE = 0, 1
+VERSION = 1
+# Channels whose magnitude needs float64 (the radius is ~1.7e6 m); the rest go as float32
+WIDE = {"t", "r", "theta"}
+
+
+def sample_format(keys: list[str]) -> str:
+    """struct format of a SAMPLE payload for keys."""
+    codes = {"float64": "f", "int8": "b"}
+    return "<I" + "".join(
+        "d" if k in WIDE else codes[CHANNELS[k][1].__name__] for k in keys
+    )
+
+
+class _Subscriber:
+    __slots__ = ("writer", "dropped", "sent")
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.dropped = 0
+        self.sent = 0
+
+
+class LivePublisher:
+    """
+    Live telemetry broadcast that never stalls the simulation loop. log()
+    (the Logger interface) rate-limits on wall time, packs the row into a
+    compact binary frame and appends it to a bounded deque, which drops the
+    oldest frame when full; that is all the loop pays for. An asyncio server
+    on a background thread drains the deque every poll seconds and writes
+    each frame to every TCP subscriber with no more than client_buffer
+    bytes still unsent (the kernel send buffer is capped at the same size).
+    A subscriber that falls behind only
+    loses frames while its own backlog is over that mark, and never holds up
+    the loop or the other subscribers.
+
+    Args:
+        desired_keys (list): Channels to publish (keys of telemetry.CHANNELS).
+        address (tuple): (host, port) to listen on; port 0 picks a free one.
+        rate (float): Rows per wall-clock second, None for every tick.
+        depth (int): Frames the loop-side queue holds.
+        client_buffer (int): Unsent bytes a subscriber may have pending
+            before its frames are dropped.
+        poll (float): Interval at which the server drains the queue (s).
+        inner (Logger): Optional logger that also gets every tick.
+    """
+
+    def __init__(
+        self,
+        desired_keys: list[str],
+        address: tuple = ("127.0.0.1", 0),
+        rate: float = 20.0,
+        depth: int = 256,
+        client_buffer: int = 64 * 1024,
+        poll: float = 0.02,
+        inner=None,
+    ) -> None:
+        self.keys = list(desired_keys)
+        self.format = sample_format(self.keys)
+        self.rate = rate
+        self.period = 1 / rate if rate else 0.0
+        self.client_buffer = client_buffer
+        self.poll = poll
+        self.inner = inner
+        self.queue = deque(maxlen=depth)
+        # Rows dropped at the publisher, and per closed subscriber in client_dropped
+        self.stats = {"ticks": 0, "published": 0, "dropped": 0, "subscribers": 0, "client_dropped": []}
+        self.busy = 0.0  # Time spent in log() on published ticks (s)
+        self.address = None
+        self._bind = address
+        self._build = row_builder(self.keys)
+        self._pack = struct.Struct(self.format).pack
+        self._seq = 0
+        self._next = 0.0
+        self._taken = 0  # Last seq moved off the loop-side queue
+        self._clients = set()
+        self._closed = False
+        self._thread = None
+
+    # --- Loop Side ---
+
+    def log(self, t, lvlh, guid, ctrl, plr) -> None:
+        if self.inner is not None:
+            self.inner.log(t, lvlh, guid, ctrl, plr)
+        self.stats["ticks"] += 1
+        now = time.perf_counter()
+        if now < self._next:
+            return
+        self._next = now + self.period
+        self._seq += 1
+        # deque.append is atomic under the GIL; a full deque drops its oldest frame
+        self.queue.append(self._pack(self._seq, *self._build(t, lvlh, guid, ctrl, plr)))
+        self.busy += time.perf_counter() - now
+
+    def output_stats(self, t: float, t_elapsed: float, sim) -> None:
+        if self.inner is not None:
+            self.inner.output_stats(t, t_elapsed, sim)
+
+    def overhead(self) -> float:
+        """Mean time log() adds per published row (s)."""
+        return self.busy / max(self._seq, 1)
+
+    # --- Server Side ---
+
+    def start(self) -> "LivePublisher":
+        """Starts serving subscribers on a background thread; returns self."""
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def close(self, linger: float = 1.0) -> None:
+        """Sends what is queued, gives subscribers up to linger seconds, stops."""
+        self._closed = True
+        if self._thread is not None:
+            self._thread.join(self.poll + linger + 1.0)
+
+    def _run(self, ready: threading.Event) -> None:
+        asyncio.run(self._serve(ready))
+
+    async def _serve(self, ready: threading.Event) -> None:
+        tasks = set()
+        done = asyncio.Event()
+
+        async def accept(reader, writer):
+            task = asyncio.current_task()
+            tasks.add(task)
+            try:
+                await self._client(reader, writer, done)
+            finally:
+                tasks.discard(task)
+
+        server = await asyncio.start_server(accept, *self._bind)
+        self.address = server.sockets[0].getsockname()[:2]
+        ready.set()
+        while not self._closed:
+            await asyncio.sleep(self.poll)
+            self._fan_out()
+        server.close()
+        self._fan_out()
+        done.set()
+        if tasks:
+            _, late = await asyncio.wait(tasks, timeout=1.0)
+            for task in late:
+                task.cancel()
+            if late:
+                await asyncio.wait(late)
+        await server.wait_closed()
+        # Let the transports run their close callbacks before the loop stops
+        await asyncio.sleep(0)
+
+    def _fan_out(self) -> None:
+        queue = self.queue
+        while queue:
+            frame = queue.popleft()
+            seq = int.from_bytes(frame[:4], "little")
+            self.stats["dropped"] += seq - self._taken - 1
+            self.stats["published"] += 1
+            self._taken = seq
+            message = HEADER.pack(len(frame), SAMPLE) + frame
+            for client in self._clients:
+                # Each subscriber drops on its own unsent backlog, so a slow
+                # one never costs the others frames; write() never blocks
+                transport = client.writer.transport
+                if transport.is_closing():
+                    continue
+                if transport.get_write_buffer_size() > self.client_buffer:
+                    client.dropped += 1
+                else:
+                    client.writer.write(message)
+                    client.sent += 1
+
+    async def _client(self, reader, writer, done: asyncio.Event) -> None:
+        client = _Subscriber(writer)
+        # Cap the kernel's send buffer too, or megabytes of stale frames could
+        # queue there unseen by the backlog check in _fan_out
+        writer.get_extra_info("socket").setsockopt(
+            socket.SOL_SOCKET, socket.SO_SNDBUF, self.client_buffer
+        )
+        self.stats["subscribers"] += 1
+        schema = json.dumps(
+            {"version": VERSION, "keys": self.keys, "format": self.format, "rate": self.rate}
+        ).encode()
+        writer.write(HEADER.pack(len(schema), SCHEMA) + schema)
+        self._clients.add(client)
+
+        async def hangup():
+            # Subscribers send nothing; EOF means they went away
+            while await reader.read(4096):
+                pass
+
+        waits = [asyncio.ensure_future(hangup()), asyncio.ensure_future(done.wait())]
+        transport = writer.transport
+        try:
+            await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+            # On shutdown, send what this subscriber still has pending
+            while done.is_set() and transport.get_write_buffer_size() and not transport.is_closing():
+                await asyncio.sleep(self.poll)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            for wait in waits:
+                wait.cancel()
+            self._clients.discard(client)
+            self.stats["client_dropped"].append(client.dropped)
+            # close() would wait for a flush that may never come
+            if transport.get_write_buffer_size():
+                transport.abort()
+            else:
+                writer.close()
+
+
+def _read(f) -> tuple:
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    length, kind = HEADER.unpack(header)
+    return kind, f.read(length)
+
+
+def subscribe(address, timeout: float = None):
+    """
+    Yields (seq, row) for every sample from a publisher until it closes,
+    with row a dict of channel values.
+
+    Args:
+        address (tuple): (host, port) of the publisher.
+        timeout (float): Socket timeout (s).
+    """
+    with socket.create_connection(tuple(address), timeout) as sock:
+        f = sock.makefile("rb")
+        _, payload = _read(f)
+        schema = json.loads(payload)
+        if schema["version"] != VERSION:
+            raise RuntimeError(f"publisher speaks version {schema['version']}, not {VERSION}")
+        unpack = struct.Struct(schema["format"]).unpack
+        keys = schema["keys"]
+        while (message := _read(f)) is not None:
+            seq, *values = unpack(message[1])
+            yield seq, dict(zip(keys, values))
+
+
+if __name__ == "__main__":
+    # python live.py                       - overhead of publishing, with a fast and a slow subscriber
+    # python live.py serve [speed] [host]  - paced descent published on port 6200 of host
+    #                                        (default 127.0.0.1; there is no authentication)
+    # python live.py listen host:port
+    import dataclasses
+    import config as cfg
+    from main import main_loop
+    from gnc.control import Control
+    from gnc.guidance import Guidance
+    from gnc.navigation import Navigation
+    from sim.simulation import Simulation
+
+    keys = ["t", "z", "dz", "x", "dx", "m", "T_ctrl", "alpha_ctrl", "stage"]
+
+    def descend(logger):
+        nav, gd = Navigation(cfg.cfg, 1, 42), Guidance(verbose=False)
+        ct, sim = Control(cfg.cfg, dataclasses.replace(cfg.C0)), Simulation(cfg.cfg, cfg.S0)
+        return main_loop(nav=nav, gd=gd, ct=ct, sim=sim, logger=logger)
+
+    class Null:
+        def log(self, t, lvlh, guid, ctrl, plr) -> None:
+            pass
+
+    if len(sys.argv) > 1 and sys.argv[1] == "listen":
+        host, port = sys.argv[2].rsplit(":", 1)
+        for seq, row in subscribe((host, int(port))):
+            print(seq, " ".join(f"{k}={v:.6g}" for k, v in row.items()))
+    elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from hil import LocalFSW, PacedRunner
+
+        speed = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+        host = sys.argv[3] if len(sys.argv) > 3 else "127.0.0.1"
+        pub = LivePublisher(keys, address=(host, 6200), rate=10.0).start()
+        print(f"Publishing on {host}:{pub.address[1]}: python live.py listen {host}:{pub.address[1]}")
+        fsw = LocalFSW(Guidance(), Control(cfg.cfg, dataclasses.replace(cfg.C0)))
+        runner = PacedRunner(Navigation(cfg.cfg, 1, 42), Simulation(cfg.cfg, cfg.S0), fsw, speed=speed, logger=pub)
+        t, wall, landing = runner.run()
+        pub.close()
+        print(f"Flight time {t:.2f} s in {wall:.2f} s wall, {pub.stats}")
+    else:
+        received = {"fast": 0, "slow": 0}
+
+        def listen(name, address, delay):
+            for seq, row in subscribe(address):
+                received[name] += 1
+                time.sleep(delay)
+
+        walls = {"baseline": min(descend(Null())[1] for _ in range(3))}
+        for rate in (200.0, None):
+            pub = LivePublisher(keys, rate=rate).start()
+            readers = [
+                threading.Thread(target=listen, args=(name, pub.address, delay), daemon=True)
+                for name, delay in (("fast", 0.0), ("slow", 0.05))
+            ]
+            for reader in readers:
+                reader.start()
+            while pub.stats["subscribers"] < 2:
+                time.sleep(0.01)
+            walls[rate] = min(descend(pub)[1] for _ in range(3))
+            pub.close()
+            for reader in readers:
+                reader.join(2.0)
+
+            # --- Printing Results ---
+            label = "every tick" if rate is None else f"{rate:g} Hz"
+            ticks = pub.stats["ticks"]
+            print(f"--- Publishing at {label} to a fast and a slow subscriber ---")
+            print(f"Loop: {walls[rate]:.3f} s vs {walls['baseline']:.3f} s unpublished, {ticks // 3} ticks per run")
+            print(f"Per published row: {pub.overhead() * 1e6:.2f} µs; rows {pub.stats['published']}, dropped at source {pub.stats['dropped']}")
+            print(f"Received fast {received['fast']}, slow {received['slow']}; subscriber drops {pub.stats['client_dropped']}")
+            received.update(fast=0, slow=0)
@@ -1,41 +1,71 @@
 # External Libraries
+import sys
 import time
 
 # Internal Libraries
 import config as cfg
 from telemetry import Logger
-from gnc.navigation import Navigation
+from gnc.navigation import Navigation, EKFNavigation
 from gnc.guidance import Guidance
 from gnc.control import Control
 from sim.simulation import Simulation
+from instrument import Probe
 
 # --- Initial Conditions (From Apollo 11 Event B) ---
-nav = Navigation(cfg, 1, 42)
-gd = Guidance()
-ct = Control(cfg, cfg.C0)
-sim = Simulation(cfg, cfg.S0)
-logger = Logger(
-    [
-        "t",
-        "m",
-        "r",
-        "dr",
-        "theta",
-        "z",
-        "dz",
-        "x",
-        "dx",
-        "T_cmd",
-        "T_ctrl",
-        "alpha_cmd",
-        "alpha_ctrl",
-        "t_elapsed",
-    ]
-)
+# The default objects are built on first use rather than at import, so worker
+# processes that only import main_loop do not pay for them
+DEFAULTS = ("nav", "gd", "ct", "sim", "logger")
+
+
+def defaults() -> dict:
+    """The module-level default objects, built on first call."""
+    if "nav" not in globals():
+        globals().update(
+            nav=Navigation(cfg, 1, 42),
+            gd=Guidance(),
+            ct=Control(cfg, cfg.C0),
+            sim=Simulation(cfg, cfg.S0),
+            logger=Logger(
+                [
+                    "t",
+                    "m",
+                    "r",
+                    "dr",
+                    "theta",
+                    "z",
+                    "dz",
+                    "x",
+                    "dx",
+                    "T_cmd",
+                    "T_ctrl",
+                    "alpha_cmd",
+                    "alpha_ctrl",
+                    "t_elapsed",
+                ]
+            ),
+        )
+    return {name: globals()[name] for name in DEFAULTS}
+
+
+def __getattr__(name):
+    # Keeps main.nav, main.sim, ... working as before
+    if name in DEFAULTS:
+        return defaults()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def main_loop(
-    t=0, dt=0.1, t_max=1000, nav=nav, gd=gd, ct=ct, sim=sim, logger=logger
+    t=0,
+    dt=0.1,
+    t_max=1000,
+    nav=None,
+    gd=None,
+    ct=None,
+    sim=None,
+    logger=None,
+    until=None,
+    terrain=None,
+    aborts=None,
 ) -> tuple[float, float, float]:
     """
     Main loop for the simulation. This function steps through the navigation, guidance,
@@ -51,40 +81,97 @@ def main_loop(
     ct (Control): The control object.
     sim (Simulation): The simulation object.
     logger (Logger): The logger object.
+        Any of the five left out is taken from the module defaults.
+    until (callable): Optional predicate until(t, sim_state, guidance_state),
+        checked at the start of every tick. The loop pauses before the first tick
+        where it holds, so a checkpoint taken there resumes bit-exactly.
+    terrain (Terrain): Optional terrain model; touchdown is then on the local
+        ground instead of the mean radius. Pass the same model to Navigation
+        so the radar measures altitude above it. The adaptive integrator's
+        events stay relative to the mean radius.
+    aborts (AbortMonitor): Optional abort checks, run at the start of every tick
+        after until; the loop ends on the first that fires, with the reason
+        left on the monitor.
 
     Returns:
-    tuple: A tuple containing the final time, the start time, and the end time.
+    tuple: A tuple containing the final time, the wall-clock duration, and the
+    landing flag.
     """
+    if None in (nav, gd, ct, sim, logger):
+        d = defaults()
+        nav = d["nav"] if nav is None else nav
+        gd = d["gd"] if gd is None else gd
+        ct = d["ct"] if ct is None else ct
+        sim = d["sim"] if sim is None else sim
+        logger = d["logger"] if logger is None else logger
     landing = True
+    # Time since the last GNC tick: dt, or less after the plant stopped on an event
+    h = dt
     start = time.time()
     while landing:
+        if until is not None and until(t, sim.state, gd.guidance_state):
+            break
+        if aborts is not None and aborts.check(t, sim.state):
+            landing = False
+            break
+
         # Navigation Step
-        nav_state = nav.step(dt, sim.state)
+        nav_state = nav.step(h, sim.state)
 
         # Guidance Step
-        guid_state = gd.step(dt, nav_state)
+        guid_state = gd.step(h, nav_state)
 
         # Control Step
-        ctrl_state = ct.step(dt, nav_state, guid_state)
+        ctrl_state = ct.step(h, nav_state, guid_state)
 
         # Logging
         logger.log(t, nav_state, guid_state, ctrl_state, sim.state)
 
         # Simulation Step
-        if sim.state.r - cfg.r_moon < 0 or t > t_max:
+        ground = cfg.r_moon if terrain is None else cfg.r_moon + terrain.height(sim.state.theta)
+        if sim.state.r - ground < 0 or t > t_max:
+            landing = False
+        # The plant may stop short of dt on an event (adaptive integrator only)
+        h = sim.step(dt, ctrl_state)
+        t += h
+        if sim.event is not None and sim.event.terminal:
             landing = False
-        sim.step(dt, ctrl_state)
-
-        t += dt
     end = time.time()
 
-    return t, start - end, landing
+    return t, end - start, landing
 
 
 if __name__ == "__main__":
-    t, t_elapsed, _ = main_loop()
+    nav, gd, ct, sim, logger = defaults().values()
+    # Optional EKF navigation driven by the thrust command: python main.py --ekf
+    if "--ekf" in sys.argv:
+        nav = EKFNavigation(cfg, 1, 42, control=ct.control_state)
+    # Metrics-only mode keeps online accumulators instead of traces: python main.py --metrics
+    metrics = "--metrics" in sys.argv
+    if metrics:
+        from metrics import MetricsRecorder
+
+        logger = MetricsRecorder(cfg.cfg)
+    # Optional per-subsystem instrumentation: python main.py --profile
+    probe = Probe(alloc_every=100) if "--profile" in sys.argv else None
+    if probe is not None:
+        nav, gd, ct, logger, sim = probe.instrument(
+            nav=nav, gd=gd, ct=ct, log=logger, sim=sim
+        )
+    t, t_elapsed, _ = main_loop(nav=nav, gd=gd, ct=ct, sim=sim, logger=logger)
 
     # --- Logging and Plotting ---
     logger.output_stats(t, t_elapsed, sim.state)
-    logger.plot_telemetry()
-    logger.plot_trajectory()
+    if probe is not None:
+        probe.stop()
+        probe.print_summary()
+        probe.to_json("data/PROFILE.json")
+    # Decimated report figure drawn off-screen: python main.py --report
+    if "--report" in sys.argv and not metrics:
+        from viz.fastplot import telemetry_figure
+
+        print(f"Report: {telemetry_figure('data/report_telemetry.png', logger.records)}")
+    # Headless runs (python main.py --headless) skip plotting and never load matplotlib
+    if "--headless" not in sys.argv and not metrics:
+        logger.plot_telemetry()
+        logger.plot_trajectory()
@@ -0,0 +1,337 @@
+# External Libraries
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Internal Libraries
+import config as cfg
+from config import Config
+from dispersion import RunSpec, build_config, run_one, sample_runs
+
+
+class Welford:
+    """Running count, mean and variance (Welford), mergeable (Chan et al.)."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0) -> None:
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+
+    def merge(self, other: "Welford") -> None:
+        n = self.n + other.n
+        if n == 0:
+            return
+        d = other.mean - self.mean
+        self.mean += d * other.n / n
+        self.m2 += other.m2 + d * d * self.n * other.n / n
+        self.n = n
+
+    @property
+    def var(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+
+class RMS:
+    """Running root mean square."""
+
+    __slots__ = ("n", "sumsq")
+
+    def __init__(self, n: int = 0, sumsq: float = 0.0) -> None:
+        self.n = n
+        self.sumsq = sumsq
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        self.sumsq += x * x
+
+    def merge(self, other: "RMS") -> None:
+        self.n += other.n
+        self.sumsq += other.sumsq
+
+    @property
+    def value(self) -> float:
+        return math.sqrt(self.sumsq / self.n) if self.n else math.nan
+
+
+class Extrema:
+    """Running minimum and maximum."""
+
+    __slots__ = ("min", "max")
+
+    def __init__(self, min: float = math.inf, max: float = -math.inf) -> None:
+        self.min = min
+        self.max = max
+
+    def add(self, x: float) -> None:
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other: "Extrema") -> None:
+        if other.empty:
+            return
+        self.add(other.min)
+        self.add(other.max)
+
+    @property
+    def empty(self) -> bool:
+        return self.min > self.max
+
+
+class TimeAbove:
+    """Time spent with a value above a threshold."""
+
+    __slots__ = ("threshold", "time")
+
+    def __init__(self, threshold: float, time: float = 0.0) -> None:
+        self.threshold = threshold
+        self.time = time
+
+    def add(self, x: float, dt: float) -> None:
+        if x > self.threshold:
+            self.time += dt
+
+    def merge(self, other: "TimeAbove") -> None:
+        self.time += other.time
+
+
+class TimeBelow:
+    """Time spent with a value below a threshold."""
+
+    __slots__ = ("threshold", "time")
+
+    def __init__(self, threshold: float, time: float = 0.0) -> None:
+        self.threshold = threshold
+        self.time = time
+
+    def add(self, x: float, dt: float) -> None:
+        if x < self.threshold:
+            self.time += dt
+
+    def merge(self, other: "TimeBelow") -> None:
+        self.time += other.time
+
+
+# Accumulator classes by name, for serialization
+ACCUMULATORS = {c.__name__: c for c in (Welford, RMS, Extrema, TimeAbove, TimeBelow)}
+
+
+class MetricsRecorder:
+    """
+    Logger replacement for metrics-only runs: no traces are kept, only online
+    accumulators updated in O(1) per tick, a few hundred bytes per run.
+
+    Per-tick accumulators (navigation errors, tracking errors, extrema and
+    times above thresholds) pool every tick they see; per-run ones (the
+    propellant remaining at each stage gate and the touchdown values given to
+    finish) hold one sample per run. Throttle and saturation are taken
+    against the thrust limit of the run being flown, set by start() for
+    dispersed runs. Recorders merge across runs and worker processes when
+    their thresholds agree, and round-trip through to_dict/from_dict
+    (JSON-safe).
+
+    Args:
+        config (Config): Vehicle configuration, for the surface radius, thrust
+            limit and empty mass until start() is given a run's own.
+        low_altitude (float): Altitude (m) below which time is accumulated.
+    """
+
+    def __init__(self, config: Config = cfg.cfg, low_altitude: float = 150.0) -> None:
+        self.start(config)
+        self.runs = 0
+        self.ticks = 0
+        # Per tick
+        self.z_error = RMS()  # Navigation altitude error (m)
+        self.dz_error = RMS()  # Navigation vertical velocity error (m/s)
+        self.pitch_error = RMS()  # Pitch command tracking error (rad)
+        self.throttle = Welford()  # Delivered thrust over T_max
+        self.dz = Extrema()  # True vertical velocity (m/s)
+        self.saturated = TimeAbove(1.0)  # Thrust command above the run's T_max (s)
+        self.low = TimeBelow(low_altitude)  # Altitude below low_altitude (s)
+        # Per run
+        self.gates = {}  # Stage -> propellant remaining on entering it (kg)
+        self.t_final = Welford()
+        self.v_touchdown = Welford()
+        self.m_prop_final = Welford()
+        self.v_worst = Extrema()
+        # Current run
+        self._stage = None
+        self._t = None
+
+    def start(self, config: Config) -> None:
+        """Opens a run flown with config, whose T_max normalizes its thrust."""
+        self.r_moon = config.r_moon
+        self.m_empty = config.m_empty
+        self.T_max = float(config.T_max)
+
+    def log(self, t, lvlh, guid, ctrl, plr) -> None:
+        dt = 0.0 if self._t is None else t - self._t
+        self._t = t
+        self.ticks += 1
+        z = plr.r - self.r_moon
+        self.z_error.add(lvlh.z - z)
+        self.dz_error.add(lvlh.dz - plr.dr)
+        self.pitch_error.add(ctrl.alpha_cmd - ctrl.alpha_ctrl)
+        self.throttle.add(ctrl.T_ctrl / self.T_max)
+        self.dz.add(plr.dr)
+        self.saturated.add(ctrl.T_cmd / self.T_max, dt)
+        self.low.add(z, dt)
+        if guid.stage != self._stage:
+            self._stage = guid.stage
+            self.gates.setdefault(guid.stage, Welford()).add(plr.m - self.m_empty)
+
+    def finish(self, t: float, v_touchdown: float, m_prop: float) -> None:
+        """Closes the current run with its final time, touchdown speed and propellant."""
+        self.runs += 1
+        self.t_final.add(t)
+        self.v_touchdown.add(v_touchdown)
+        self.m_prop_final.add(m_prop)
+        self.v_worst.add(v_touchdown)
+        self._stage = self._t = None
+
+    def merge(self, other: "MetricsRecorder") -> "MetricsRecorder":
+        """Merges another recorder's closed runs into this one; returns self."""
+        mine = (self.r_moon, self.low.threshold, self.saturated.threshold)
+        theirs = (other.r_moon, other.low.threshold, other.saturated.threshold)
+        if mine != theirs:
+            raise ValueError(
+                f"Cannot merge recorders with different surface radius or thresholds: {mine} vs {theirs}"
+            )
+        self.runs += other.runs
+        self.ticks += other.ticks
+        for name, acc in self._accumulators().items():
+            acc.merge(getattr(other, name))
+        for stage, acc in other.gates.items():
+            self.gates.setdefault(stage, Welford()).merge(acc)
+        return self
+
+    def _accumulators(self) -> dict:
+        return {k: v for k, v in vars(self).items() if type(v).__name__ in ACCUMULATORS}
+
+    def to_dict(self) -> dict:
+        out = {
+            "runs": self.runs,
+            "ticks": self.ticks,
+            "r_moon": self.r_moon,
+            "m_empty": self.m_empty,
+            "T_max": self.T_max,
+        }
+        for name, acc in self._accumulators().items():
+            fields = [getattr(acc, s) for s in acc.__slots__]
+            if isinstance(acc, Extrema) and acc.empty:
+                fields = [None, None]  # Plain JSON has no infinities
+            out[name] = [type(acc).__name__] + fields
+        out["gates"] = {str(k): [v.n, v.mean, v.m2] for k, v in self.gates.items()}
+        return out
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "MetricsRecorder":
+        rec = cls.__new__(cls)
+        rec._stage = rec._t = None
+        rec.gates = {int(k): Welford(*v) for k, v in d["gates"].items()}
+        for name, value in d.items():
+            if isinstance(value, list):
+                kind, *fields = value
+                value = ACCUMULATORS[kind](*(f for f in fields if f is not None))
+            if name != "gates":
+                setattr(rec, name, value)
+        return rec
+
+    def summary(self) -> dict:
+        """Flat dictionary of the headline numbers."""
+        out = {
+            "runs": self.runs,
+            "rms_z_error_m": self.z_error.value,
+            "rms_dz_error_mps": self.dz_error.value,
+            "rms_pitch_error_rad": self.pitch_error.value,
+            "throttle_mean": self.throttle.mean,
+            "throttle_std": self.throttle.std,
+            "dz_min_mps": self.dz.min,
+            "saturated_s_per_run": self.saturated.time / max(self.runs, 1),
+            "low_altitude_s_per_run": self.low.time / max(self.runs, 1),
+            "t_final_mean_s": self.t_final.mean,
+            "v_touchdown_mean_mps": self.v_touchdown.mean,
+            "v_touchdown_std_mps": self.v_touchdown.std,
+            "v_touchdown_max_mps": self.v_worst.max,
+            "m_prop_final_mean_kg": self.m_prop_final.mean,
+        }
+        for stage, acc in sorted(self.gates.items()):
+            out[f"m_prop_stage{stage}_mean_kg"] = acc.mean
+        return out
+
+    def output_stats(self, t: float, t_elapsed: float, sim) -> None:
+        """Logger.output_stats counterpart for a single metrics-only run."""
+        v_final = math.hypot(sim.dr, sim.dtheta * sim.r)
+        if self._t is not None:
+            self.finish(t, v_final, sim.m - self.m_empty)
+        print("--- Results ---")
+        print(f"Time: {t:.2f} s")
+        print(f"Real Time: {t_elapsed:.2f} s")
+        print(f"Final Altitude: {sim.r - self.r_moon:.2f} m")
+        print(f"Final Velocity: {v_final:.2f} m/s")
+        for key, value in self.summary().items():
+            print(f"{key}: {value:.5g}")
+        print(f"--- Safe Landing: {v_final < 5} ---")
+
+
+def _run_metrics(specs: list[RunSpec]) -> MetricsRecorder:
+    rec = MetricsRecorder(cfg.cfg)
+    for spec in specs:
+        rec.start(build_config(spec))
+        summary = run_one(spec, logger=rec)
+        rec.finish(summary.t_final, summary.v_touchdown, summary.m_prop_remaining)
+    return rec
+
+
+def run_metrics(
+    specs: list[RunSpec], workers: int = None, chunksize: int = None
+) -> MetricsRecorder:
+    """
+    Flies dispersed runs in metrics-only mode over a process pool. Each task
+    returns one recorder for its share of runs, and these are merged.
+
+    Args:
+        specs (list): Runs from dispersion.sample_runs.
+        workers (int): Worker processes; defaults to the CPU count.
+        chunksize (int): Runs per task.
+    """
+    workers = workers or os.cpu_count()
+    chunksize = chunksize or max(1, -(-len(specs) // (4 * workers)))
+    chunks = [specs[i : i + chunksize] for i in range(0, len(specs), chunksize)]
+    if workers == 1:
+        parts = map(_run_metrics, chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_metrics, chunks))
+    total = MetricsRecorder(cfg.cfg)
+    for part in parts:
+        total.merge(part)
+    return total
+
+
+if __name__ == "__main__":
+    n = 64
+    start = time.time()
+    rec = run_metrics(sample_runs(n, seed=42))
+    end = time.time()
+
+    # --- Printing Results ---
+    print("--- Metrics-Only Dispersion ---")
+    print(f"Runs: {n} in {end - start:.2f} s, recorder {len(json.dumps(rec.to_dict()))} bytes as JSON")
+    for key, value in rec.summary().items():
+        print(f"{key}: {value:.5g}")
@@ -0,0 +1,239 @@
+# External Libraries
+import dataclasses
+import time
+from dataclasses import dataclass
+import numpy as np
+
+# Internal Libraries
+import config as cfg
+from config import GuidanceParams
+from states import PolarState
+from aborts import climbing_away, out_of_propellant, unrecoverable
+from dispersion import RunSpec, sample_runs
+import batch
+
+# Tuned guidance parameters and their search bounds
+BOUNDS = {
+    "t_braking": (500.0, 800.0),
+    "t_approach": (80.0, 250.0),
+    "t_final": (100.0, 260.0),
+    "dz_braking": (-80.0, -20.0),
+    "z_approach": (1_500.0, 4_000.0),
+    "z_final": (80.0, 300.0),
+}
+VARIABLES = list(BOUNDS)
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One evaluated parameter set, scored over every dispersed run."""
+
+    params: GuidanceParams
+    propellant: float  # Mean propellant used (kg)
+    v_worst: float  # Worst touchdown speed over the dispersions (m/s)
+    err_worst: float  # Worst landing-site error over the dispersions (m)
+    violation: float  # Summed constraint violation, 0 when feasible
+
+    @property
+    def feasible(self) -> bool:
+        return self.violation == 0
+
+
+def evaluate(
+    X: np.ndarray,
+    specs: list[RunSpec],
+    v_max: float = 5.0,
+    err_max: float = 50.0,
+    seed: int = 0,
+    dt: float = 0.1,
+    t_max: float = 1000,
+) -> list[Candidate]:
+    """
+    Scores a population in one batch run: every candidate (row of X, columns
+    in VARIABLES order) flies every dispersed run, so the batch holds
+    len(X) * len(specs) vehicles. All candidates see the same dispersions and,
+    for a fixed seed, the same radar noise, which keeps comparisons paired.
+
+    A candidate is stopped early, with all of its vehicles, as soon as one of
+    them touches down too fast, runs out of propellant or is descending too
+    fast to brake below v_max, since it can no longer satisfy the
+    constraints. Vehicles climbing away are stopped too.
+
+    Args:
+        X (ndarray): Candidates, shape (P, len(VARIABLES)).
+        specs (list): Dispersed runs from dispersion.sample_runs.
+        v_max (float): Touchdown speed limit (m/s).
+        err_max (float): Landing-site error limit (m).
+        seed (int): Seed of the batch radar noise.
+        dt (float): Time step (s).
+        t_max (float): Maximum flight time (s).
+    """
+    P, M = len(X), len(specs)
+    n = P * M
+    candidate = np.repeat(np.arange(P), M)  # Vehicle k flies candidate k // M
+
+    def tile(values) -> np.ndarray:
+        return np.tile(np.asarray(values, dtype=float), P)
+
+    params = GuidanceParams(**{k: np.repeat(X[:, i], M) for i, k in enumerate(VARIABLES)})
+    S0 = PolarState(*(tile([getattr(s.S0, f) for s in specs]) for f in vars(cfg.S0)))
+    config = dataclasses.replace(
+        cfg.cfg,
+        T_max=tile([s.T_max for s in specs]),
+        Isp=tile([s.Isp for s in specs]),
+        m0=S0.m,
+        S0=S0,  # Per vehicle, so climbing_away measures from each one's own start
+    )
+    bias = tile([s.bias for s in specs])
+    nav, gd, ct, sim = batch.build(n, S0, bias, seed, params, config)
+
+    failed = np.zeros(P, dtype=bool)
+    pruned = np.zeros(n, dtype=bool)
+
+    def prune(t, state, active):
+        z = state.r - cfg.r_moon
+        speed = np.hypot(state.dr, state.r * state.dtheta)
+        doomed = out_of_propellant(state, config) | unrecoverable(state, config, v_max)
+        bad = active & (((z < 0) & (speed >= v_max)) | doomed)
+        failed[candidate[bad]] = True
+        stop = failed[candidate] | climbing_away(state, config)
+        pruned[active & stop] = True
+        return stop
+
+    batch.batch_loop(nav, gd, ct, sim, dt=dt, t_max=t_max, prune=prune)
+
+    # --- Scoring ---
+    s = sim.state
+    landed = (s.r - cfg.r_moon < 0) & ~pruned
+    speed = np.hypot(s.dr, s.r * s.dtheta)
+    err = np.abs(s.r * s.theta - params.x_target)
+    used = config.m0 - s.m
+    # Normalized excess over each limit; a run that never landed counts as 1
+    excess = np.where(
+        landed,
+        np.maximum(speed / v_max - 1, 0) + np.maximum(err / err_max - 1, 0),
+        1.0,
+    )
+    candidates = []
+    for p in range(P):
+        k = candidate == p
+        candidates.append(
+            Candidate(
+                params=GuidanceParams(**dict(zip(VARIABLES, X[p].tolist()))),
+                propellant=float(np.mean(used[k])),
+                v_worst=float(np.max(np.where(landed[k], speed[k], np.inf))),
+                err_worst=float(np.max(np.where(landed[k], err[k], np.inf))),
+                violation=float(np.sum(excess[k])),
+            )
+        )
+    return candidates
+
+
+def better(a: Candidate, b: Candidate) -> bool:
+    """
+    Feasibility rules: a feasible candidate beats an infeasible one, feasible
+    ones compare on propellant and infeasible ones on violation.
+    """
+    if a.feasible and b.feasible:
+        return a.propellant < b.propellant
+    if a.feasible or b.feasible:
+        return a.feasible
+    return a.violation < b.violation
+
+
+def pareto_front(candidates: list[Candidate]) -> list[Candidate]:
+    """Feasible candidates not dominated in (propellant, worst touchdown speed)."""
+    feasible = sorted(
+        (c for c in candidates if c.feasible), key=lambda c: (c.propellant, c.v_worst)
+    )
+    front = []
+    for c in feasible:
+        if not front or c.v_worst < front[-1].v_worst:
+            front.append(c)
+    return front
+
+
+def optimize(
+    generations: int = 15,
+    population: int = 16,
+    samples: int = 16,
+    seed: int = 0,
+    F: float = 0.7,
+    CR: float = 0.9,
+    v_max: float = 5.0,
+    err_max: float = 50.0,
+    verbose: bool = True,
+) -> tuple[Candidate, list[Candidate], list[Candidate]]:
+    """
+    Differential evolution (DE/rand/1/bin) over the guidance parameters,
+    minimizing mean propellant used subject to every dispersed run touching
+    down below v_max within err_max of the target. Each generation's trial
+    population is scored in a single batch run.
+
+    Args:
+        generations (int): Number of generations after the initial population.
+        population (int): Candidates per generation; the nominal parameters
+            are always one of the initial ones.
+        samples (int): Dispersed runs each candidate is flown against.
+        seed (int): Seed for the dispersions, the search and the radar noise.
+        F (float): Differential weight.
+        CR (float): Crossover probability.
+        v_max, err_max (float): Touchdown speed (m/s) and site error (m) limits.
+        verbose (bool): Print progress per generation.
+
+    Returns:
+        tuple: The best candidate, every candidate evaluated, and the Pareto
+        front of propellant against worst-case touchdown speed.
+    """
+    rng = np.random.default_rng(seed)
+    specs = sample_runs(samples, seed)
+    lo, hi = np.array(list(BOUNDS.values())).T
+    nominal = GuidanceParams()
+
+    X = lo + rng.random((population, len(VARIABLES))) * (hi - lo)
+    X[0] = [getattr(nominal, k) for k in VARIABLES]
+    pop = evaluate(X, specs, v_max, err_max, seed)
+    archive = list(pop)
+
+    for gen in range(generations):
+        start = time.time()
+        # Mutation from three distinct other members, then binomial crossover
+        trials = np.empty_like(X)
+        for i in range(population):
+            a, b, c = rng.choice([j for j in range(population) if j != i], 3, replace=False)
+            mutant = np.clip(X[a] + F * (X[b] - X[c]), lo, hi)
+            cross = rng.random(len(VARIABLES)) < CR
+            cross[rng.integers(len(VARIABLES))] = True
+            trials[i] = np.where(cross, mutant, X[i])
+
+        scored = evaluate(trials, specs, v_max, err_max, seed)
+        archive += scored
+        for i, trial in enumerate(scored):
+            if better(trial, pop[i]):
+                X[i], pop[i] = trials[i], trial
+
+        if verbose:
+            best = min(pop, key=lambda c: (c.violation, c.propellant))
+            n_feasible = sum(c.feasible for c in pop)
+            print(
+                f"Generation {gen + 1:>3}: best {best.propellant:8.1f} kg"
+                f" (v_worst {best.v_worst:.2f} m/s), feasible {n_feasible}/{population},"
+                f" {time.time() - start:.1f} s"
+            )
+
+    best = min(pop, key=lambda c: (c.violation, c.propellant))
+    return best, archive, pareto_front(archive)
+
+
+if __name__ == "__main__":
+    best, archive, front = optimize()
+
+    # --- Printing Results ---
+    print("--- Optimization Results ---")
+    print(f"Candidates evaluated: {len(archive)}")
+    print(f"Best propellant used: {best.propellant:.1f} kg (feasible: {best.feasible})")
+    for k in VARIABLES:
+        print(f"  {k}: {getattr(best.params, k):.1f}")
+    print("Pareto front (propellant kg, worst touchdown m/s):")
+    for c in front:
+        print(f"  {c.propellant:8.1f}  {c.v_worst:5.2f}")
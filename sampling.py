@@ -0,0 +1,279 @@
+# External Libraries
+import dataclasses
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+
+# Internal Libraries
+from config import GuidanceParams
+from aborts import CHECKS
+from dispersion import Dispersion, RunSpec, RunSummary, run_one, sample_runs, spec_from_normals
+
+# Sobol direction numbers (Joe and Kuo, new-joe-kuo-6.21201) for dimensions
+# 2 and up: (degree s, coefficients a, initial m_1..m_s). Dimension 1 is the
+# van der Corput sequence.
+JOE_KUO = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+)
+BITS = 32
+
+
+def latin_hypercube(n: int, d: int, seed: int = 0) -> np.ndarray:
+    """n points in [0, 1)^d with exactly one point in each of n slices per axis."""
+    rng = np.random.default_rng(seed)
+    u = (np.arange(n)[:, None] + rng.random((n, d))) / n
+    for j in range(d):
+        u[:, j] = u[rng.permutation(n), j]
+    return u
+
+
+def sobol(n: int, d: int, seed: int = None) -> np.ndarray:
+    """
+    First n points of the d-dimensional Sobol sequence (Joe-Kuo direction
+    numbers), optionally randomized by a digital shift drawn from seed, which
+    keeps the low discrepancy but makes the estimate unbiased, so independent
+    shifts give error bars. Powers of two for n balance the design.
+    """
+    if d > len(JOE_KUO) + 1:
+        raise ValueError(f"sobol supports up to {len(JOE_KUO) + 1} dimensions")
+    V = np.zeros((d, BITS), dtype=np.uint64)
+    V[0] = [1 << (BITS - 1 - k) for k in range(BITS)]
+    for j, (s, a, m0) in enumerate(JOE_KUO[: d - 1], start=1):
+        m = list(m0)
+        for k in range(s, BITS):
+            new = m[k - s] ^ (m[k - s] << s)
+            for i in range(1, s):
+                if (a >> (s - 1 - i)) & 1:
+                    new ^= m[k - i] << i
+            m.append(new)
+        V[j] = [m[k] << (BITS - 1 - k) for k in range(BITS)]
+
+    # Point i is the XOR of the direction numbers of the bits of its Gray code
+    i = np.arange(n, dtype=np.uint64)
+    gray = i ^ (i >> np.uint64(1))
+    x = np.zeros((n, d), dtype=np.uint64)
+    for k in range(BITS):
+        bit = (gray >> np.uint64(k)) & np.uint64(1)
+        x ^= bit[:, None] * V[:, k]
+    if seed is not None:
+        shift = np.random.default_rng(seed).integers(0, 2**BITS, d, dtype=np.uint64)
+        x ^= shift
+    return (x.astype(float) + 0.5) / 2**BITS
+
+
+def sample_design(
+    n: int,
+    seed: int,
+    method: str = "sobol",
+    dispersion: Dispersion = Dispersion(),
+) -> list[RunSpec]:
+    """
+    Dispersed runs from a space-filling design over the seven dispersed
+    parameters, mapped to normals through the inverse CDF. Radar noise
+    streams still come from (seed, index), as in dispersion.sample_runs.
+
+    Args:
+        n (int): Number of runs.
+        seed (int): Master seed; also randomizes the design.
+        method (str): "sobol" (digitally shifted) or "lhs".
+        dispersion (Dispersion): 1σ dispersions.
+    """
+    if method == "sobol":
+        u = sobol(n, 7, seed)
+    elif method == "lhs":
+        u = latin_hypercube(n, 7, seed)
+    else:
+        raise ValueError(f"Unknown design {method!r}")
+    inv_cdf = NormalDist().inv_cdf
+    w = np.array([[inv_cdf(p) for p in row] for row in u])
+    return [spec_from_normals(i, seed, w[i], dispersion) for i in range(n)]
+
+
+def wilson(k: int, n: int, z: float = 1.96) -> tuple[float, float]:
+    """Wilson score interval of a binomial proportion k / n."""
+    if n == 0:
+        return 0.0, 1.0
+    p = k / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(center - half, 0.0), min(center + half, 1.0)
+
+
+def _fly(args) -> RunSummary:
+    spec, params, aborts = args
+    return run_one(spec, params=params, aborts=aborts)
+
+
+def fly(
+    specs: list[RunSpec],
+    params: GuidanceParams = GuidanceParams(),
+    workers: int = None,
+    aborts: dict = None,
+) -> list[RunSummary]:
+    """Summaries of every run, flown over a process pool."""
+    args = [(spec, params, aborts) for spec in specs]
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        return [_fly(a) for a in args]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(args) // (4 * workers))
+        return list(pool.map(_fly, args, chunksize=chunksize))
+
+
+def touchdown_speeds(
+    specs: list[RunSpec],
+    params: GuidanceParams = GuidanceParams(),
+    workers: int = None,
+) -> np.ndarray:
+    """Touchdown speed of every run, flown over a process pool."""
+    return np.array([s.v_touchdown for s in fly(specs, params, workers)])
+
+
+def failed(summary: RunSummary, v_max: float) -> bool:
+    """A run fails if it is aborted, does not land, or lands at v_max or faster."""
+    return bool(summary.abort or not summary.landed or summary.v_touchdown >= v_max)
+
+
+def sequential_failure_rate(
+    seed: int,
+    v_max: float = 5.0,
+    half_width: float = 0.02,
+    p_max: float = None,
+    batch: int = 64,
+    max_runs: int = 10_000,
+    params: GuidanceParams = GuidanceParams(),
+    dispersion: Dispersion = Dispersion(),
+    workers: int = None,
+    aborts: dict = CHECKS,
+) -> dict:
+    """
+    Flies dispersed runs batch by batch until the 95 % Wilson interval on the
+    failure rate is within ±half_width, or, with p_max, as soon as it lies
+    wholly above or below p_max. A run fails if it does not land, lands at
+    v_max or faster, or is aborted; with the abort checks on, doomed runs
+    stop as soon as they are recognized, so infeasible settings are rejected
+    after a fraction of the flight time. The interval is recomputed after
+    every batch, so its coverage is a little under nominal.
+
+    Args:
+        seed (int): Master seed; batches continue its run indices.
+        v_max (float): Touchdown speed limit (m/s).
+        half_width (float): Target interval half-width.
+        p_max (float): Optional failure-rate requirement to decide against.
+        batch (int): Runs per batch.
+        max_runs (int): Upper bound on the runs flown.
+        params (GuidanceParams): Guidance parameters.
+        dispersion (Dispersion): 1σ dispersions.
+        workers (int): Worker processes; defaults to the CPU count.
+        aborts (dict): Abort checks, or None to fly every run out.
+
+    Returns:
+        dict: Runs and failures, the estimate and its interval, the
+        decision against p_max ("above", "below" or None) and the number of
+        runs aborted for each reason.
+    """
+    failures = 0
+    reasons = {}
+    n = 0
+    decision = None
+    while n < max_runs:
+        size = min(batch, max_runs - n)
+        specs = sample_runs(size, seed, dispersion, start=n)
+        for s in fly(specs, params, workers, aborts):
+            failures += failed(s, v_max)
+            if s.abort:
+                reasons[s.abort] = reasons.get(s.abort, 0) + 1
+        n += size
+        low, high = wilson(failures, n)
+        if p_max is not None and (low > p_max or high < p_max):
+            decision = "above" if low > p_max else "below"
+            break
+        if (high - low) / 2 <= half_width:
+            break
+    low, high = wilson(failures, n)
+    return {
+        "runs": n,
+        "failures": failures,
+        "p": failures / n,
+        "low": low,
+        "high": high,
+        "decision": decision,
+        "aborted": reasons,
+    }
+
+
+def compare(
+    specs: list[RunSpec],
+    a: GuidanceParams,
+    b: GuidanceParams,
+    v_max: float = 5.0,
+    workers: int = None,
+) -> dict:
+    """
+    Common-random-number comparison of two guidance variants: both fly the
+    same vehicles with the same radar noise, so the failure-rate difference
+    is estimated from the runs where the outcomes disagree, which is far
+    less noisy than differencing two independent estimates. Runs fail as
+    in sequential_failure_rate.
+
+    Returns:
+        dict: Failure rates of a and b, their difference with its standard
+        error under pairing, and the standard error independent samples of
+        the same size would have.
+    """
+    fail_a = np.array([failed(s, v_max) for s in fly(specs, a, workers)])
+    fail_b = np.array([failed(s, v_max) for s in fly(specs, b, workers)])
+    n = len(specs)
+    diff = fail_b.astype(float) - fail_a
+    p_a, p_b = fail_a.mean(), fail_b.mean()
+    return {
+        "p_a": p_a,
+        "p_b": p_b,
+        "difference": diff.mean(),
+        "se_paired": diff.std(ddof=1) / math.sqrt(n),
+        "se_independent": math.sqrt((p_a * (1 - p_a) + p_b * (1 - p_b)) / n),
+    }
+
+
+if __name__ == "__main__":
+    # A 3 m/s touchdown limit makes failures common enough to resolve here
+    v_max, n, replicates = 3.0, 64, 4
+
+    # Spread of the failure-rate estimate over independent replicates
+    start = time.time()
+    estimates = {"monte carlo": [], "sobol": [], "lhs": []}
+    for r in range(replicates):
+        seed = 1_000 + r
+        for method, specs in (
+            ("monte carlo", sample_runs(n, seed)),
+            ("sobol", sample_design(n, seed, "sobol")),
+            ("lhs", sample_design(n, seed, "lhs")),
+        ):
+            estimates[method].append(np.mean([failed(s, v_max) for s in fly(specs)]))
+
+    # --- Printing Results ---
+    print(f"--- Failure Probability, v >= {v_max} m/s, {n} runs x {replicates} replicates ---")
+    for method, p in estimates.items():
+        print(f"{method:>12}: {np.mean(p):.3f} ± {np.std(p, ddof=1):.3f}")
+
+    low_gate = dataclasses.replace(GuidanceParams(), z_final=140.0)
+    result = compare(sample_runs(n, 7), GuidanceParams(), low_gate, v_max)
+    print("--- Paired Comparison, final gate at 150 m vs 140 m ---")
+    print(f"Failure rates: {result['p_a']:.3f} vs {result['p_b']:.3f}")
+    print(
+        f"Difference: {result['difference']:+.3f}, standard error {result['se_paired']:.3f}"
+        f" paired vs {result['se_independent']:.3f} independent"
+    )
+    print(f"Total: {time.time() - start:.1f} s")
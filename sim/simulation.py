@@ -1,15 +1,87 @@
 import numpy as np
+from dataclasses import dataclass
 from states import PolarState, ControlState
-from config import Config
+from config import Config, GuidanceParams
+
+# --- Dormand-Prince 5(4) Coefficients ---
+DP_C = [0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1]
+DP_A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+]
+DP_B = [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84]
+# Difference between the 5th and embedded 4th order weights (last entry is k7)
+DP_E = [71 / 57600, 0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40]
+
+DP_A_ROWS = [np.array(row) for row in DP_A]
+DP_B_ROW, DP_E_ROW = np.array(DP_B), np.array(DP_E)
+
+# Absolute tolerance per state component [r, dr, theta, dtheta, m]
+DP_ATOL = np.array([1e-6, 1e-8, 1e-12, 1e-14, 1e-6])
+
+
+@dataclass(frozen=True)
+class Event:
+    """An altitude the plant must not step across without stopping on it."""
+
+    name: str
+    altitude: float  # Fires when the true altitude descends through this (m)
+    terminal: bool = False
+
+
+def gate_events(params: GuidanceParams = GuidanceParams()) -> tuple[Event, ...]:
+    """
+    Touchdown ends the run; the gates, taken from the guidance parameters the
+    run flies with, align a GNC tick with the guidance switches.
+    """
+    return (
+        Event("touchdown", 0.0, terminal=True),
+        Event("approach_gate", float(params.z_approach)),
+        Event("final_gate", float(params.z_final)),
+    )
+
+
+EVENTS = gate_events()
 
 
 class Simulation:
-    def __init__(self, config: Config, inital_state: PolarState) -> None:
+    def __init__(
+        self,
+        config: Config,
+        inital_state: PolarState,
+        integrator: str = "rk4",
+        rtol: float = 1e-9,
+        atol: np.ndarray = DP_ATOL,
+        events: tuple[Event, ...] = EVENTS,
+        rate: float = 10.0,
+    ) -> None:
         self.cfg = config
         self.state = inital_state
+        self.rate = rate  # Sub-step rate (Hz) used by the multi-rate executive
+        self.integrator = integrator
+        self.rtol = rtol
+        self.atol = atol
+        self.events = events if integrator == "dopri5" else ()
+        self.event = None  # Last event the plant stopped on
+        self.nfev = 0  # Right-hand-side evaluations
+        self._h = None  # Step size carried between calls
+        self._fired = set()
+        self._fsal = None  # (state, T_ctrl, alpha_ctrl, k7) of the last accepted step
 
-    def step(self, dt: float, control: ControlState) -> None:
+    def step(self, dt: float, control: ControlState) -> float:
+        """
+        Advances the plant by dt with the control held constant. Returns the
+        time actually advanced, which is shorter than dt when the adaptive
+        integrator stops on an event.
+        """
+        if self.integrator == "dopri5":
+            return self._dopri5(dt, control)
         self._rk4(dt, control)
+        return dt
 
     def _get_derivatives(self, state: PolarState, control: ControlState) -> list[float]:
         # Equations of Motion in polar coordinates
@@ -61,3 +133,148 @@ class Simulation:
         ]
 
         self.state = PolarState(x_next[0], x_next[1], x_next[2], x_next[3], x_next[4])
+        self.nfev += 4
+
+    def _dopri5(self, dt: float, control: ControlState) -> float:
+        # Adaptive Dormand-Prince 5(4) with FSAL and event location. Every call
+        # takes at least one step of 6 new evaluations, against 4 for RK4, so
+        # at a 0.1 s command interval this is an accuracy and event-location
+        # mode (1.5x RK4's evaluations), not a speedup; it only saves work
+        # when a call spans several sub-steps, as in the executive.
+        self.event = None
+        y = np.array(list(vars(self.state).values()), dtype=float)
+        k1 = self._first_stage(y, control)
+        h = min(self._h or dt, dt)
+        t = 0.0
+        while t < dt * (1 - 1e-12):
+            h = min(h, dt - t)
+            y_new, k, err = self._dp_step(y, k1, h, control)
+            if err > 1:
+                h *= max(0.2, 0.9 * err**-0.2)
+                continue
+
+            # Stop on the first event crossed inside the accepted step
+            hit = self._locate_event(y, y_new, k1, k[6], h)
+            if hit is not None:
+                event, s = hit
+                # Polish the interpolated root with Newton steps on the true solution
+                r_event = self.cfg.r_moon + event.altitude
+                for _ in range(3):
+                    y_new, _, _ = self._dp_step(y, k1, s, control)
+                    if abs(y_new[0] - r_event) < 1e-9 or y_new[1] == 0:
+                        break
+                    s -= (y_new[0] - r_event) / y_new[1]
+                else:
+                    y_new, _, _ = self._dp_step(y, k1, s, control)
+                self._fired.add(event.name)
+                self.event = event
+                self._set_state(y_new)
+                return float(t + s)
+
+            t += h
+            y, k1 = y_new, k[6]
+            h *= min(5.0, max(0.2, 0.9 * err**-0.2)) if err > 0 else 5.0
+        self._h = h
+        self._set_state(y)
+        self._fsal = (self.state, control.T_ctrl, control.alpha_ctrl, k1)
+        return dt
+
+    def _first_stage(self, y: np.ndarray, control: ControlState) -> np.ndarray:
+        # FSAL across calls: the last k7 is the derivative at this state under the
+        # previous control. The equations of motion are affine in the thrust
+        # acceleration, so swapping in the new control's thrust terms gives k1
+        # without a full evaluation. Any outside change to the state drops it.
+        if self._fsal is None or self._fsal[0] is not self.state:
+            return self._f(y, control)
+        _, T_old, alpha_old, k7 = self._fsal
+        T, alpha = control.T_ctrl, control.alpha_ctrl
+        if T == T_old and alpha == alpha_old:
+            return k7
+        r, m = y[0], y[4]
+        k1 = k7.copy()
+        k1[1] += (T * np.cos(alpha) - T_old * np.cos(alpha_old)) / m
+        k1[3] += (T * np.sin(alpha) - T_old * np.sin(alpha_old)) / (m * r)
+        k1[4] -= (T - T_old) / (self.cfg.Isp * self.cfg.G_earth)
+        return k1
+
+    def _dp_step(self, y, k1, h, control):
+        # Stages as rows of one array so each combination is a single dot product
+        k = np.empty((7, y.size))
+        k[0] = k1
+        for i in range(1, 6):
+            k[i] = self._f(y + h * (DP_A_ROWS[i] @ k[:i]), control)
+        y_new = y + h * (DP_B_ROW @ k[:6])
+        k[6] = self._f(y_new, control)
+        y_err = h * (DP_E_ROW @ k)
+        scale = self.atol + self.rtol * np.maximum(np.abs(y), np.abs(y_new))
+        err = np.sqrt(np.mean((y_err / scale) ** 2))
+        return y_new, k, err
+
+    def _locate_event(self, y0, y1, f0, f1, h):
+        # Root of the altitude on the cubic Hermite interpolant of r over the step
+        hits = []
+        for event in self.events:
+            if event.name in self._fired:
+                continue
+            r_event = self.cfg.r_moon + event.altitude
+            if y0[0] > r_event >= y1[0]:
+                hits.append((self._hermite_root(y0[0], y1[0], f0[0], f1[0], h, r_event), event))
+        if not hits:
+            return None
+        s, event = min(hits, key=lambda hit: hit[0])
+        return event, s
+
+    def _hermite_root(self, r0, r1, dr0, dr1, h, r_event):
+        def g(s):
+            u = s / h
+            return (
+                (1 - u) * r0
+                + u * r1
+                + u * (u - 1) * ((1 - 2 * u) * (r1 - r0) + (u - 1) * h * dr0 + u * h * dr1)
+                - r_event
+            )
+
+        # Illinois false position on the bracket [0, h]
+        a, b, ga, gb = 0.0, h, r0 - r_event, r1 - r_event
+        side = 0
+        for _ in range(60):
+            s = (a * gb - b * ga) / (gb - ga)
+            gs = g(s)
+            if abs(gs) < 1e-9 or b - a < 1e-12 * h:
+                break
+            if gs * gb > 0:
+                b, gb = s, gs
+                if side == -1:
+                    ga /= 2
+                side = -1
+            else:
+                a, ga = s, gs
+                if side == 1:
+                    gb /= 2
+                side = 1
+        return s
+
+    def _f(self, y: np.ndarray, control: ControlState) -> np.ndarray:
+        self.nfev += 1
+        return np.array(self._get_derivatives(PolarState(*y), control))
+
+    def _set_state(self, y: np.ndarray) -> None:
+        self.state = PolarState(*(float(v) for v in y))
+
+
+class BatchSimulation(Simulation):
+    """
+    Plant for N vehicles at once. The state is a PolarState whose fields are
+    length-N arrays; inactive vehicles are held at their current state.
+    """
+
+    def step(self, dt: float, control: ControlState, active=None) -> None:
+        prev = self.state
+        self._rk4(dt, control)
+        if active is not None:
+            self.state = PolarState(
+                *(
+                    np.where(active, new, old)
+                    for new, old in zip(vars(self.state).values(), vars(prev).values())
+                )
+            )
@@ -0,0 +1,209 @@
+import json
+import math
+from collections import OrderedDict
+import numpy as np
+from numpy.lib.format import open_memmap
+import config as cfg
+
+
+class Terrain:
+    """
+    Lunar digital elevation model, stored on disk as square tiles and read
+    through a memory map, so a DEM far larger than RAM costs only the pages
+    that are touched. The grid runs over downrange angle theta (columns) and
+    cross-range distance y (rows); heights are in meters above the mean
+    lunar radius.
+
+    Each tile carries one extra row and column shared with its neighbours, so
+    a bilinear lookup never leaves the tile it falls in. The scalar path
+    decodes tiles into lists of floats, kept in an LRU cache, and remembers
+    the last tile used and the corner heights of the last cell: along a
+    trajectory nearly every lookup hits them. The vectorized path gathers
+    straight from the memory map.
+
+    Args:
+        path (str): DEM written by write_dem or write_synthetic (.npy, with
+            its .json header next to it).
+        cache_tiles (int): Decoded tiles kept in memory.
+    """
+
+    def __init__(self, path: str, cache_tiles: int = 64) -> None:
+        with open(f"{path}.json") as f:
+            header = json.load(f)
+        self.theta0 = header["theta0"]
+        self.dtheta = header["dtheta"]
+        self.y0 = header["y0"]
+        self.dy = header["dy"]
+        self.tile = header["tile"]
+        self.shape = tuple(header["shape"])  # Samples (cross-range, downrange)
+        self.cache_tiles = cache_tiles
+        self._inv_dtheta, self._inv_dy = 1 / self.dtheta, 1 / self.dy
+        # Largest grid coordinates whose cell is still on the map
+        self._u_max = self.shape[1] - 1.000001
+        self._v_max = self.shape[0] - 1.000001
+        # (tile rows, tile columns, tile + 1, tile + 1)
+        self.data = np.load(path, mmap_mode="r")
+        self._cache = OrderedDict()
+        self._last_key = None
+        self._last_tile = None
+        # Grid origin and corner heights of the last cell looked up (h00, h01, h10, h11)
+        self._cell = (math.inf, math.inf, 0.0, 0.0, 0.0, 0.0)
+        self.loads = 0  # Tiles decoded (cache misses)
+
+    def height(self, theta, y=0.0):
+        """Terrain height (m) under a point; arrays go to heights."""
+        if isinstance(theta, np.ndarray):
+            return self.heights(theta, y)
+        u = (theta - self.theta0) * self._inv_dtheta
+        v = (y - self.y0) * self._inv_dy
+        # Consecutive points along a trajectory mostly fall in the same cell
+        i, j, h00, h01, h10, h11 = self._cell
+        fx, fy = u - i, v - j
+        if 0.0 <= fx < 1.0 and 0.0 <= fy < 1.0:
+            h0 = h00 + fx * (h01 - h00)
+            h1 = h10 + fx * (h11 - h10)
+            return h0 + fy * (h1 - h0)
+        # Clamp to the last cell, so points off the map take the edge height
+        if not 0.0 <= u <= self._u_max:
+            u = 0.0 if u < 0.0 else self._u_max
+        if not 0.0 <= v <= self._v_max:
+            v = 0.0 if v < 0.0 else self._v_max
+        i, j = int(u), int(v)
+        T = self.tile
+        key = (j // T, i // T)
+        rows = self._last_tile if key == self._last_key else self._decode(*key)
+        ci, cj = i % T, j % T
+        row0, row1 = rows[cj], rows[cj + 1]
+        if row0 is None or row1 is None:
+            row0, row1 = self._decode_rows(rows, *key, cj)
+        self._cell = (i, j, row0[ci], row0[ci + 1], row1[ci], row1[ci + 1])
+        fx, fy = u - i, v - j
+        h0 = row0[ci] + fx * (row0[ci + 1] - row0[ci])
+        h1 = row1[ci] + fx * (row1[ci + 1] - row1[ci])
+        return h0 + fy * (h1 - h0)
+
+    def heights(self, theta, y=0.0) -> np.ndarray:
+        """Vectorized height over arrays of points (y may be a scalar)."""
+        theta = np.asarray(theta, dtype=float)
+        u = np.clip((theta - self.theta0) * self._inv_dtheta, 0.0, self._u_max)
+        v = np.clip((np.asarray(y, dtype=float) - self.y0) * self._inv_dy, 0.0, self._v_max)
+        u, v = np.broadcast_arrays(u, v)
+        i, j = u.astype(np.intp), v.astype(np.intp)
+        ti, ci = np.divmod(i, self.tile)
+        tj, cj = np.divmod(j, self.tile)
+        d = self.data
+        h00 = d[tj, ti, cj, ci].astype(float)
+        h01 = d[tj, ti, cj, ci + 1].astype(float)
+        h10 = d[tj, ti, cj + 1, ci].astype(float)
+        h11 = d[tj, ti, cj + 1, ci + 1].astype(float)
+        fx, fy = u - i, v - j
+        h0 = h00 + fx * (h01 - h00)
+        h1 = h10 + fx * (h11 - h10)
+        return h0 + fy * (h1 - h0)
+
+    def _decode(self, tj: int, ti: int) -> list:
+        # A cached tile starts empty and its rows are decoded on first use,
+        # since a ground track only crosses a few rows of each tile
+        key = (tj, ti)
+        rows = self._cache.get(key)
+        if rows is None:
+            rows = [None] * (self.tile + 1)
+            self.loads += 1
+            self._cache[key] = rows
+            if len(self._cache) > self.cache_tiles:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        self._last_key, self._last_tile = key, rows
+        return rows
+
+    def _decode_rows(self, rows: list, tj: int, ti: int, cj: int) -> tuple:
+        for c in (cj, cj + 1):
+            if rows[c] is None:
+                rows[c] = self.data[tj, ti, c].tolist()
+        return rows[cj], rows[cj + 1]
+
+
+def write_dem(
+    path: str,
+    shape: tuple,
+    heights,
+    theta0: float = 0.0,
+    dtheta: float = 1e-5,
+    y0: float = None,
+    dy: float = 20.0,
+    tile: int = 128,
+) -> None:
+    """
+    Writes a DEM tile by tile, so the full grid never has to be in memory.
+
+    Args:
+        path (str): Output .npy path; the header goes to path + ".json".
+        shape (tuple): Samples (cross-range, downrange).
+        heights (callable): heights(theta, y) -> heights (m) over 2D grids.
+        theta0 (float): Downrange angle of the first column (rad).
+        dtheta (float): Column spacing (rad).
+        y0 (float): Cross-range of the first row (m); centered on 0 by default.
+        dy (float): Row spacing (m).
+        tile (int): Cells per tile side.
+    """
+    ny, nx = shape
+    y0 = -(ny - 1) * dy / 2 if y0 is None else y0
+    nty, ntx = math.ceil((ny - 1) / tile), math.ceil((nx - 1) / tile)
+    data = open_memmap(path, mode="w+", dtype=np.float32, shape=(nty, ntx, tile + 1, tile + 1))
+    cells = np.arange(tile + 1)
+    for tj in range(nty):
+        # Samples past the grid edge repeat the edge, like the clamped lookup
+        y = y0 + np.minimum(tj * tile + cells, ny - 1) * dy
+        for ti in range(ntx):
+            theta = theta0 + np.minimum(ti * tile + cells, nx - 1) * dtheta
+            data[tj, ti] = heights(theta[None, :], y[:, None])
+    data.flush()
+    del data
+    header = {"theta0": theta0, "dtheta": dtheta, "y0": y0, "dy": dy, "tile": tile, "shape": [ny, nx]}
+    with open(f"{path}.json", "w") as f:
+        json.dump(header, f)
+
+
+def write_synthetic(
+    path: str,
+    theta_max: float = 0.28,
+    dtheta: float = 1e-5,
+    ny: int = 201,
+    dy: float = 20.0,
+    tile: int = 128,
+    seed: int = 0,
+    relief: float = 150.0,
+) -> None:
+    """
+    Writes a synthetic DEM from 0 to theta_max downrange: rolling terrain as a
+    sum of random plane waves with amplitude falling off with wavenumber.
+
+    Args:
+        path (str): Output .npy path.
+        theta_max (float): Downrange extent (rad).
+        dtheta (float): Column spacing (rad).
+        ny (int): Cross-range samples, centered on the ground track.
+        dy (float): Row spacing (m).
+        tile (int): Cells per tile side.
+        seed (int): Seed of the wave parameters.
+        relief (float): Standard deviation of the height (m).
+    """
+    rng = np.random.default_rng(seed)
+    n_waves = 24
+    wavelength = np.exp(rng.uniform(np.log(300.0), np.log(30_000.0), n_waves))  # m
+    direction = rng.uniform(0, 2 * np.pi, n_waves)
+    phase = rng.uniform(0, 2 * np.pi, n_waves)
+    amplitude = wavelength**0.8
+    amplitude *= relief * np.sqrt(2 / np.sum(amplitude**2))
+    k = 2 * np.pi / wavelength
+    kx, ky = k * np.cos(direction), k * np.sin(direction)
+
+    def heights(theta, y):
+        h = np.zeros(np.broadcast(theta, y).shape)
+        for w in range(n_waves):
+            h += amplitude[w] * np.sin(kx[w] * cfg.r_moon * theta + ky[w] * y + phase[w])
+        return h
+
+    nx = int(round(theta_max / dtheta)) + 1
+    write_dem(path, (ny, nx), heights, 0.0, dtheta, None, dy, tile)
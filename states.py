@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import numpy as np
 
 
 @dataclass
@@ -38,3 +39,19 @@ class GuidanceState:
     stage: int
     t_elapsed: float
     t_stage: float
+
+
+def stack(state, n: int):
+    """
+    Broadcasts a scalar state dataclass into its batch form, where every field
+    holds a length-n NumPy array (one element per vehicle).
+
+    Args:
+        state: A PolarState, LVLHState, ControlState or GuidanceState.
+        n (int): Number of vehicles in the batch.
+    """
+    fields = {
+        k: np.full(n, v, dtype=int if k == "stage" else float)
+        for k, v in vars(state).items()
+    }
+    return type(state)(**fields)
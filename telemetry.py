@@ -1,7 +1,75 @@
 from states import LVLHState, GuidanceState, ControlState, PolarState
 import config as cfg
-import matplotlib.pyplot as plt
+import math
 import numpy as np
+from collections import deque
+from itertools import chain
+from operator import attrgetter, itemgetter
+
+# Source and dtype of every channel a logger can record: "t", or an attribute
+# of one of the other arguments of Logger.log (t, lvlh, guid, ctrl, plr)
+CHANNELS = {
+    "t": ("t", np.float64),
+    "m": ("plr.m", np.float64),
+    "r": ("plr.r", np.float64),
+    "dr": ("plr.dr", np.float64),
+    "theta": ("plr.theta", np.float64),
+    "dtheta": ("plr.dtheta", np.float64),
+    "z": ("lvlh.z", np.float64),
+    "dz": ("lvlh.dz", np.float64),
+    "x": ("lvlh.x", np.float64),
+    "dx": ("lvlh.dx", np.float64),
+    "T_cmd": ("ctrl.T_cmd", np.float64),
+    "T_ctrl": ("ctrl.T_ctrl", np.float64),
+    "alpha_cmd": ("ctrl.alpha_cmd", np.float64),
+    "alpha_ctrl": ("ctrl.alpha_ctrl", np.float64),
+    "ddz": ("guid.ddz", np.float64),
+    "ddx": ("guid.ddx", np.float64),
+    "stage": ("guid.stage", np.int8),
+    "t_elapsed": ("guid.t_elapsed", np.float64),
+}
+
+
+SOURCES = ("lvlh", "guid", "ctrl", "plr")
+
+
+def _tuple_getter(attrs: list[str]):
+    # attrgetter returns a bare value for a single attribute; always give a tuple
+    if not attrs:
+        return lambda obj: ()
+    if len(attrs) == 1:
+        get = attrgetter(attrs[0])
+        return lambda obj: (get(obj),)
+    return attrgetter(*attrs)
+
+
+def _source_getters(keys: list[str]) -> tuple[tuple, list[int]]:
+    # One getter per source over all its channels, and the position of each
+    # key in (t,) + the concatenation of the getters' results
+    attrs = {source: [] for source in SOURCES}
+    for k in keys:
+        source, _, attr = CHANNELS[k][0].partition(".")
+        if attr:
+            attrs[source].append(attr)
+    flat = ["t"] + [f"{source}.{attr}" for source in SOURCES for attr in attrs[source]]
+    positions = [flat.index(CHANNELS[k][0]) for k in keys]
+    return tuple(_tuple_getter(attrs[s]) for s in SOURCES), positions
+
+
+def row_builder(keys: list[str]):
+    """
+    Returns a function of the arguments of Logger.log that gives the tuple of
+    channel values for keys. Each source object is read by one precompiled
+    attrgetter over all its channels, and the result is put in key order by
+    one itemgetter, so a tick costs a handful of C calls.
+    """
+    (get_lvlh, get_guid, get_ctrl, get_plr), positions = _source_getters(keys)
+    order = itemgetter(*positions) if len(positions) > 1 else lambda row: (row[positions[0]],)
+
+    def build(t, lvlh, guid, ctrl, plr) -> tuple:
+        return order((t,) + get_lvlh(lvlh) + get_guid(guid) + get_ctrl(ctrl) + get_plr(plr))
+
+    return build
 
 
 class Logger:
@@ -53,6 +121,9 @@ class Logger:
         print(f"--- Safe Landing: {v_final < 5} ---")
 
     def plot_trajectory(self):
+        # Imported on demand so headless runs and workers never load matplotlib
+        import matplotlib.pyplot as plt
+
         plt.plot(np.rad2deg(self.records["theta"]), self.records["z"])
         plt.xlabel("Theta (rad)")
         plt.ylabel("Altitude (m)")
@@ -60,6 +131,8 @@ class Logger:
         plt.show()
 
     def plot_telemetry(self):
+        import matplotlib.pyplot as plt
+
         r_array = np.array(self.records["r"])
         dr_array = np.array(self.records["dr"])
         z_array = np.array(self.records["z"])
@@ -163,3 +236,200 @@ class Logger:
 
         print(f"RMS Error in Position: {rms_r:.5f} m")
         print(f"RMS Error in Velocity: {rms_dr:.5f} m/s")
+
+
+class ColumnLogger(Logger):
+    """
+    Logger backend that records into typed NumPy columns, one per channel,
+    which grow in chunks. A tick only buffers the values read from the state
+    objects; once a chunk of rows is buffered they are converted and copied
+    into the columns in one go. Channels can be recorded at a reduced rate,
+    and every channel switches to full rate inside capture windows opened by
+    stage transitions, by the descent through touchdown_alt, or by trigger().
+
+    Args:
+        desired_keys (list): Channels to record (keys of CHANNELS).
+        rates (dict): Optional recording rate (Hz) per channel; channels not
+            listed are recorded every tick.
+        chunk (int): Number of rows added each time a column fills up.
+        pre (float): Seconds of full-rate data kept before a trigger.
+        post (float): Seconds of full-rate data recorded after a trigger.
+        touchdown_alt (float): True altitude (m) that opens the touchdown window.
+    """
+
+    def __init__(
+        self,
+        desired_keys: list[str],
+        rates: dict[str, float] | None = None,
+        chunk: int = 4096,
+        pre: float = 5.0,
+        post: float = 5.0,
+        touchdown_alt: float = 10.0,
+    ) -> None:
+        rates = rates or {}
+        self.chunk = chunk
+        self.pre = pre
+        self.post = post
+        self.touchdown_alt = touchdown_alt
+        self.capture_until = -np.inf
+        self._stage = None
+        # Radius that opens the touchdown window; -inf once it has opened
+        self._r_touchdown = cfg.r_moon + touchdown_alt
+
+        # Channels sharing a rate share one time column and row buffer
+        periods: dict[float, list[str]] = {}
+        for key in desired_keys:
+            period = 1 / rates[key] if key in rates else 0.0
+            periods.setdefault(period, []).append(key)
+        self._groups = [_ColumnGroup(p, keys, chunk) for p, keys in periods.items()]
+        self._group_of = {k: g for g in self._groups for k in g.keys}
+
+    @property
+    def records(self) -> dict[str, np.ndarray]:
+        # Zero-copy views; they go stale once a column grows, so re-read them
+        for g in self._groups:
+            g.spill()
+        return {k: g.data[k][: g.n] for g in self._groups for k in g.keys}
+
+    def times(self, key: str) -> np.ndarray:
+        """Returns the sample times of a channel (zero-copy view)."""
+        g = self._group_of[key]
+        g.spill()
+        return g.data["_t"][: g.n]
+
+    def trigger(self, t: float) -> None:
+        """Opens a full-rate capture window around time t."""
+        self.capture_until = max(self.capture_until, t + self.post)
+        for g in self._groups:
+            g.flush_ring(t - self.pre)
+
+    def log(
+        self,
+        t: float,
+        lvlh: LVLHState,
+        guid: GuidanceState,
+        ctrl: ControlState,
+        plr: PolarState,
+    ) -> None:
+        # Triggers: stage transitions and the final descent through touchdown_alt
+        if guid.stage != self._stage or plr.r <= self._r_touchdown:
+            self._check_triggers(t, guid, plr)
+
+        capturing = t <= self.capture_until
+        for g in self._groups:
+            g.record(t, lvlh, guid, ctrl, plr, capturing, self.pre)
+
+    def _check_triggers(self, t: float, guid: GuidanceState, plr: PolarState) -> None:
+        if guid.stage != self._stage:
+            if self._stage is not None:
+                self.trigger(t)
+            self._stage = guid.stage
+        if plr.r <= self._r_touchdown:
+            self._r_touchdown = -np.inf
+            self.trigger(t)
+            self.capture_until = np.inf
+
+
+class _ColumnGroup:
+    # Channels recorded at a common period, one typed column each plus "_t"
+    def __init__(self, period: float, keys: list[str], chunk: int) -> None:
+        self.period = period
+        self.keys = keys
+        self.chunk = chunk
+        dtypes = {"_t": np.float64, **{k: CHANNELS[k][1] for k in keys}}
+        self.data = {k: np.empty(chunk, dtype=d) for k, d in dtypes.items()}
+        self.n = 0  # Rows in the columns; buffered rows are not counted yet
+        self.rows = []  # Per row, the tuples (t,) and the values read from each source
+        self.next_due = -np.inf
+        self.ring = deque()  # (t, row, recorded) for the last `pre` seconds
+        (self._lvlh, self._guid, self._ctrl, self._plr), self._positions = _source_getters(keys)
+
+    def record(self, t, lvlh, guid, ctrl, plr, capturing: bool, pre: float) -> None:
+        row = ((t,), self._lvlh(lvlh), self._guid(guid), self._ctrl(ctrl), self._plr(plr))
+        if self.period == 0:
+            self._append(row)
+            return
+        # Schedule on a fixed grid with a small tolerance for accumulated time
+        on_time = t >= self.next_due
+        due = capturing or on_time
+        if due:
+            self._append(row)
+            if on_time:
+                self.next_due = (math.floor(t / self.period + 1e-6) + 1 - 1e-6) * self.period
+        # Decimated channels keep a short history so a trigger can back-fill it
+        ring = self.ring
+        ring.append((t, row, due))
+        while ring and ring[0][0] < t - pre:
+            ring.popleft()
+
+    def flush_ring(self, t_start: float) -> None:
+        if self.period == 0 or not self.ring:
+            return
+        # Rewind past rows already recorded inside the window and rewrite the
+        # window at full rate, keeping the columns sorted in time
+        start = max(self.ring[0][0], t_start)
+        self.spill()
+        self.n = int(np.searchsorted(self.data["_t"][: self.n], start))
+        for t, row, _ in self.ring:
+            if t >= start:
+                self._append(row)
+        self.ring.clear()
+
+    def _append(self, row: tuple) -> None:
+        self.rows.append(row)
+        if len(self.rows) == self.chunk:
+            self.spill()
+
+    def spill(self) -> None:
+        """Copies the buffered rows into the columns."""
+        if not self.rows:
+            return
+        count = len(self.rows)
+        # One C pass unboxes every value; row i holds (t, *channel values)
+        flat = np.fromiter(
+            chain.from_iterable(chain.from_iterable(self.rows)), np.float64
+        ).reshape(count, -1)
+        self.rows.clear()
+        end = self.n + count
+        if end > len(self.data["_t"]):
+            size = len(self.data["_t"]) + max(self.chunk, count)
+            for k, column in self.data.items():
+                grown = np.empty(size, dtype=column.dtype)
+                grown[: self.n] = column[: self.n]
+                self.data[k] = grown
+        self.data["_t"][self.n : end] = flat[:, 0]
+        for k, i in zip(self.keys, self._positions):
+            self.data[k][self.n : end] = flat[:, i]
+        self.n = end
+
+
+class TraceRecorder:
+    """
+    Batch-aware logger for multi-run plots: keeps every `every`-th tick of a
+    few channels for all vehicles, as float32 to halve the footprint.
+
+    Args:
+        desired_keys (list): Channels to record (keys of CHANNELS).
+        every (int): Ticks between recorded samples.
+    """
+
+    def __init__(self, desired_keys: list[str], every: int = 10) -> None:
+        self.keys = list(desired_keys)
+        self.every = every
+        self._build = row_builder(self.keys)
+        self._t = []
+        self._rows = []
+        self._tick = 0
+
+    def log(self, t, lvlh, guid, ctrl, plr) -> None:
+        if self._tick % self.every == 0:
+            self._t.append(t)
+            row = np.broadcast_arrays(*self._build(t, lvlh, guid, ctrl, plr))
+            self._rows.append(np.array(row, dtype=np.float32))
+        self._tick += 1
+
+    @property
+    def records(self) -> dict[str, np.ndarray]:
+        """Sample times under "t" and one (vehicles, samples) array per channel."""
+        data = np.stack(self._rows, axis=-1)
+        return {"t": np.array(self._t), **dict(zip(self.keys, data))}
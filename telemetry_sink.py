@@ -0,0 +1,176 @@
+import json
+import numpy as np
+from telemetry import CHANNELS, row_builder
+
+# --- File Layout ---
+# [ header: MAGIC + JSON schema, padded to HEADER_SIZE bytes ]
+# [ chunk 0: column 0 | column 1 | ... ] [ chunk 1: ... ] ...
+# Every chunk holds `chunk` rows (the last one may hold fewer) stored column by
+# column, so a reader can memory-map a single channel of a single chunk.
+MAGIC = b"LMTLM001"
+HEADER_SIZE = 4096
+
+
+class TelemetrySink:
+    """
+    Streams telemetry to a compact binary columnar file while the simulation
+    runs. Rows are buffered in a fixed-size chunk and flushed to disk whenever
+    it fills, so memory stays bounded regardless of run length. Accepts the same
+    log() call as Logger; with n set, every field is a length-n array (batch
+    runs) and a "vehicle" channel is added.
+
+    Args:
+        path (str): Output file.
+        desired_keys (list): Channels to record (keys of telemetry.CHANNELS).
+        chunk (int): Rows per chunk on disk.
+        n (int): Number of vehicles when logging a batch, None for one vehicle.
+    """
+
+    def __init__(
+        self, path: str, desired_keys: list[str], chunk: int = 8192, n: int = None
+    ) -> None:
+        self.path = path
+        self.keys = list(desired_keys) + (["vehicle"] if n is not None else [])
+        self.dtypes = [np.dtype(CHANNELS[k][1]) for k in desired_keys]
+        self.dtypes += [np.dtype(np.int32)] if n is not None else []
+        self.chunk = chunk
+        self.n = n
+        self.rows = 0
+        self.buffer = [np.empty(chunk, dtype=d) for d in self.dtypes]
+        self.fill = 0
+        self._build = row_builder(desired_keys)
+        self._vehicle = np.arange(n, dtype=np.int32) if n is not None else None
+        self._file = open(path, "wb")
+        self._write_header()
+
+    def log(self, t, lvlh, guid, ctrl, plr) -> None:
+        row = self._build(t, lvlh, guid, ctrl, plr)
+        if self.n is None:
+            i = self.fill
+            for col, value in zip(self.buffer, row):
+                col[i] = value
+            self.fill += 1
+            if self.fill == self.chunk:
+                self.flush()
+            return
+
+        # Batch rows: one per vehicle, split across chunk boundaries as needed
+        row = [np.broadcast_to(v, self.n) for v in row] + [self._vehicle]
+        done = 0
+        while done < self.n:
+            take = min(self.n - done, self.chunk - self.fill)
+            for col, values in zip(self.buffer, row):
+                col[self.fill : self.fill + take] = values[done : done + take]
+            self.fill += take
+            done += take
+            if self.fill == self.chunk:
+                self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered rows as one chunk and updates the header."""
+        if self.fill == 0:
+            return
+        for col in self.buffer:
+            self._file.write(col[: self.fill].tobytes())
+        self.rows += self.fill
+        self.fill = 0
+        self._write_header()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _write_header(self) -> None:
+        # Rewritten after every chunk so an interrupted run stays readable
+        schema = {
+            "channels": self.keys,
+            "dtypes": [d.str for d in self.dtypes],
+            "chunk": self.chunk,
+            "rows": self.rows,
+        }
+        header = MAGIC + json.dumps(schema).encode()
+        if len(header) > HEADER_SIZE:
+            raise ValueError("Telemetry schema does not fit in the file header")
+        pos = self._file.tell()
+        self._file.seek(0)
+        self._file.write(header.ljust(HEADER_SIZE, b" "))
+        self._file.seek(max(pos, HEADER_SIZE))
+        self._file.flush()
+
+
+class TelemetryReader:
+    """
+    Lazy reader for files written by TelemetrySink. Only the chunks and
+    channels touched by a query are memory-mapped and read.
+
+    Args:
+        path (str): File written by TelemetrySink.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if not header.startswith(MAGIC):
+            raise ValueError(f"{path} is not a telemetry file")
+        schema = json.loads(header[len(MAGIC) :])
+        self.channels = schema["channels"]
+        self.dtypes = {k: np.dtype(d) for k, d in zip(self.channels, schema["dtypes"])}
+        self.chunk = schema["chunk"]
+        self.rows = schema["rows"]
+        self._row_bytes = sum(d.itemsize for d in self.dtypes.values())
+        self._chunk_first_t = None
+
+    def read(
+        self, channels: list[str] = None, t0: float = None, t1: float = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Loads the selected channels for samples with t0 <= t <= t1.
+
+        Args:
+            channels (list): Channels to load; all channels if None.
+            t0, t1 (float): Time range; open-ended if None.
+        """
+        channels = channels or self.channels
+        i0 = 0 if t0 is None else self._row_at(t0, "left")
+        i1 = self.rows if t1 is None else self._row_at(t1, "right")
+        return {k: self._rows(k, i0, i1) for k in channels}
+
+    def _row_at(self, t: float, side: str) -> int:
+        # Binary search over chunk start times, then inside one chunk
+        if self._chunk_first_t is None:
+            n_chunks = -(-self.rows // self.chunk)
+            self._chunk_first_t = np.array(
+                [self._rows("t", k * self.chunk, k * self.chunk + 1)[0] for k in range(n_chunks)]
+            )
+        k = max(int(np.searchsorted(self._chunk_first_t, t, side)) - 1, 0)
+        start = k * self.chunk
+        t_chunk = self._rows("t", start, min(start + self.chunk, self.rows))
+        return start + int(np.searchsorted(t_chunk, t, side))
+
+    def _rows(self, key: str, i0: int, i1: int) -> np.ndarray:
+        dtype = self.dtypes[key]
+        parts = []
+        for k in range(i0 // self.chunk, -(-i1 // self.chunk)):
+            start = k * self.chunk
+            n = min(self.chunk, self.rows - start)
+            # Columns before this one in the chunk
+            col_offset = 0
+            for other in self.channels:
+                if other == key:
+                    break
+                col_offset += self.dtypes[other].itemsize * n
+            offset = HEADER_SIZE + start * self._row_bytes + col_offset
+            column = np.memmap(self.path, dtype, "r", offset, (n,))
+            parts.append(np.array(column[max(i0 - start, 0) : min(i1 - start, n)]))
+        if not parts:
+            return np.empty(0, dtype)
+        return np.concatenate(parts)
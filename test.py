@@ -1,8 +1,34 @@
 from gnc import navigation, guidance, control
-from sim import simulation
+from sim import simulation, terrain
+from viz import fastplot
 from states import PolarState, LVLHState, ControlState, GuidanceState
+from config import GuidanceParams
+import aborts
+import batch
+import cache
+import checkpoint
+import cluster
 import config as cfg
-import matplotlib.pyplot as plt
+import dispersion
+import envelopes
+import executive
+import fastpath
+import hil
+import instrument
+import lincov
+import live
+import main
+import metrics
+import optimize
+import sampling
+import telemetry
+import telemetry_sink
+import json
+import tempfile
+import os
+import subprocess
+import sys
+import numpy as np
 
 # Testing File to Verify code functionality
 
@@ -34,12 +60,397 @@ ctrl._thrust_limiter()
 
 print(ctrl.control_state.T_ctrl == cfg.T_max)
 
+# Test Batch Thrust Limiter Matches Scalar
+T_cmds = [0, 0.05 * cfg.T_max, 0.3 * cfg.T_max, 0.7 * cfg.T_max, 2 * cfg.T_max]
+batch_ctrl = control.BatchControl(cfg, ControlState(0, 0, 0, 0), len(T_cmds))
+batch_ctrl.control_state.T_cmd = np.array(T_cmds)
+batch_ctrl._thrust_limiter()
+T_scalar = []
+for T_cmd in T_cmds:
+    ctrl = control.Control(cfg, ControlState(T_cmd, 0, 0, 0))
+    ctrl._thrust_limiter()
+    T_scalar.append(ctrl.control_state.T_ctrl)
+
+print(list(batch_ctrl.control_state.T_ctrl) == T_scalar)
+
+# Test Adaptive Integrator Stops Exactly On Touchdown
+sim = simulation.Simulation(
+    cfg, PolarState(cfg.r_moon + 100, -10, 0, 0, m_initial), integrator="dopri5"
+)
+t_step = sim.step(dt=10, control=ControlState(0, 0, 0, 0))
+
+print(sim.event.name == "touchdown" and t_step < 10)
+print(abs(sim.state.r - cfg.r_moon) < 1e-6)
+dopri = dispersion.run_one(dispersion.sample_runs(1, seed=5)[0], integrator="dopri5")
+gates = {event.name: event.altitude for event in simulation.gate_events(GuidanceParams(z_final=140.0))}
+print(dopri.landed and dopri.v_touchdown < 5 and gates["final_gate"] == 140.0)
+
+# Test Executive Rejects Rates That Do Not Divide The Plant Rate
+try:
+    executive.Executive(
+        navigation.Navigation(cfg, 0, 0, rate=3),
+        guidance.Guidance(rate=2),
+        control.Control(cfg, ControlState(0, 0, 0, 0), rate=25),
+        simulation.Simulation(cfg, cfg.S0, rate=100),
+    )
+    print(False)
+except ValueError:
+    print(True)
+
+# Test Executive Call Counts, Zero-Order Hold and Agreement With Main Loop
+class Tape:
+    # Records what the loop handed the logger on every tick
+    def __init__(self):
+        self.rows = []
+
+    def log(self, t, lvlh, guid, ctrl, plr):
+        self.rows.append((guid.ddz, ctrl.T_cmd, plr.m))
+
+multi_tape = Tape()
+multi = executive.Executive(
+    navigation.Navigation(cfg, 1, 42, rate=5),
+    guidance.Guidance(verbose=False, rate=2),
+    control.Control(cfg, ControlState(*vars(cfg.C0).values()), rate=10),
+    simulation.Simulation(cfg, cfg.S0, rate=20),
+    logger=multi_tape,
+    log_rate=20,
+)
+multi.run(t_max=30)
+n_ticks = multi.calls["sim"]
+held_guid = all(len({row[0] for row in multi_tape.rows[i : i + 10]}) == 1 for i in range(0, n_ticks, 10))
+held_ctrl = all(multi_tape.rows[i][1] == multi_tape.rows[i + 1][1] for i in range(0, n_ticks - 1, 2))
+counts = multi.calls == {"sim": n_ticks, "nav": -(-n_ticks // 4), "gd": -(-n_ticks // 10), "ct": -(-n_ticks // 2), "log": n_ticks}
+flat_tape, loop_tape = Tape(), Tape()
+executive.Executive(
+    navigation.Navigation(cfg, 1, 42),
+    guidance.Guidance(verbose=False),
+    control.Control(cfg, ControlState(*vars(cfg.C0).values())),
+    simulation.Simulation(cfg, cfg.S0),
+    logger=flat_tape,
+).run(t_max=30)
+main.main_loop(
+    t_max=30,
+    nav=navigation.Navigation(cfg, 1, 42),
+    gd=guidance.Guidance(verbose=False),
+    ct=control.Control(cfg, ControlState(*vars(cfg.C0).values())),
+    sim=simulation.Simulation(cfg, cfg.S0),
+    logger=loop_tape,
+)
+
+print(counts and n_ticks == 601 and held_guid and held_ctrl and flat_tape.rows == loop_tape.rows[: len(flat_tape.rows)] and len(flat_tape.rows) == 301)
+
+# Test Closed-Form Cubic Guidance Matches Reference Solver
+gd = guidance.Guidance()
+rng = np.random.default_rng(0)
+cases = rng.uniform([1, -1e4, -1e4, -100, -100], [700, 1e4, 1e4, 100, 100], (100, 5))
+ddf_ref = [gd._cubic_guidance_solve(0.0, *case)[2] for case in cases]
+ddf_fast = guidance.cubic_guidance(*cases.T)
+
+print(np.allclose(ddf_fast, ddf_ref, rtol=1e-9, atol=1e-12))
+
+# Test Column Logger Records Match List Logger
+keys = ["t", "m", "r", "dr", "theta", "z", "dz", "x", "dx"]
+keys += ["T_cmd", "T_ctrl", "alpha_cmd", "alpha_ctrl", "t_elapsed"]
+list_logger = telemetry.Logger(keys)
+column_logger = telemetry.ColumnLogger(keys, chunk=4)
+guid_state = GuidanceState(0, 0, 0, 0, 0, 0, 1, 0, 0)
+for i in range(10):
+    args = (i * dt, LVLHState(i, 0, 0, 0, 0), guid_state, ControlState(0, 0, i, 0))
+    list_logger.log(*args, PolarState(cfg.r_moon + 1000, 0, 0, 0, 0))
+    column_logger.log(*args, PolarState(cfg.r_moon + 1000, 0, 0, 0, 0))
+
+print(all(list(column_logger.records[k]) == list_logger.records[k] for k in keys))
+
+# Test Column Logger Decimates and Back-Fills Capture Windows
+capture_logger = telemetry.ColumnLogger(["t", "z"], rates={"z": 1.0}, chunk=8, pre=1.0, post=1.0)
+for i in range(100):
+    # Stage change at 5 s, descent through touchdown_alt at 8.5 s
+    stage_state = GuidanceState(0, 0, 0, 0, 0, 0, 1 if i < 50 else 2, 0, 0)
+    plr_state = PolarState(cfg.r_moon + (1000 if i < 85 else 5), 0, 0, 0, 0)
+    capture_logger.log(i * 0.1, LVLHState(i, 0, 0, 0, 0), stage_state, ControlState(0, 0, 0, 0), plr_state)
+captured = [0, 10, 20, 30] + list(range(40, 60)) + [60, 70] + list(range(75, 100))
+
+print(list(capture_logger.records["z"]) == captured and np.allclose(capture_logger.times("z"), np.array(captured) * 0.1) and len(capture_logger.records["t"]) == 100)
+
+# Test Telemetry Sink Round Trip With Time Range
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "run.tlm")
+    with telemetry_sink.TelemetrySink(path, keys, chunk=3) as sink:
+        for i in range(10):
+            args = (i * dt, LVLHState(i, 0, 0, 0, 0), guid_state, ControlState(0, 0, i, 0))
+            sink.log(*args, PolarState(cfg.r_moon + 1000, 0, 0, 0, 0))
+    window = telemetry_sink.TelemetryReader(path).read(["t", "z"], 2.5, 7)
+
+print(list(window["z"]) == [3, 4, 5, 6, 7])
+
+# Test Dispersion Is Reproducible Across Workers and Sample Sizes
+specs = dispersion.sample_runs(4, seed=21)
+serial, pooled = dispersion.run_dispersion(specs, workers=1), dispersion.run_dispersion(specs, workers=2)
+
+print(repr(serial) == repr(pooled) and dispersion.sample_runs(2, seed=21) == specs[:2] and dispersion.sample_runs(2, seed=21, start=2) == specs[2:])
+
+# Test Fast Path Matches Object Loop Exactly
+runs = []
+for loop in [main.main_loop, fastpath.fast_loop]:
+    objs = (
+        navigation.Navigation(cfg, 1, 42),
+        guidance.Guidance(verbose=False),
+        control.Control(cfg, ControlState(0, -np.pi / 2, 0, -np.pi / 2)),
+        simulation.Simulation(cfg, cfg.S0),
+    )
+    if loop is main.main_loop:
+        loop(t_max=20, nav=objs[0], gd=objs[1], ct=objs[2], sim=objs[3], logger=list_logger)
+    else:
+        loop(*objs, t_max=20)
+    runs.append((objs[3].state, objs[2].control_state, objs[0].z_filtered))
+
+print(runs[0] == runs[1])
+
+# Test Latency Histogram Percentiles Within One Bucket
+stats = instrument.StageStats()
+for ns in range(1_000, 101_000, 100):
+    stats.add(ns)
+
+print(abs(stats.percentile(50) - 50_500) / 50_500 < 0.125)
+
+# Test Unpaced HIL Runner Matches Object Loop
+objs = (
+    navigation.Navigation(cfg, 1, 42),
+    guidance.Guidance(verbose=False),
+    control.Control(cfg, ControlState(0, -np.pi / 2, 0, -np.pi / 2)),
+    simulation.Simulation(cfg, cfg.S0),
+)
+runner = hil.PacedRunner(objs[0], objs[3], hil.LocalFSW(objs[1], objs[2]), speed=np.inf)
+runner.run(t_max=20)
+
+print(runs[0][0] == objs[3].state and runner.misses == 0)
+
+# Test Paced HIL Runner Holds Late Commands and Waits Without Hold
+lockstep = hil.PacedRunner(navigation.Navigation(cfg, 1, 42), simulation.Simulation(cfg, cfg.S0), hil.LocalFSW(guidance.Guidance(verbose=False), control.Control(cfg, ControlState(*vars(cfg.C0).values()))), speed=np.inf)
+lockstep.run(t_max=3)
+paced = {}
+for policy in (("hold", "skip_log"), ()):
+    paced[policy] = hil.PacedRunner(navigation.Navigation(cfg, 1, 42), simulation.Simulation(cfg, cfg.S0), hil.ProcessFSW(delay=0.002), speed=50, policy=policy, logger=telemetry.ColumnLogger(["t"]))
+    paced[policy].run(t_max=3)
+held, waited = paced[("hold", "skip_log")], paced[()]
+
+print(held.misses > 0 and held.sim.state.m < cfg.m0 - 10 and waited.misses > 0 and waited.sim.state == lockstep.sim.state)
+
+# Test Restored Checkpoint Resumes Bit-Exactly
+full, paused, resumed = checkpoint.nominal(), checkpoint.nominal(), checkpoint.nominal()
+main.main_loop(t_max=20, nav=full[0], gd=full[1], ct=full[2], sim=full[3], logger=list_logger)
+t, _, _ = main.main_loop(
+    t_max=20, nav=paused[0], gd=paused[1], ct=paused[2], sim=paused[3], logger=list_logger,
+    until=lambda t, sim_state, guidance_state: t >= 10,
+)
+t = checkpoint.restore(checkpoint.snapshot(t, *paused), *resumed)
+main.main_loop(t=t, t_max=20, nav=resumed[0], gd=resumed[1], ct=resumed[2], sim=resumed[3], logger=list_logger)
+
+print(resumed[3].state == full[3].state and resumed[0].z_filtered == full[0].z_filtered)
+
+# Test Cached Sweep Only Flies Missing Points
+with tempfile.TemporaryDirectory() as cache_dir:
+    specs = dispersion.sample_runs(2, seed=7)
+    cases = [cache.Case(spec, t_max=20) for spec in specs]
+    result_cache = cache.ResultCache(cache_dir)
+    first = cache.sweep(cases[:1], result_cache, workers=1)
+    second = cache.sweep(cases, result_cache, workers=1)
+
+hashed = {str(path.relative_to(cache.ROOT)) for path in cache.sources()}
+
+print(repr(first[0]) == repr(second[0]) and result_cache.hits == 1 and result_cache.misses == 2 and {"telemetry.py", "aborts.py", "fastpath.py", "gnc/navigation.py", "sim/simulation.py"} <= hashed)
+
+# Test Optimizer Scores Nominal Feasible and Prunes an Infeasible Candidate
+X = np.array([[640, 150, 180, -50, 2_500, 150], [500, 80, 100, -20, 1_500, 80]], dtype=float)
+nominal, infeasible = optimize.evaluate(X, dispersion.sample_runs(2, seed=0))
+
+print(nominal.feasible and not infeasible.feasible and optimize.pareto_front([nominal, infeasible]) == [nominal])
+
+# Test Batch EKF With One Vehicle Tracks the Scalar EKF
+ekf_ct = control.Control(cfg.cfg, ControlState(0, -np.pi / 2, 0, -np.pi / 2))
+ekf_nav = navigation.EKFNavigation(cfg.cfg, 1, 42, control=ekf_ct.control_state)
+ekf_sim = simulation.Simulation(cfg.cfg, cfg.S0)
+main.main_loop(t_max=20, nav=ekf_nav, gd=guidance.Guidance(verbose=False), ct=ekf_ct, sim=ekf_sim, logger=list_logger)
+batch_objs = batch.build(1, ekf=True)
+batch.batch_loop(*batch_objs, t_max=20)
+
+print(np.allclose(batch_objs[0].xhat[:, 0], ekf_nav.xhat, rtol=1e-9) and np.allclose(batch_objs[0].P[0].ravel(), ekf_nav.P, rtol=1e-6, atol=1e-12))
+
+# Test EKF Velocity Noise Leaves the Radar Noise Stream Alone
+slow_vel, fast_vel = (navigation.EKFNavigation(cfg.cfg, 1, 42, velocity_rate=r) for r in (2.0, 10.0))
+for _ in range(20):
+    slow_vel.step(0.1, cfg.S0)
+    fast_vel.step(0.1, cfg.S0)
+
+print(slow_vel.rng.bit_generator.state == fast_vel.rng.bit_generator.state and slow_vel.velocity_rng.bit_generator.state != fast_vel.velocity_rng.bit_generator.state)
+
+# Test Tiled Terrain Lookup Is Bilinear Across Tiles
+with tempfile.TemporaryDirectory() as dem_dir:
+    dem_path = os.path.join(dem_dir, "dem.npy")
+    plane = lambda theta, y: theta * 2.5e5 + y * 0.5  # Bilinear interpolation is exact on a plane
+    terrain.write_dem(dem_path, (21, 50), plane, dtheta=1e-5, dy=10, tile=8)
+    dem = terrain.Terrain(dem_path, cache_tiles=2)
+    theta_q = np.linspace(0, 49e-5, 97)
+    y_q = np.linspace(-100, 100, 97)
+    scalar_h = [dem.height(float(a), float(b)) for a, b in zip(theta_q, y_q)]
+
+    filters = [navigation.EKFNavigation(cfg.cfg, 0, 0, terrain=t) for t in (None, dem, None, dem)]
+    filters[2:] = [navigation.BatchEKFNavigation(cfg.cfg, 0, 0, 1, terrain=t) for t in (None, dem)]
+    for ekf in filters:
+        ekf.xhat[2] = 20e-5 * cfg.r_moon  # Mid-map, where the plane has a slope of 2.5e5 / r_moon
+        ekf._predict_ekf(0.1, cfg.m0)
+    slope_var = (2.5e5 / cfg.r_moon * filters[0].xhat[3] * 0.1) ** 2  # The filter divides by r_moon + z, 2 % off once squared
+    added = [filters[1].P[0] - filters[0].P[0], float(filters[3].P[0, 0, 0] - filters[2].P[0, 0, 0])]
+
+    print(np.allclose(scalar_h, plane(theta_q, y_q)) and np.allclose(dem.heights(theta_q, y_q), scalar_h) and len(dem._cache) == 2 and np.allclose(added, slope_var, rtol=0.05))
+    del dem, filters
+
+# Test Worker Imports Stay Headless
+worker = subprocess.run([sys.executable, "-c", "import dispersion, main, sys; main.nav; sys.exit('matplotlib' in sys.modules)"], cwd=os.path.dirname(os.path.abspath(__file__)))
+
+print(worker.returncode == 0)
+
+# Test Decimation Keeps Peaks and Overlays Render
+trace_t = np.linspace(0, 10, 5_000)
+traces = np.sin(trace_t * np.arange(1, 4)[:, None])
+lt_x, lt_y = fastplot.lttb(trace_t, traces[0], 200)
+mm_x, mm_y = fastplot.minmax(trace_t, traces, 100)
+with tempfile.TemporaryDirectory() as fig_dir:
+    fig_path = fastplot.render([(fastplot.overlay_figure, (os.path.join(fig_dir, "z.png"), trace_t, {"z": traces}))], workers=1)[0]
+    rendered = os.path.getsize(fig_path) > 0
+
+print(len(lt_y) == 200 and lt_x[0] == 0 and lt_x[-1] == 10 and lt_y.max() > 0.999 and mm_y.shape == (3, 200) and np.array_equal(mm_y.max(axis=1), traces.max(axis=1)) and rendered)
+
+# Test Quantile Sketches Merge and Track Cross-Run Envelopes
+samples = np.random.default_rng(3).normal(size=20_000)
+sketch_a, sketch_b = envelopes.TDigest(), envelopes.TDigest()
+sketch_a.add(samples[:10_000])
+sketch_b.add(samples[10_000:])
+merged = sketch_a.merge(sketch_b).quantile([0.05, 0.5, 0.95])
+env_t = np.linspace(0, 10, 101)
+aggs = [envelopes.EnvelopeAggregator(np.linspace(0, 10, 11), keys=("z",), block=16) for _ in range(2)]
+for run in range(100):
+    aggs[run % 2].add_run({"t": env_t, "z": env_t + run})  # Run r is offset by r
+envelope = aggs[0].merge(aggs[1]).envelope("z", [0.5])
+
+print(np.allclose(merged, np.quantile(samples, [0.05, 0.5, 0.95]), atol=0.02) and np.allclose(envelope[0], np.linspace(0, 10, 11) + 49.5) and len(sketch_a.means) <= 200)
+
+# Test Metrics-Only Mode Matches Traces and Merges Across Runs
+trace_logger = telemetry.Logger(list(telemetry.CHANNELS))
+recorders = [metrics.MetricsRecorder(cfg.cfg) for _ in range(3)]
+for recorder in (trace_logger, *recorders):
+    main.main_loop(t_max=20, nav=navigation.Navigation(cfg, 1, 42), gd=guidance.Guidance(verbose=False), ct=control.Control(cfg, ControlState(0, -np.pi / 2, 0, -np.pi / 2)), sim=simulation.Simulation(cfg, cfg.S0), logger=recorder)
+for i, recorder in enumerate(recorders):
+    recorder.finish(20.0, float(i), 1.0)
+rms_z = np.sqrt(np.mean((np.array(trace_logger.records["r"]) - cfg.r_moon - np.array(trace_logger.records["z"])) ** 2))
+pooled = metrics.MetricsRecorder.from_dict(json.loads(json.dumps(recorders[0].to_dict()))).merge(recorders[1]).merge(recorders[2])
+empty = json.dumps(metrics.MetricsRecorder(cfg.cfg).to_dict(), allow_nan=False)
+pooled.merge(metrics.MetricsRecorder.from_dict(json.loads(empty)))
+
+print(np.isclose(recorders[0].z_error.value, rms_z) and pooled.runs == 3 and pooled.v_touchdown.mean == 1.0 and np.isclose(pooled.v_touchdown.var, 1.0) and np.isclose(pooled.z_error.value, rms_z) and np.isfinite([pooled.dz.min, pooled.dz.max]).all())
+
+# Test Metrics Normalize Thrust Per Dispersed Run and Refuse Mismatched Merges
+spec = dispersion.sample_runs(1, seed=9)[0]
+run_recorder, run_trace = metrics.MetricsRecorder(cfg.cfg), telemetry.Logger(list(telemetry.CHANNELS))
+run_recorder.start(dispersion.build_config(spec))
+dispersion.run_one(spec, t_max=20, logger=run_recorder)
+dispersion.run_one(spec, t_max=20, logger=run_trace)
+try:
+    metrics.MetricsRecorder(cfg.cfg, low_altitude=100.0).merge(pooled)
+    refused = False
+except ValueError:
+    refused = True
+
+print(spec.T_max != cfg.T_max and np.isclose(run_recorder.throttle.mean, np.mean(np.array(run_trace.records["T_ctrl"]) / spec.T_max)) and refused)
+
+# Test Live Telemetry Reaches a Fast Subscriber in Full and a Stalled One Never Blocks the Loop
+publisher = live.LivePublisher(["t", "z", "stage"], rate=None, client_buffer=16 * 1024).start()
+stalled = live.socket.create_connection(publisher.address)
+stalled.setsockopt(live.socket.SOL_SOCKET, live.socket.SO_RCVBUF, 4096)
+frames = []
+reader = live.threading.Thread(target=lambda: frames.extend(live.subscribe(publisher.address)))
+reader.start()
+while publisher.stats["subscribers"] < 2:
+    live.time.sleep(0.01)
+guid_state = GuidanceState(0, 0, 0, 0, 0, 0, 2, 0, 0)
+for i in range(20_000):
+    publisher.log(0.1 * i, LVLHState(1000.0 - i, 0, 0, 0, 0), guid_state, cfg.C0, cfg.S0)
+    if i % 100 == 0:
+        live.time.sleep(0.002)
+publisher.close()
+reader.join()
+stalled.close()
+seqs = [seq for seq, _ in frames]
+
+print(seqs == sorted(set(seqs)) and seqs[-1] == 20_000 and frames[-1][1] == {"t": 1999.9, "z": -18999.0, "stage": 2} and len(seqs) == publisher.stats["published"] and sorted(publisher.stats["client_dropped"])[0] == 0 and max(publisher.stats["client_dropped"]) > 0)
+
+# Test Aborts Classify Doomed Runs and Sequential Stopping Decides Early
+spec = dispersion.sample_runs(1, seed=3)[0]
+unaborted, checked = dispersion.run_one(spec, t_max=20), dispersion.run_one(spec, t_max=20, aborts=aborts.CHECKS)
+dry = PolarState(cfg.S0.r, 0.0, 0.0, cfg.S0.dtheta, np.array([cfg.m0, cfg.m_empty + 1.0]))
+monitor = aborts.AbortMonitor(cfg.cfg)
+batch.batch_loop(*batch.build(2, dry), t_max=20, prune=monitor.prune)
+fast_r = cfg.r_moon + 2_000.0
+marginal = [aborts.unrecoverable(PolarState(fast_r, -145.0, 0.0, v_h / fast_r, cfg.m0), cfg.cfg) for v_h in (0.0, 1_500.0)]
+steep = sampling.sequential_failure_rate(1, p_max=0.1, batch=4, params=GuidanceParams(t_braking=500, dz_braking=-80), workers=1)
+
+print(repr(checked) == repr(unaborted) and list(monitor.reasons) == ["", "propellant"] and steep["runs"] == 4 and steep["decision"] == "above" and steep["aborted"] == {"descent_rate": 4} and marginal == [True, False])
+
+# Test Local Cluster Retries Lost Work and Resumes From Its Ledger
+with tempfile.TemporaryDirectory() as ledger_dir:
+    ledger = os.path.join(ledger_dir, "ledger.jsonl")
+    cases = [cache.Case(spec, t_max=20) for spec in dispersion.sample_runs(6, seed=11)]
+    first, first_stats = cluster.run_local(cases[:4], workers=2, ledger=ledger, delays=[0.0, 0.2], limits=[0, None])
+    second, second_stats = cluster.run_local(cases, workers=2, ledger=ledger)
+    os.environ.pop(cluster.KEY_VARIABLE, None)
+    try:
+        cluster.Coordinator(cases, ledger)
+        keyless = True
+    except RuntimeError:
+        keyless = False
+direct = [cache.run_case(case)[0] for case in cases]
+
+print(repr(second) == repr(direct) and repr(first) == repr(direct[:4]) and first_stats["requeued"] >= 1 and second_stats["resumed"] == 4 and not keyless)
+
+# Test Dual Numbers Give the RK4 Step Jacobian and Find the Throttle Gap
+plant = simulation.Simulation(cfg.cfg, cfg.S0)
+x0 = list(vars(cfg.S0).values())
+thrust = ControlState(40_000, 0.3, 40_000, 0.3)
+plant.state = PolarState(*(lincov.Dual(v, e) for v, e in zip(x0, np.eye(5))))
+plant.step(0.1, thrust)
+J_dual = np.array([v.d for v in vars(plant.state).values()])
+J_fd = np.zeros((5, 5))
+for j, h in enumerate([1e-2, 1e-4, 1e-8, 1e-8, 1e-2]):
+    ends = []
+    for sign in (1, -1):
+        plant.state = PolarState(*(v + sign * h * (i == j) for i, v in enumerate(x0)))
+        plant.step(0.1, thrust)
+        ends.append(np.array(list(vars(plant.state).values())))
+    J_fd[:, j] = (ends[0] - ends[1]) / (2 * h)
+gap = lincov._limiter_jump(cfg.cfg, 0.66 * cfg.T_max, 0.64 * cfg.T_max)
+kink = lincov._limiter_jump(cfg.cfg, 0.11 * cfg.T_max, 0.09 * cfg.T_max)
+
+print(np.all(np.abs(J_dual - J_fd) <= 1e-4 * np.abs(J_dual).max(axis=1, keepdims=True)) and np.isclose(gap, 0.36 * cfg.T_max) and kink == 0.0)
+
+# Test Block Noise Matches Scalar Draws and Designs Stratify
+block_noise = navigation.BlockNoise(42, block=64)
+scalar_rng = np.random.default_rng(42)
+same_draws = all(block_noise.normal(0, 2.0) == scalar_rng.normal(0, 2.0) for _ in range(100))
+same_state = block_noise.bit_generator.state == scalar_rng.bit_generator.state
+strata = [np.sort((design * 16).astype(int), axis=0) for design in (sampling.sobol(16, 7, seed=1), sampling.latin_hypercube(16, 7, seed=1))]
+low, high = sampling.wilson(5, 100)
+
+print(same_draws and same_state and all(np.array_equal(s, np.tile(np.arange(16)[:, None], 7)) for s in strata) and low < 0.05 < high)
+
 # Test Filtering
 nav = navigation.Navigation(cfg, 0, 0)
 nav_log = []
 for i in range(20):
     nav_state = nav.step(dt=1, polar_state=PolarState(1000 + cfg.r_moon, 0, 0, 0, 0))
     nav_log.append(nav_state.z)
+
+import matplotlib.pyplot as plt  # Only loaded for the plot
+
 plt.figure()
 plt.plot([i for i in range(20)], nav_log)
 plt.axhline(y=1000, color="r")
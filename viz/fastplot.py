@@ -0,0 +1,342 @@
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+import config as env
+
+# Telemetry channels of the batch report: (title, y label)
+REPORT = {
+    "z": ("Altitude", "Altitude (m)"),
+    "dz": ("Vertical Velocity", "Velocity (m/s)"),
+    "dx": ("Horizontal Velocity", "Velocity (m/s)"),
+    "m": ("Mass", "Mass (kg)"),
+}
+
+
+def lttb(x, y, n_out: int):
+    """
+    Largest-Triangle-Three-Buckets downsampling of one trace. Keeps the first
+    and last samples and, from each of n_out - 2 buckets in between, the one
+    spanning the largest triangle with the previously kept sample and the mean
+    of the next bucket, which preserves peaks and the visual shape.
+
+    Args:
+        x (ndarray): Sample positions, increasing.
+        y (ndarray): Sample values.
+        n_out (int): Number of samples to keep.
+
+    Returns:
+        tuple: The kept x and y samples.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    counts = np.diff(edges)
+    # Bucket means, plus the last sample as the "next bucket" of the last one
+    mean_x = np.append(np.add.reduceat(x[: n - 1], edges[:-1]) / counts, x[-1])
+    mean_y = np.append(np.add.reduceat(y[: n - 1], edges[:-1]) / counts, y[-1])
+
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs(
+            (ax - mean_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y[i + 1] - ay)
+        )
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def minmax(x, Y, n_bins: int):
+    """
+    Min/max decimation: keeps the smallest and largest sample of each of n_bins
+    bins, in time order, so the envelope of a trace is drawn exactly. Works on
+    one trace or on a (runs, samples) stack of traces sharing x, all at once.
+
+    Args:
+        x (ndarray): Sample positions shared by all traces.
+        Y (ndarray): One trace, or traces as rows.
+        n_bins (int): Number of bins; each trace keeps 2 * n_bins samples.
+
+    Returns:
+        tuple: The kept x and Y samples, with the shape of Y.
+    """
+    x, Y = np.asarray(x, dtype=float), np.asarray(Y)
+    Y2 = np.atleast_2d(Y)
+    n = Y2.shape[1]
+    if 2 * n_bins >= n:
+        return np.broadcast_to(x, Y.shape), Y
+    # Pad with the last sample so every bin has the same width
+    k = -(-n // n_bins)
+    pad = n_bins * k - n
+    if pad:
+        Y2 = np.concatenate([Y2, np.repeat(Y2[:, -1:], pad, axis=1)], axis=1)
+        x = np.concatenate([x, np.repeat(x[-1:], pad)])
+    bins = Y2.reshape(len(Y2), n_bins, k)
+    i_min, i_max = bins.argmin(axis=2), bins.argmax(axis=2)
+    first, second = np.minimum(i_min, i_max), np.maximum(i_min, i_max)
+    start = np.arange(n_bins) * k
+    idx = np.stack([start + first, start + second], axis=2).reshape(len(Y2), -1)
+    Y_out = np.take_along_axis(Y2, idx, axis=1)
+    x_out = x[idx]
+    return (x_out, Y_out) if Y.ndim == 2 else (x_out[0], Y_out[0])
+
+
+def overlay(
+    ax,
+    x,
+    Y,
+    n_bins: int = 128,
+    max_runs: int = 1_000,
+    color="tab:blue",
+    alpha: float = 0.05,
+    **kwargs,
+):
+    """
+    Draws many runs as a single LineCollection, min/max decimated, so the
+    cost grows with the number of drawn vertices rather than with the number
+    of artists. Past max_runs, an evenly spaced subset of the runs is drawn
+    as lines, and the full spread of all runs is shaded behind them. The
+    median run is drawn on top.
+
+    Args:
+        ax (Axes): Target axes.
+        x (ndarray): Sample times shared by all runs.
+        Y (ndarray): Traces as rows, shape (runs, samples).
+        n_bins (int): Decimation bins per trace.
+        max_runs (int): Most runs drawn as individual lines.
+        color, alpha: Line style of the individual runs.
+        **kwargs: Passed to LineCollection.
+
+    Returns:
+        LineCollection: The added collection.
+    """
+    from matplotlib.collections import LineCollection
+
+    median = np.median(Y, axis=0)
+    if len(Y) > max_runs:
+        ax.fill_between(x, Y.min(axis=0), Y.max(axis=0), color=color, alpha=0.2, linewidth=0)
+        Y = Y[np.linspace(0, len(Y) - 1, max_runs).astype(np.intp)]
+    xs, Ys = minmax(x, Y, n_bins)
+    lines = LineCollection(
+        np.stack([xs, Ys], axis=2), colors=color, alpha=alpha, linewidths=0.5, **kwargs
+    )
+    ax.add_collection(lines)
+    ax.autoscale_view()
+    ax.plot(*lttb(x, median, 4 * n_bins), color="k", linewidth=1.0)
+    return lines
+
+
+def _figure(**kwargs):
+    # A bare Figure renders through Agg on savefig and never touches pyplot's
+    # global state or a GUI backend, so it is safe in workers and threads
+    from matplotlib.figure import Figure
+
+    return Figure(**kwargs)
+
+
+def overlay_figure(path: str, t, traces: dict, n_bins: int = 128) -> str:
+    """
+    Saves one panel per channel of REPORT found in traces, each overlaying
+    every run.
+
+    Args:
+        path (str): Output image.
+        t (ndarray): Sample times shared by all runs.
+        traces (dict): Channel name to (runs, samples) array.
+        n_bins (int): Decimation bins per trace.
+    """
+    keys = [k for k in REPORT if k in traces]
+    fig = _figure(figsize=(5 * len(keys), 4))
+    axs = fig.subplots(1, len(keys), squeeze=False)
+    n_runs = len(next(iter(traces.values())))
+    fig.suptitle(f"Descent Telemetry, {n_runs} Runs")
+    for ax, key in zip(axs[0], keys):
+        title, label = REPORT[key]
+        overlay(ax, t, traces[key], n_bins)
+        ax.set_title(title)
+        ax.set_xlabel("Time (s)")
+        ax.set_ylabel(label)
+        ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+    return path
+
+
+def histogram_figure(path: str, values: dict, bins: int = 50) -> str:
+    """Saves a histogram panel per named array of end-of-run values."""
+    fig = _figure(figsize=(5 * len(values), 4))
+    axs = fig.subplots(1, len(values), squeeze=False)
+    for ax, (name, v) in zip(axs[0], values.items()):
+        ax.hist(v[np.isfinite(v)], bins=bins)
+        ax.set_title(name)
+        ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+    return path
+
+
+def telemetry_figure(path: str, records: dict, n_out: int = 2_000) -> str:
+    """
+    Single-run telemetry (the Logger.plot_telemetry panels that matter for a
+    report), with every trace LTTB-downsampled to n_out samples.
+
+    Args:
+        path (str): Output image.
+        records (dict): Logger records with t, z, dz, dx, T_cmd, T_ctrl,
+            alpha_cmd, alpha_ctrl and m.
+        n_out (int): Samples kept per trace.
+    """
+    t = np.asarray(records["t"])
+    panels = [
+        ("Altitude", "Altitude (m)", [("z", "Altitude")]),
+        ("Velocity", "Velocity (m/s)", [("dz", "Vertical"), ("dx", "Horizontal")]),
+        ("Thrust", "Thrust (N)", [("T_cmd", "Command"), ("T_ctrl", "Actual")]),
+        ("Pitch", "Pitch (rad)", [("alpha_cmd", "Command"), ("alpha_ctrl", "Actual")]),
+        ("Mass", "Mass (kg)", [("m", "Mass")]),
+    ]
+    fig = _figure(figsize=(4 * len(panels), 4))
+    axs = fig.subplots(1, len(panels))
+    for ax, (title, label, keys) in zip(axs, panels):
+        for key, name in keys:
+            ax.plot(*lttb(t, records[key], n_out), label=name)
+        ax.set_title(title)
+        ax.set_xlabel("Time (s)")
+        ax.set_ylabel(label)
+        ax.grid(True)
+        if len(keys) > 1:
+            ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+    return path
+
+
+def plot_envelope(ax, grid, envelope, color="tab:blue", label=None):
+    """
+    Draws a percentile envelope, e.g. from envelopes.EnvelopeAggregator: the
+    outer quantiles shaded and the middle one as a line.
+
+    Args:
+        ax (Axes): Target axes.
+        grid (ndarray): Grid values (s or m).
+        envelope (ndarray): Quantiles on the grid, shape (3, len(grid)), low
+            to high.
+        color, label: Style of the middle line.
+    """
+    lo, mid, hi = envelope
+    ax.fill_between(grid, lo, hi, color=color, alpha=0.25, linewidth=0)
+    ax.plot(grid, mid, color=color, label=label)
+
+
+def envelope_figure(path: str, aggregator, keys=None) -> str:
+    """
+    Saves one panel per channel of an EnvelopeAggregator, showing its 5-95 %
+    band and median against time or altitude.
+
+    Args:
+        path (str): Output image.
+        aggregator (EnvelopeAggregator): Aggregated runs.
+        keys (list): Channels to draw; defaults to all of them.
+    """
+    keys = keys or aggregator.keys
+    grid = aggregator.grid
+    fig = _figure(figsize=(4 * len(keys), 4))
+    axs = fig.subplots(1, len(keys), squeeze=False)
+    fig.suptitle(f"Dispersion Envelopes (5-95 %), {aggregator.runs} Runs")
+    for ax, key in zip(axs[0], keys):
+        plot_envelope(ax, grid, aggregator.envelope(key, (0.05, 0.5, 0.95)))
+        ax.set_title(key)
+        ax.set_xlabel("Time (s)" if aggregator.axis == "t" else "Altitude (m)")
+        if aggregator.axis == "z":
+            ax.invert_xaxis()
+        ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+    return path
+
+
+def _render(job):
+    fn, args = job
+    return fn(*args)
+
+
+def render(jobs: list, workers: int = None) -> list:
+    """
+    Renders figures in a pool of worker processes. Figures draw on bare Agg
+    canvases, so no display or GUI backend is needed anywhere.
+
+    Args:
+        jobs (list): (function, args) pairs, e.g. (overlay_figure, (path, t,
+            traces)); functions must be module-level.
+        workers (int): Worker processes; defaults to min(CPU count, jobs).
+            With 1 the jobs run in this process.
+
+    Returns:
+        list: Each job's return value, in order.
+    """
+    workers = workers or min(os.cpu_count(), len(jobs))
+    if workers <= 1:
+        return [_render(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render, jobs))
+
+
+def render_async(jobs: list, workers: int = None) -> Future:
+    """Runs render on a background thread; the caller can keep simulating."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(render, jobs, workers)
+    executor.shutdown(wait=False)
+    return future
+
+
+def batch_report(prefix: str, records: dict, final: dict, workers: int = None) -> list:
+    """
+    Renders the figures of a batch run: one overlay figure per REPORT channel
+    and one of end-of-run histograms.
+
+    Args:
+        prefix (str): Output path prefix; figures are prefix_<name>.png.
+        records (dict): telemetry.TraceRecorder records.
+        final (dict): Name to per-run final values, for the histograms.
+        workers (int): Worker processes for render.
+    """
+    t = records["t"]
+    jobs = [
+        (overlay_figure, (f"{prefix}_{key}.png", t, {key: records[key]}))
+        for key in REPORT
+        if key in records
+    ]
+    jobs.append((histogram_figure, (f"{prefix}_final.png", final)))
+    return render(jobs, workers)
+
+
+if __name__ == "__main__":
+    import sys
+    import batch
+    from telemetry import TraceRecorder
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    nav, gd, ct, sim = batch.build(n, bias=np.random.default_rng(0).normal(0, 5, n))
+    recorder = TraceRecorder(list(REPORT), every=10)
+    start = time.time()
+    batch.batch_loop(nav, gd, ct, sim, logger=recorder)
+    simulated = time.time() - start
+
+    start = time.time()
+    s = sim.state
+    final = {
+        "Touchdown Velocity (m/s)": np.hypot(s.dr, s.r * s.dtheta),
+        "Propellant Remaining (kg)": s.m - env.m_empty,
+    }
+    paths = batch_report("data/report", recorder.records, final)
+    rendered = time.time() - start
+
+    # --- Printing Results ---
+    print("--- Batch Report ---")
+    print(f"Runs: {n}, simulated in {simulated:.1f} s")
+    print(f"Rendered {len(paths)} figures in {rendered:.1f} s: {', '.join(paths)}")
@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import config as env
 
@@ -17,6 +16,8 @@ def trajectory(theta, alt):
         theta (ndarray): Array of angular positions (degrees).
         alt (ndarray): Array of altitudes (meters).
     """
+    import matplotlib.pyplot as plt  # On demand, so importing viz stays cheap
+
     # Create the trajectory plot showing altitude vs angular position
     plt.figure(figsize=(8, 6))
     plt.plot(theta, alt, label="Trajectory")
@@ -44,6 +45,8 @@ def telemetry(t, vel_components, alpha_cmd, thrust_cmd, alpha_ctrl, thrust_ctrl,
         thrust_ctrl (ndarray): Actual thrust array.
         m_p (ndarray): Propellant mass array.
     """
+    import matplotlib.pyplot as plt
+
     # Initialize a 2x2 subplot figure for comprehensive telemetry review
     vz = vel_components[0]
     vx = vel_components[1]